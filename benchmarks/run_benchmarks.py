@@ -0,0 +1,365 @@
+# benchmarks/run_benchmarks.py
+# 예측 파이프라인 / 페이지 렌더 경로 벤치마크 (브라우저 없이 실행, 결과는 JSON)
+#
+# 사용법:
+#   python -m benchmarks.run_benchmarks --out bench.json
+#   python -m benchmarks.run_benchmarks --sizes 50 500 --ticks 10 --compare bench_old.json
+#
+# 실제 모델 파일(.pkl / .h5)이 없거나 git-lfs 포인터뿐이면 같은 형태의 합성 모델로 대체하고,
+# 어떤 아티팩트를 대체했는지 결과의 meta.synthetic 에 남긴다.
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+warnings.filterwarnings("ignore")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES_DIR = os.path.join(REPO_DIR, "modules")
+SENSOR_COLS = ["temperature", "vibration", "humidity", "pressure", "energy_consumption"]
+FAILURE_CLASSES = ["Electrical Fault", "Normal", "Overheating", "Pressure Drop", "Vibration Issue"]
+
+
+def _is_usable(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, "rb") as f:
+        return not f.read(64).startswith(b"version https://git-lfs")
+
+
+def _random_sensors(rng, n):
+    return np.column_stack([
+        rng.normal(75, 10, n), rng.normal(50, 15, n), rng.uniform(30, 80, n),
+        rng.uniform(1, 5, n), rng.uniform(0.5, 5, n),
+    ])
+
+
+# ✅ 모델 아티팩트 준비: 쓸 수 있는 실제 파일은 링크하고, 없는 것만 합성 모델로 생성
+def prepare_artifacts(workdir, rng):
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+    from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+    from modules.lstm_runtime import NumpyLSTMModel
+
+    names = {
+        "utils": "model_utils.pkl",
+        "failure": "failure_prediction_model.h5",
+        "rul": "random_forest_regressors_by_machine.pkl",
+        "risk": "downtime_risk_model.pkl",
+    }
+    paths = {key: os.path.join(workdir, name) for key, name in names.items()}
+    synthetic = []
+    for key, name in names.items():
+        if _is_usable(os.path.join(MODULES_DIR, name)):
+            os.symlink(os.path.join(MODULES_DIR, name), paths[key])
+
+    if not os.path.exists(paths["utils"]):
+        synthetic.append("utils")
+        raw = np.column_stack([_random_sensors(rng, 2000), np.ones(2000)])
+        with open(paths["utils"], "wb") as f:
+            pickle.dump({
+                "scaler": MinMaxScaler().fit(raw),
+                "label_encoder": LabelEncoder().fit(FAILURE_CLASSES),
+                "sensor_cols": SENSOR_COLS,
+                "feature_cols": SENSOR_COLS + ["delta_minutes"],
+                "seq_length": 10,
+                "num_classes": len(FAILURE_CLASSES),
+            }, f)
+    with open(paths["utils"], "rb") as f:
+        utils = pickle.load(f)
+
+    if not os.path.exists(paths["failure"]):
+        # 원본과 같은 구조(LSTM 128 -> LSTM 64 -> Dense)의 무작위 가중치를 npz로 두고, h5 자리는 빈 파일로 둔다
+        synthetic.append("failure")
+        n_features = len(utils["feature_cols"])
+
+        def lstm(n_in, units, return_sequences):
+            return {"kind": "LSTM", "name": f"lstm_{units}", "activation": "tanh", "recurrent_activation": "sigmoid",
+                    "units": units, "return_sequences": return_sequences, "weights": {
+                        "kernel": rng.normal(0, 0.1, (n_in, 4 * units)).astype(np.float32),
+                        "recurrent_kernel": rng.normal(0, 0.1, (units, 4 * units)).astype(np.float32),
+                        "bias": np.zeros(4 * units, dtype=np.float32)}}
+
+        dense = {"kind": "Dense", "name": "dense", "activation": "softmax", "weights": {
+            "kernel": rng.normal(0, 0.1, (64, utils["num_classes"])).astype(np.float32),
+            "bias": np.zeros(utils["num_classes"], dtype=np.float32)}}
+        open(paths["failure"], "wb").close()
+        os.utime(paths["failure"], (0, 0))
+        NumpyLSTMModel([lstm(n_features, 128, True), lstm(128, 64, False), dense]).save_npz(
+            os.path.join(workdir, "failure_prediction_model.npz"))
+
+    if not os.path.exists(paths["rul"]):
+        synthetic.append("rul")
+        bundle = {}
+        for mid in range(1, 51):
+            X = _random_sensors(rng, 500)
+            scaler = MinMaxScaler().fit(X)
+            y = 200 - X[:, 0] + rng.normal(0, 10, 500)
+            model = RandomForestRegressor(n_estimators=50, max_depth=12, random_state=mid).fit(scaler.transform(X), y)
+            bundle[mid] = {"model": model, "scaler": scaler}
+        with open(paths["rul"], "wb") as f:
+            pickle.dump(bundle, f)
+
+    if not os.path.exists(paths["risk"]):
+        synthetic.append("risk")
+        X = _random_sensors(rng, 5000)[:, :2]
+        y = ((X[:, 0] > 85) | (X[:, 1] > 70)).astype(int)
+        with open(paths["risk"], "wb") as f:
+            pickle.dump(RandomForestClassifier(n_estimators=100, random_state=0).fit(X, y), f)
+    return synthetic
+
+
+# ✅ 모델 로더가 작업 디렉터리의 아티팩트를 읽도록 경로 교체 (페이지 모듈 import 전에 호출)
+def point_loader_at(workdir):
+    from modules import model_loader
+    model_loader.PKL_PATH = os.path.join(workdir, "model_utils.pkl")
+    model_loader.H5_PATH = os.path.join(workdir, "failure_prediction_model.h5")
+    model_loader.FAILURE_NPZ_PATH = os.path.join(workdir, "failure_prediction_model.npz")
+    model_loader.RUL_PATH = os.path.join(workdir, "random_forest_regressors_by_machine.pkl")
+    model_loader.RISK_PATH = os.path.join(workdir, "downtime_risk_model.pkl")
+    model_loader.RUL_SPLIT_DIR = os.path.join(workdir, "rul_models")
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "median_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "n": len(samples),
+    }
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+# ✅ 모델 로드: 첫 로드(분할 포함), 캐시 비운 뒤 로드, 캐시 적중
+def bench_load_models(repeat):
+    import streamlit as st
+    from modules.model_loader import load_all_models
+    st.cache_resource.clear()
+    first = _timed(load_all_models)
+    cold = []
+    for _ in range(repeat):
+        st.cache_resource.clear()
+        cold.append(_timed(load_all_models))
+    warm = [_timed(load_all_models) for _ in range(repeat * 10)]
+    return {"first_ms": first * 1000, "cold": _summary(cold), "warm": _summary(warm)}
+
+
+# ✅ 머신 수별 evaluate_all_machines (시퀀스가 다 찬 정상 상태에서 틱당 시간)
+def bench_evaluate(sizes, ticks):
+    from modules import mainten
+    from modules.ingestion import SyntheticSource
+    results = {}
+    for n in sizes:
+        ids = list(range(1, n + 1))
+        source = SyntheticSource(ids, rate_hz=0, seed=0)
+        store = mainten.new_sequence_store(ids)
+        for _ in range(mainten.seq_length):
+            mainten.append_batch(store, source.read(0))
+        mainten.evaluate_all_machines(store)
+
+        samples = []
+        for _ in range(ticks):
+            mainten.append_batch(store, source.read(0))
+            samples.append(_timed(lambda: mainten.evaluate_all_machines(store)))
+        result = _summary(samples)
+        result["machines_per_sec"] = n / statistics.median(samples)
+        results[str(n)] = result
+    return results
+
+
+# ✅ 페이지 1회 실행 시간 (AppTest, 첫 실행과 이후 재실행)
+def bench_page(workdir, module, entry, reruns):
+    from streamlit.testing.v1 import AppTest
+    script = os.path.join(workdir, f"page_{module}.py")
+    with open(script, "w", encoding="utf-8") as f:
+        f.write(f"import modules.{module} as page\npage.{entry}()\n")
+    at = AppTest.from_file(script, default_timeout=300)
+    first = _timed(at.run)
+    samples = [_timed(at.run) for _ in range(reruns)]
+    return {"first_ms": first * 1000, "rerun": _summary(samples), "exceptions": [str(e.value) for e in at.exception]}
+
+
+# ✅ 시작 비용 (새 인터프리터에서 측정)
+# - 표지: main.py 첫 실행 시간과 그때 올라와 있는 무거운 패키지
+# - 페이지 모듈: streamlit만 올려 둔 상태에서 모듈 import 시간 (모델 로더 + 페이지 모듈)
+_COVER_SCRIPT = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({main!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+print(json.dumps({{
+    "first_run_ms": (time.perf_counter() - start) * 1000,
+    "exceptions": [str(e.value) for e in at.exception],
+    "heavy_modules": [m for m in ("plotly.express", "sklearn", "tensorflow", "modules.model_loader") if m in sys.modules],
+}}))
+'''
+
+_IMPORT_SCRIPT = '''
+import importlib, json, time, warnings
+warnings.filterwarnings("ignore")
+import streamlit
+start = time.perf_counter()
+from modules import model_loader
+for name, value in {paths!r}.items():
+    setattr(model_loader, name, value)
+importlib.import_module({module!r})
+print(json.dumps({{"import_ms": (time.perf_counter() - start) * 1000}}))
+'''
+
+
+def _run_json(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, env=os.environ.copy(),
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def bench_startup(workdir, modules):
+    from modules import model_loader
+    paths = {name: getattr(model_loader, name) for name in
+             ("PKL_PATH", "H5_PATH", "FAILURE_NPZ_PATH", "RUL_PATH", "RISK_PATH", "RUL_SPLIT_DIR")}
+    result = {"cover": _run_json(_COVER_SCRIPT.format(main=os.path.join(REPO_DIR, "main.py")))}
+    result["page_imports"] = {m: _run_json(_IMPORT_SCRIPT.format(paths=paths, module=m)) for m in modules}
+    return result
+
+
+# ✅ 실시간 상태 테이블 메모리 (StreamJob 한 개에 n_ticks 만큼 전체 머신 행을 넣으며 tracemalloc 측정)
+def bench_sensor_log(ticks):
+    from modules import monitoring
+    from modules.ingestion import SyntheticSource
+    from modules.settings import SENSOR_LOG_CAPACITY
+
+    class Feed:
+        def __init__(self):
+            self.source = SyntheticSource(monitoring.MACHINE_IDS, rate_hz=0, seed=0)
+
+        def poll(self):
+            return self.source.read(0)
+
+    job = monitoring.StreamJob()
+    job.subscription = Feed()
+    job.run()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    checkpoints = sorted({ticks // 4, ticks // 2, ticks, min(SENSOR_LOG_CAPACITY, ticks)})
+    samples = {}
+    for tick in range(1, ticks + 1):
+        job.run()
+        if tick in checkpoints:
+            samples[str(tick)] = tracemalloc.get_traced_memory()[0] - base
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    steady = samples[str(ticks)] - samples[str(min(SENSOR_LOG_CAPACITY, ticks))]
+    return {
+        "capacity": SENSOR_LOG_CAPACITY,
+        "buffer_bytes": job.table.nbytes,
+        "traced_bytes_by_tick": samples,
+        "growth_after_capacity_bytes": steady,
+        "peak_bytes": peak,
+    }
+
+
+def _flatten(d, prefix=""):
+    out = {}
+    for key, value in d.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[name] = value
+    return out
+
+
+# ✅ 이전 결과와 비교 (시간 / 메모리 지표의 비율)
+def compare(current, baseline):
+    old = _flatten(baseline["results"])
+    new = _flatten(current["results"])
+    print(f"\n{'metric':<55} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name in sorted(old.keys() & new.keys()):
+        # 반복 횟수(n) / 설정값(capacity)은 비교 대상이 아니다
+        if old[name] and not name.endswith((".n", ".capacity")):
+            print(f"{name:<55} {old[name]:>12.2f} {new[name]:>12.2f} {new[name] / old[name]:>7.2f}")
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dashboard prediction / render benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--log-ticks", type=int, default=2000)
+    parser.add_argument("--out", help="결과 JSON 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dash_bench_")
+    # 벤치마크 중 기록되는 이벤트 / 설정은 작업 디렉터리 안에서만
+    os.environ["DASH_EVENT_DB_PATH"] = os.path.join(workdir, "events.db")
+    os.environ.setdefault("DASH_SENSOR_SOURCE", "synthetic")
+    os.environ.setdefault("DASH_FLEET_WORKERS", "1")
+    sys.path.insert(0, REPO_DIR)
+    try:
+        synthetic = prepare_artifacts(workdir, np.random.default_rng(0))
+        point_loader_at(workdir)
+        results = {"startup": bench_startup(workdir, [
+            "modules.mainten", "modules.monitoring", "modules.manual_input", "modules.performance",
+        ])}
+        results["load_all_models"] = bench_load_models(args.repeat)
+        results["evaluate_all_machines"] = bench_evaluate(args.sizes, args.ticks)
+        results["pages"] = {
+            "monitoring.main": bench_page(workdir, "monitoring", "main", args.ticks),
+            "manual_input.main": bench_page(workdir, "manual_input", "main", args.ticks),
+        }
+        results["sensor_log"] = bench_sensor_log(args.log_ticks)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    import sklearn
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "synthetic": synthetic,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/shard_scaling.py
+# 샤드 프로세스 수에 따른 머신 전체 평가 처리량 (머신 수 x 틱 / 초)
+#
+# 사용법: python -m benchmarks.shard_scaling --machines 2000 --workers 1 2 4 8 --ticks 20 [--json out.json]
+# workers=1 은 샤딩 없이 현재 프로세스에서 평가한 기준값이다.
+# 모델 아티팩트는 run_benchmarks와 같이 준비한다 (git-lfs 포인터뿐이면 합성 모델, 샤드 프로세스도 같은 경로).
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings("ignore")
+
+from benchmarks.run_benchmarks import prepare_artifacts, point_loader_at
+
+
+def run_local(machine_ids, source, warmup, ticks):
+    from modules import mainten
+    from modules.model_loader import load_models
+    load_models(["failure", "rul", "risk"])
+    store = mainten.new_sequence_store(machine_ids)
+
+    def step():
+        mainten.append_batch(store, source.read(0))
+        return mainten.evaluate_all_machines(store)
+
+    return _measure(step, warmup, ticks)
+
+
+def run_sharded(machine_ids, n_workers, source, warmup, ticks, workdir):
+    from modules.shard_pool import ShardedFleetEvaluator
+    shards = ShardedFleetEvaluator(machine_ids, n_workers, initializer=point_loader_at, initargs=(workdir,))
+    try:
+        return _measure(lambda: shards.evaluate(source.read(0)), warmup, ticks)
+    finally:
+        shards.close()
+
+
+def _measure(step, warmup, ticks):
+    # 시퀀스가 다 찰 때까지 돌린 뒤 (고장 예측까지 포함된 정상 상태) 측정
+    for _ in range(warmup):
+        step()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        df, _ = step()
+    elapsed = time.perf_counter() - start
+    return elapsed / ticks, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fleet evaluation shard scaling")
+    parser.add_argument("--machines", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dash_shards_")
+    os.environ["DASH_EVENT_DB_PATH"] = os.path.join(workdir, "events.db")
+    try:
+        synthetic = prepare_artifacts(workdir, np.random.default_rng(0))
+        # 페이지 모듈(mainten)을 import 하기 전에 경로를 바꿔야 함
+        point_loader_at(workdir)
+        if synthetic:
+            print(f"synthetic artifacts: {', '.join(synthetic)}")
+        results = _run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"machines": args.machines, "cpus": os.cpu_count(), "synthetic": synthetic, "results": results},
+                      f, indent=1)
+
+
+def _run(args, workdir):
+    from modules import mainten
+    from modules.ingestion import SyntheticSource
+
+    machine_ids = list(range(1, args.machines + 1))
+    warmup = mainten.seq_length
+    results = []
+    baseline = None
+    print(f"{args.machines} machines, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'ms/tick':>10} {'machines/s':>12} {'speedup':>8}")
+    for n_workers in args.workers:
+        source = SyntheticSource(machine_ids, rate_hz=0, seed=0)
+        if n_workers <= 1:
+            per_tick, rows = run_local(machine_ids, source, warmup, args.ticks)
+        else:
+            per_tick, rows = run_sharded(machine_ids, n_workers, source, warmup, args.ticks, workdir)
+        baseline = baseline or per_tick
+        row = {
+            "workers": n_workers,
+            "ms_per_tick": per_tick * 1000,
+            "machines_per_sec": rows / per_tick,
+            "speedup": baseline / per_tick,
+        }
+        results.append(row)
+        print(f"{n_workers:>8} {row['ms_per_tick']:>10.1f} {row['machines_per_sec']:>12.0f} {row['speedup']:>8.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
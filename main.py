@@ -1,4 +1,5 @@
 import os
+import logging
 import streamlit as st
 from streamlit_option_menu import option_menu
 
@@ -14,19 +15,44 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ----------------------
-# 모듈 임포트
+# 페이지 모듈 (선택된 페이지만 처음 라우팅될 때 import -> 표지는 모델 / plotly 없이 바로 표시)
 # ----------------------
-import modules.monitoring as monitoring
-import modules.manual_input as manual_input
-import modules.mainten as mainten
+from modules.page_loader import load_page
+from modules.settings import PERF_PAGE
+
+# 메뉴 이름 -> (모듈, 진입 함수, 아이콘)
+PAGES = {
+    "유지보수 필요 머신 모니터링": ("modules.mainten", "maintenance_monitoring", "activity"),
+    "실시간 머신 모니터링": ("modules.monitoring", "main", "sliders"),
+    "센서 입력 기반 예측": ("modules.manual_input", "main", "cpu"),
+}
+if PERF_PAGE:
+    PAGES["성능 모니터링"] = ("modules.performance", "main", "speedometer2")
 
 # ----------------------
 # 대시보드 표지 정의
 # ----------------------
+# ✅ 표지 이미지: 축소 / 압축 변형본을 정적 경로로 (브라우저가 화면 폭에 맞는 것 하나만 받고 캐시)
+# 정적 서빙이 꺼져 있으면 가장 큰 WebP를 st.image로, 변형본을 못 만들면 원본을 그대로 보냄
+def cover_image(image_path):
+    from modules.assets import image_variants, picture_html
+    try:
+        variants = image_variants(image_path)
+    except Exception as e:
+        logging.getLogger(__name__).warning("cover image variants unavailable: %s", e)
+        variants = []
+    if not variants:
+        st.image(image_path, use_container_width=True)
+    elif st.get_option("server.enableStaticServing"):
+        st.markdown(picture_html(variants, alt="제조 IoT 모니터링 대시보드"), unsafe_allow_html=True)
+    else:
+        webp = [v for v in variants if v["format"] == "webp"]
+        st.image(webp[-1]["path"], use_container_width=True)
+
 def main_page():
     image_path = 'ppp.png'
     if os.path.exists(image_path):
-        st.image(image_path, use_container_width=True)
+        cover_image(image_path)
     else:
         st.warning("⚠️ 이미지 파일을 찾을 수 없습니다: `ppp.png`")
 
@@ -70,11 +96,14 @@ def main_page():
 # ----------------------
 # 사이드바 메뉴 구성
 # ----------------------
+menu_options = ["대시보드 표지"] + list(PAGES)
+menu_icons = ["house"] + [icon for _, _, icon in PAGES.values()]
+
 with st.sidebar:
     selected = option_menu(
         menu_title="제조 IoT 모니터링",  # 사이드 타이틀
-        options=["대시보드 표지", "유지보수 필요 머신 모니터링", "실시간 머신 모니터링", "센서 입력 기반 예측"],
-        icons=["house", "activity", "sliders", "cpu"],
+        options=menu_options,
+        icons=menu_icons,
         menu_icon="cast",
         default_index=0,
         styles={
@@ -97,11 +126,8 @@ with st.sidebar:
 # ----------------------
 # 페이지 라우팅
 # ----------------------
-if selected == "대시보드 표지":
+if selected in PAGES:
+    module_name, entry, _ = PAGES[selected]
+    getattr(load_page(module_name), entry)()
+else:
     main_page()
-elif selected == "실시간 머신 모니터링":
-    monitoring.main()
-elif selected == "센서 입력 기반 예측":
-    manual_input.main()
-elif selected == "유지보수 필요 머신 모니터링":
-    mainten.maintenance_monitoring()
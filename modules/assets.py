@@ -0,0 +1,123 @@
+# modules/assets.py
+# 표지 등 정적 이미지의 축소 / 압축 변형본 (WebP / JPEG, 여러 가로 폭)
+# 원본 해시를 파일 이름에 넣어 static/assets/ 에 한 번만 만들고, /app/static/ 경로로 서빙한다.
+# 표지 경로에서 import 되므로 Pillow는 변형본을 새로 만들 때만 불러온다.
+
+import hashlib
+import logging
+import os
+import threading
+from html import escape
+from modules.settings import ASSET_WIDTHS, ASSET_WEBP_QUALITY, ASSET_JPEG_QUALITY
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSET_DIR = os.path.join(ROOT_DIR, "static", "assets")
+# Streamlit 정적 파일 경로 (server.enableStaticServing = true, 페이지 기준 상대 경로)
+ASSET_URL = "app/static/assets"
+
+FORMATS = {
+    "webp": {"ext": "webp", "mime": "image/webp"},
+    "jpeg": {"ext": "jpg", "mime": "image/jpeg"},
+}
+
+# (원본 경로, mtime, 크기) -> 변형본 목록 (재실행마다 해시 / 디스크 확인을 하지 않도록)
+_variants = {}
+_lock = threading.Lock()
+
+
+# ✅ 원본 내용 해시 (앞 16자리, 파일 이름용)
+def source_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+# ✅ 원본 이미지의 변형본 목록 (없는 것만 새로 만듦)
+# 반환: [{"format", "width", "path", "url", "bytes"}, ...] (형식별 가로 폭 오름차순)
+def image_variants(source, widths=ASSET_WIDTHS):
+    stat = os.stat(source)
+    key = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size, tuple(widths))
+    variants = _variants.get(key)
+    if variants is not None:
+        return variants
+    with _lock:
+        variants = _variants.get(key)
+        if variants is None:
+            variants = _variants[key] = _build_variants(source, stat, widths)
+    return variants
+
+
+def _build_variants(source, stat, widths):
+    name = os.path.splitext(os.path.basename(source))[0]
+    digest = source_hash(source)
+    image = None
+    variants = []
+    for fmt, spec in FORMATS.items():
+        for width in sorted(set(widths)):
+            filename = f"{name}-{digest}-{width}.{spec['ext']}"
+            path = os.path.join(ASSET_DIR, filename)
+            if not os.path.exists(path):
+                if image is None:
+                    from PIL import Image
+                    image = Image.open(source)
+                    image.load()
+                if width > image.width:
+                    continue  # 원본보다 크게 늘리지 않음
+                _write_variant(image, path, fmt, width, stat)
+            variants.append({
+                "format": fmt,
+                "width": width,
+                "path": path,
+                "url": f"{ASSET_URL}/{filename}",
+                "bytes": os.path.getsize(path),
+            })
+    return variants
+
+
+def _write_variant(image, path, fmt, width, stat):
+    from PIL import Image
+
+    height = round(image.height * width / image.width)
+    resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+    if fmt == "jpeg" and resized.mode != "RGB":
+        # JPEG는 투명도가 없으므로 흰 배경에 합성
+        background = Image.new("RGB", resized.size, "white")
+        rgba = resized.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        resized = background
+    elif fmt == "webp" and resized.mode not in ("RGB", "RGBA"):
+        resized = resized.convert("RGBA")
+
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if fmt == "webp":
+        resized.save(tmp, "WEBP", quality=ASSET_WEBP_QUALITY, method=6)
+    else:
+        resized.save(tmp, "JPEG", quality=ASSET_JPEG_QUALITY, optimize=True, progressive=True)
+    # 정적 서빙은 Cache-Control 없이 Last-Modified만 보내므로, 원본 수정 시각을 물려받아
+    # 브라우저의 휴리스틱 캐시 유효 기간이 생성 시각이 아닌 원본 나이 기준으로 잡히게 한다.
+    os.utime(tmp, ns=(stat.st_mtime_ns, stat.st_mtime_ns))
+    os.replace(tmp, path)
+    logger.info("asset variant written: %s (%d bytes)", path, os.path.getsize(path))
+
+
+# ✅ <picture> 태그 (WebP srcset + JPEG 대체, 브라우저가 화면 폭에 맞는 변형본 하나만 받음)
+def picture_html(variants, alt="", sizes="100vw", style="width: 100%; height: auto;"):
+    def srcset(fmt):
+        return ", ".join(f"{v['url']} {v['width']}w" for v in variants if v["format"] == fmt)
+
+    jpeg = [v for v in variants if v["format"] == "jpeg"]
+    sources = "".join(
+        f'<source type="{spec["mime"]}" srcset="{srcset(fmt)}" sizes="{sizes}">'
+        for fmt, spec in FORMATS.items() if fmt != "jpeg" and srcset(fmt)
+    )
+    return (
+        f"<picture>{sources}"
+        f'<img src="{jpeg[-1]["url"]}" srcset="{srcset("jpeg")}" sizes="{sizes}" '
+        f'alt="{escape(alt)}" style="{style}" decoding="async">'
+        f"</picture>"
+    )
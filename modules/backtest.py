@@ -0,0 +1,185 @@
+# modules/backtest.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from modules.model_loader import load_utils, load_models, load_rul_model
+from modules.batch_engine import (
+    NOT_READY, predict_risk_batch, predict_rul_batch, predict_failure_batch, maintenance_required_mask
+)
+from modules.ingestion import SENSOR_COLUMNS, SyntheticSource
+from modules.feature_pipeline import AffineTransform
+
+# 고장 예측 한 번에 넣는 윈도우 수 (메모리 상한)
+FAILURE_CHUNK = 8192
+
+
+# ✅ 센서 이력 읽기 (CSV / Parquet: machine_id, timestamp, 센서 열)
+def load_history(path):
+    if str(path).endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df[["machine_id", "timestamp"] + SENSOR_COLUMNS]
+
+
+# ✅ 합성 센서 이력 생성 (수집 파이프라인의 합성 소스를 가상 시계로 n_ticks 만큼 돌림)
+def synthetic_history(machine_ids, n_ticks, tick_seconds=60.0, seed=0):
+    source = SyntheticSource(machine_ids, rate_hz=0, tick_seconds=tick_seconds, seed=seed)
+    batches = [source.read(0) for _ in range(n_ticks)]
+    return pd.concat([b.to_frame() for b in batches], ignore_index=True)
+
+
+# ✅ 이력 -> 모델 입력 (mainten.evaluate_all_machines 와 같은 delta_minutes / 스케일링 / 윈도우 규칙)
+# 반환: (머신별로 정렬한 이력, {"machine_ids", "raw", "scaled", "ready"})
+def history_inputs(history, utils):
+    sensor_cols = utils["sensor_cols"]
+    seq_length = utils["seq_length"]
+    history = history.sort_values(["machine_id", "timestamp"], kind="stable").reset_index(drop=True)
+    n = len(history)
+    machine_ids = history["machine_id"].to_numpy(dtype=np.int64)
+    timestamps = history["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+    # delta_minutes: 같은 머신의 직전 행과의 간격 (머신의 첫 행은 실시간 경로와 같이 1분)
+    first = np.r_[True, machine_ids[1:] != machine_ids[:-1]]
+    delta = np.where(first, 1.0, np.diff(timestamps, prepend=timestamps[:1]) / 60e9)
+    raw = np.column_stack([history[sensor_cols].to_numpy(dtype=float), delta])
+    scaled = AffineTransform(utils["scaler"])(raw).astype(np.float32)
+
+    # 머신 안에서의 행 번호가 seq_length - 1 이상이면 윈도우가 찬 것
+    starts = np.flatnonzero(first)
+    position = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+    ready = position >= seq_length - 1
+    return history, {"machine_ids": machine_ids, "raw": raw, "scaled": scaled, "ready": ready}
+
+
+# ✅ 윈도우가 찬 행들의 고장 예측 입력 (len(rows), seq_length, n_features)
+def failure_windows(scaled, rows, seq_length):
+    # (n - L + 1, F, L) 뷰: i 번째 윈도우는 i .. i + L - 1 행
+    windows = sliding_window_view(scaled, seq_length, axis=0)
+    return windows[rows - seq_length + 1].transpose(0, 2, 1)
+
+
+# ✅ 머신 묶음 하나를 평가 (mainten.evaluate_all_machines 와 같은 윈도우 / 스케일링 / 판정 규칙)
+# 실시간처럼 틱마다 한 행씩 넣는 대신, 머신별로 정렬한 전체 이력을 벡터 연산으로 한 번에 처리한다.
+def evaluate_history(history):
+    utils = load_utils()
+    models = load_models(["failure", "rul", "risk"])
+    failure_model, rul_models, risk_model = models["failure"], models["rul"], models["risk"]
+    sensor_cols = utils["sensor_cols"]
+    seq_length = utils["seq_length"]
+
+    history, inputs = history_inputs(history, utils)
+    n = len(history)
+    machine_ids, raw, scaled, ready = inputs["machine_ids"], inputs["raw"], inputs["scaled"], inputs["ready"]
+
+    rul_pred = predict_rul_batch(rul_models, machine_ids, raw[:, :len(sensor_cols)])
+    risk_cols = [sensor_cols.index("temperature"), sensor_cols.index("vibration")]
+    risk_pred = predict_risk_batch(risk_model, raw[:, risk_cols])
+
+    failure_class = np.full(n, NOT_READY, dtype=object)
+    ready_rows = np.flatnonzero(ready)
+    for i in range(0, len(ready_rows), FAILURE_CHUNK):
+        rows = ready_rows[i:i + FAILURE_CHUNK]
+        X_seq = failure_windows(scaled, rows, seq_length)
+        failure_class[rows] = predict_failure_batch(failure_model, utils["label_encoder"], X_seq)
+
+    return pd.DataFrame({
+        "machine_id": machine_ids,
+        "timestamp": history["timestamp"].to_numpy(),
+        "predicted_rul": rul_pred,
+        "downtime_risk": risk_pred,
+        "failure_type": failure_class,
+        "maintenance_required": maintenance_required_mask(ready, rul_pred, risk_pred, failure_class),
+    })
+
+
+# ✅ 머신 ID 기준으로 균등 분할 (한 머신의 이력은 항상 같은 샤드)
+def shard_by_machine(history, n_shards):
+    unique_ids = np.sort(history["machine_id"].unique())
+    shard_of = pd.Series(np.arange(len(unique_ids)) % n_shards, index=unique_ids)
+    keys = history["machine_id"].map(shard_of).to_numpy()
+    return [history[keys == k] for k in range(n_shards) if (keys == k).any()]
+
+
+# ✅ 백테스트 실행: 샤드별 프로세스 병렬 평가 -> 틱 순서로 합쳐서 (결과, 리포트) 반환
+def run_backtest(history, workers=None, output_path=None):
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    shards = shard_by_machine(history, workers)
+
+    if len(shards) <= 1:
+        results = [evaluate_history(shard) for shard in shards]
+    else:
+        # 분할본이 없으면 여기서 한 번만 만들어 둔다 (워커들이 동시에 분할하지 않도록)
+        load_rul_model()
+        # spawn: 부모에 떠 있는 스레드 / TensorFlow 상태를 자식에 복제하지 않음
+        with ProcessPoolExecutor(len(shards), mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(evaluate_history, shards))
+
+    decisions = pd.concat(results, ignore_index=True) if results else evaluate_history(history)
+    decisions = decisions.sort_values(["timestamp", "machine_id"], kind="stable").reset_index(drop=True)
+    elapsed = time.perf_counter() - started
+
+    if output_path:
+        if str(output_path).endswith(".parquet"):
+            decisions.to_parquet(output_path, index=False)
+        else:
+            decisions.to_csv(output_path, index=False)
+    return decisions, backtest_report(decisions, elapsed, len(shards))
+
+
+# ✅ 처리량 / 알림 집계
+def backtest_report(decisions, elapsed, workers):
+    alerts = decisions["maintenance_required"]
+    not_ready = decisions["failure_type"] == NOT_READY
+    with np.errstate(invalid="ignore"):
+        low_rul = (decisions["predicted_rul"] <= 20) & ~not_ready
+    return {
+        "rows": len(decisions),
+        "machines": int(decisions["machine_id"].nunique()),
+        "ticks": int(decisions["timestamp"].nunique()),
+        "workers": workers,
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": round(len(decisions) / elapsed, 1) if elapsed else None,
+        "alerts": {
+            "maintenance_required": int(alerts.sum()),
+            "low_rul": int(low_rul.sum()),
+            "downtime_risk": int(((decisions["downtime_risk"] == 1) & ~not_ready).sum()),
+            "failure_detected": int(((decisions["failure_type"] != "Normal") & ~not_ready).sum()),
+            "not_ready": int(not_ready.sum()),
+        },
+        "alerts_by_machine": {
+            int(mid): int(count)
+            for mid, count in decisions.loc[alerts, "machine_id"].value_counts().sort_index().items()
+        },
+    }
+
+
+# 사용법:
+#   python -m modules.backtest history.parquet --out decisions.parquet --workers 8
+#   python -m modules.backtest --synthetic-days 30 --machines 50 --out decisions.parquet
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="센서 이력 백테스트")
+    parser.add_argument("history", nargs="?", help="CSV / Parquet 센서 이력")
+    parser.add_argument("--out", help="틱별 판정 결과 (.parquet 이면 Parquet, 아니면 CSV)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--synthetic-days", type=float, default=None, help="이력 대신 합성 데이터 (1분 간격)")
+    parser.add_argument("--machines", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.history:
+        history = load_history(args.history)
+    elif args.synthetic_days:
+        history = synthetic_history(range(1, args.machines + 1), int(args.synthetic_days * 24 * 60))
+    else:
+        parser.error("history 경로 또는 --synthetic-days 가 필요합니다")
+    _, report = run_backtest(history, workers=args.workers, output_path=args.out)
+    print(json.dumps(report, ensure_ascii=False, indent=1))
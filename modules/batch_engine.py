@@ -0,0 +1,70 @@
+# modules/batch_engine.py
+
+import numpy as np
+from modules.tree_engine import forest_predict
+from modules.feature_pipeline import rul_transform
+from modules import perf
+
+# 시퀀스가 부족할 때 사용하는 고장 유형 표시값
+NOT_READY = "예측 불가"
+
+
+# ✅ 다운타임 리스크 일괄 예측 (전체 머신을 predict 한 번으로 처리)
+def predict_risk_batch(risk_model, X_risk):
+    X_risk = np.asarray(X_risk, dtype=float)
+    if len(X_risk) == 0:
+        return np.empty(0, dtype=int)
+    perf.count("model_calls", model="risk")
+    perf.count("model_rows", len(X_risk), model="risk")
+    return np.asarray(forest_predict(risk_model, X_risk)).astype(int)
+
+
+# ✅ 잔존수명 일괄 예측 (같은 RUL 모델을 쓰는 행끼리 묶어서 한 번씩만 호출)
+def predict_rul_batch(rul_models, machine_ids, X_sensor):
+    X_sensor = np.asarray(X_sensor, dtype=float)
+    preds = np.full(len(machine_ids), np.nan)
+
+    # 모델 조회는 머신 ID별로 한 번만 (같은 머신의 행이 많아도 됨)
+    unique_ids, inverse = np.unique(np.asarray(machine_ids), return_inverse=True)
+    groups = {}
+    for j, mid in enumerate(unique_ids.tolist()):
+        entry = rul_models.get(mid)
+        if entry is None:
+            continue
+        key = (id(entry["model"]), id(entry.get("scaler")))
+        groups.setdefault(key, (entry, []))[1].append(j)
+
+    for entry, ids in groups.values():
+        rows = np.flatnonzero(np.isin(inverse, ids))
+        X = X_sensor[rows]
+        transform = rul_transform(entry)
+        if transform is not None:
+            X = transform(X)
+        preds[rows] = forest_predict(entry["model"], X)
+        perf.count("model_calls", model="rul")
+        perf.count("model_rows", len(rows), model="rul")
+    return preds
+
+
+# ✅ 고장 유형 일괄 예측 (N x seq_length x n_features 텐서를 한 번에 추론)
+def predict_failure_batch(failure_model, label_encoder, X_seq):
+    X_seq = np.asarray(X_seq, dtype=np.float32)
+    if len(X_seq) == 0:
+        return np.empty(0, dtype=object)
+    perf.count("model_calls", model="failure")
+    perf.count("model_rows", len(X_seq), model="failure")
+    y_pred = failure_model.predict(X_seq, verbose=0)
+    return np.asarray(label_encoder.inverse_transform(np.argmax(y_pred, axis=1)), dtype=object)
+
+
+# ✅ 유지보수 필요 여부 판정 (mainten / monitoring 공통 규칙)
+def maintenance_required_mask(ready, rul_pred, risk_pred, failure_class):
+    ready = np.asarray(ready, dtype=bool)
+    rul_pred = np.asarray(rul_pred, dtype=float)
+    with np.errstate(invalid="ignore"):
+        low_rul = rul_pred <= 20
+    return ready & (
+        low_rul |
+        (np.asarray(risk_pred) == 1) |
+        (np.asarray(failure_class, dtype=object) != "Normal")
+    )
@@ -0,0 +1,97 @@
+# modules/chart_cache.py
+
+import hashlib
+import numpy as np
+import streamlit as st
+from modules import perf
+
+
+# ✅ 차트 입력값 서명 (값이 같으면 같은 문자열)
+def data_signature(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        arr = np.asarray(part)
+        h.update(arr.tobytes() if arr.dtype != object else repr(arr.tolist()).encode("utf-8"))
+        h.update(b"|")
+    return h.hexdigest()
+
+
+# ✅ 차트 자리 하나 (placeholder + 유지되는 Figure + 마지막 입력 서명)
+class ChartSlot:
+    def __init__(self, name, placeholder):
+        self.name = name
+        self.placeholder = placeholder
+        self.figure = None
+        self.signature = None
+        self.version = 0
+
+
+# ✅ 틱마다 바뀐 차트만 다시 보내는 렌더링 보드
+# - 입력 서명이 지난번과 같으면 아무것도 보내지 않는다 (placeholder에 이전 차트가 그대로 남음).
+# - 바뀐 경우 Figure를 새로 만들지 않고 update(fig)로 trace 값만 바꿔서 보낸다.
+# - 차트 key는 내용이 바뀔 때만 올라가므로 같은 실행 안에서 key가 겹치지 않는다.
+class ChartBoard:
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.slots = {}
+        self.rendered = 0
+        self.skipped = 0
+
+    def slot(self, name, container=None):
+        placeholder = (container or st).empty()
+        self.slots[name] = ChartSlot(name, placeholder)
+        return self.slots[name]
+
+    def render(self, name, signature, build, update=None):
+        slot = self.slots[name]
+        if signature == slot.signature:
+            self.skipped += 1
+            perf.count("chart_updates", board=self.prefix, result="skipped")
+            return False
+        if slot.figure is None or update is None:
+            slot.figure = build()
+        else:
+            with slot.figure.batch_update():
+                update(slot.figure)
+        slot.signature = signature
+        slot.version += 1
+        slot.placeholder.plotly_chart(
+            slot.figure, use_container_width=True, key=f"{self.prefix}_{name}_{slot.version}"
+        )
+        self.rendered += 1
+        perf.count("chart_updates", board=self.prefix, result="rendered")
+        return True
+
+    def write(self, name, signature, draw):
+        slot = self.slots[name]
+        if signature == slot.signature:
+            self.skipped += 1
+            perf.count("chart_updates", board=self.prefix, result="skipped")
+            return False
+        slot.signature = signature
+        with slot.placeholder.container():
+            draw()
+        self.rendered += 1
+        perf.count("chart_updates", board=self.prefix, result="rendered")
+        return True
+
+    def stats(self):
+        total = self.rendered + self.skipped
+        return {
+            "rendered": self.rendered,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / total if total else 0.0,
+        }
+
+
+# ✅ 세션별로 유지되는 Figure (재실행마다 새로 만들지 않고 값만 갱신)
+def session_figure(key, build, signature=None, update=None):
+    cache = st.session_state.setdefault("_figure_cache", {})
+    item = cache.get(key)
+    if item is None:
+        item = cache[key] = {"figure": build(), "signature": None}
+    if update is not None and signature != item["signature"]:
+        with item["figure"].batch_update():
+            update(item["figure"])
+        item["signature"] = signature
+    return item["figure"]
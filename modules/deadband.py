@@ -0,0 +1,61 @@
+# modules/deadband.py
+
+import numpy as np
+from modules.batch_engine import NOT_READY
+
+
+# ✅ 데드밴드 기반 재평가 선택기
+# - 머신별로 마지막으로 평가했을 때의 센서값을 기억해 두고, 어느 열이든 데드밴드보다 크게 변했을 때만 다시 평가한다.
+# - 새 데이터가 없는 머신은 값이 그대로라 자동으로 건너뛰고, 직전 예측을 그대로 쓴다.
+# - 윈도우가 막 찬 머신(ready 변화)과 max_skip 틱 동안 건너뛴 머신은 강제로 다시 평가한다.
+class DeadbandScorer:
+    def __init__(self, n_machines, columns, deadbands, max_skip=12):
+        self.n_machines = n_machines
+        # 데드밴드가 지정되지 않은 열은 0 (조금이라도 바뀌면 재평가)
+        self.deadbands = np.array([deadbands.get(c, 0.0) for c in columns], dtype=float)
+        self.max_skip = max_skip
+        self.reset()
+
+    def reset(self):
+        n = self.n_machines
+        self._values = np.full((n, len(self.deadbands)), np.nan)
+        self._ready = np.zeros(n, dtype=bool)
+        self._skipped = np.zeros(n, dtype=np.int64)
+        self.rul = np.full(n, np.nan)
+        self.risk = np.zeros(n, dtype=np.int64)
+        self.failure = np.full(n, NOT_READY, dtype=object)
+        self.checked = 0
+        self.skipped = 0
+        self.last_checked = 0
+        self.last_skipped = 0
+
+    # ✅ 다시 평가할 머신 표시 (idx: 머신 행 번호, values: columns 순서의 최신 센서값, ready: 윈도우가 찼는지)
+    def dirty(self, idx, values, ready):
+        with np.errstate(invalid="ignore"):
+            moved = (np.abs(values - self._values[idx]) > self.deadbands).any(axis=1)
+        never = np.isnan(self._values[idx]).all(axis=1)
+        return moved | never | (ready != self._ready[idx]) | (self._skipped[idx] >= self.max_skip)
+
+    # ✅ 이번 틱 결과 반영 (dirty 인 머신은 새 예측 저장, 나머지는 건너뜀 횟수 증가)
+    def record(self, idx, dirty, values, ready, rul, risk, failure):
+        rows = idx[dirty]
+        self._values[rows] = values[dirty]
+        self._ready[rows] = ready[dirty]
+        self._skipped[rows] = 0
+        self._skipped[idx[~dirty]] += 1
+        self.rul[rows] = rul
+        self.risk[rows] = risk
+        self.failure[rows] = failure
+
+        self.last_checked = len(idx)
+        self.last_skipped = int((~dirty).sum())
+        self.checked += self.last_checked
+        self.skipped += self.last_skipped
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / self.checked if self.checked else 0.0,
+            "last_skip_rate": self.last_skipped / self.last_checked if self.last_checked else 0.0,
+        }
@@ -0,0 +1,194 @@
+# modules/event_store.py
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import pandas as pd
+import streamlit as st
+from modules.settings import EVENT_DB_PATH, EVENT_FLUSH_ROWS, EVENT_FLUSH_SEC
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_COLUMNS = ["ts", "machine_id", "source", "predicted_rul", "downtime_risk", "failure_type", "maintenance_required"]
+EVENT_COLUMNS = ["ts", "machine_id", "source", "failure_type", "downtime_risk", "predicted_rul"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    ts INTEGER NOT NULL,
+    machine_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    predicted_rul REAL,
+    downtime_risk INTEGER,
+    failure_type TEXT,
+    maintenance_required INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_machine_ts ON predictions (machine_id, ts);
+
+CREATE TABLE IF NOT EXISTS maintenance_events (
+    ts INTEGER NOT NULL,
+    machine_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    failure_type TEXT,
+    downtime_risk INTEGER,
+    predicted_rul REAL
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON maintenance_events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_source_ts ON maintenance_events (source, ts);
+CREATE INDEX IF NOT EXISTS idx_events_machine_ts ON maintenance_events (machine_id, ts);
+"""
+
+
+def _to_ns(value):
+    return None if value is None else pd.Timestamp(value).value
+
+
+def _optional(value, cast):
+    return None if value is None or pd.isna(value) else cast(value)
+
+
+# ✅ 예측 결과 / 유지보수 이벤트 저장소 (SQLite WAL, 추가 전용)
+# - 쓰기는 메모리에 모았다가 백그라운드 스레드가 flush_interval 마다 한 트랜잭션으로 기록한다.
+# - 읽기는 스레드별 연결을 쓰고, (시간) / (머신, 시간) 인덱스로 필요한 구간만 조회한다.
+class EventStore:
+    def __init__(self, path, flush_rows=1000, flush_interval=1.0):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.executescript(_SCHEMA)
+
+        self._local = threading.local()
+        self._pending_predictions = []
+        self._pending_events = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-store", daemon=True)
+        self._thread.start()
+
+    # ✅ 틱 하나의 예측 결과 추가 (df: machine_id, predicted_rul, downtime_risk, failure_type, maintenance_required)
+    # maintenance_required 인 행은 유지보수 이벤트로도 기록된다.
+    def append_predictions(self, df, source, ts=None):
+        ts = _to_ns(ts if ts is not None else datetime.now())
+        rows = [
+            (ts, int(mid), source, _optional(rul, float), _optional(risk, int), failure, int(bool(required)))
+            for mid, rul, risk, failure, required in zip(
+                df["machine_id"], df["predicted_rul"], df["downtime_risk"], df["failure_type"], df["maintenance_required"]
+            )
+        ]
+        events = [(r[0], r[1], r[2], r[5], r[4], r[3]) for r in rows if r[6]]
+        with self._lock:
+            self._pending_predictions.extend(rows)
+            self._pending_events.extend(events)
+            pending = len(self._pending_predictions)
+        if pending >= self.flush_rows:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                predictions, self._pending_predictions = self._pending_predictions, []
+                events, self._pending_events = self._pending_events, []
+            if not predictions and not events:
+                return 0
+            with self._writer:
+                self._writer.executemany(
+                    f"INSERT INTO predictions ({', '.join(PREDICTION_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", predictions
+                )
+                self._writer.executemany(
+                    f"INSERT INTO maintenance_events ({', '.join(EVENT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)", events
+                )
+            self.rows_written += len(predictions)
+            return len(predictions)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("event store flush failed")
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self._writer.close()
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def _query(self, sql, params, columns):
+        rows = self._reader().execute(sql, params).fetchall()
+        df = pd.DataFrame(rows, columns=columns)
+        df["ts"] = pd.to_datetime(df["ts"])
+        return df
+
+    # ✅ 최근 유지보수 이벤트 n개 (오래된 순 -> 최신 순)
+    def last_events(self, n=5, machine_id=None, source=None):
+        where, params = self._filters(machine_id, source)
+        df = self._query(
+            f"SELECT {', '.join(EVENT_COLUMNS)} FROM maintenance_events {where} ORDER BY ts DESC LIMIT ?",
+            params + [n], EVENT_COLUMNS,
+        )
+        return df.iloc[::-1].reset_index(drop=True)
+
+    # ✅ 머신 한 대의 구간 이벤트 / 예측 (start <= ts < end)
+    def events_for_machine(self, machine_id, start=None, end=None, source=None):
+        return self._range("maintenance_events", EVENT_COLUMNS, machine_id, start, end, source)
+
+    def predictions_for_machine(self, machine_id, start=None, end=None, source=None):
+        return self._range("predictions", PREDICTION_COLUMNS, machine_id, start, end, source)
+
+    # ✅ 최근 n개 이벤트의 고장 유형별 개수
+    def failure_type_counts(self, n=500, machine_id=None, source=None):
+        where, params = self._filters(machine_id, source)
+        rows = self._reader().execute(
+            f"SELECT failure_type, COUNT(*) FROM "
+            f"(SELECT failure_type FROM maintenance_events {where} ORDER BY ts DESC LIMIT ?) "
+            f"GROUP BY failure_type ORDER BY COUNT(*) DESC",
+            params + [n],
+        ).fetchall()
+        return pd.DataFrame(rows, columns=["failure_type", "count"])
+
+    def _range(self, table, columns, machine_id, start, end, source):
+        where, params = self._filters(machine_id, source)
+        if start is not None:
+            where += " AND ts >= ?"
+            params.append(_to_ns(start))
+        if end is not None:
+            where += " AND ts < ?"
+            params.append(_to_ns(end))
+        return self._query(f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY ts", params, columns)
+
+    @staticmethod
+    def _filters(machine_id, source):
+        clauses, params = ["1 = 1"], []
+        if machine_id is not None:
+            clauses.append("machine_id = ?")
+            params.append(int(machine_id))
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+        return "WHERE " + " AND ".join(clauses), params
+
+
+# ✅ 프로세스 공용 저장소 (모든 세션 / 작업이 같은 파일에 기록)
+@st.cache_resource
+def get_event_store():
+    return EventStore(EVENT_DB_PATH, flush_rows=EVENT_FLUSH_ROWS, flush_interval=EVENT_FLUSH_SEC)
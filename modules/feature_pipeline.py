@@ -0,0 +1,89 @@
+# modules/feature_pipeline.py
+
+import threading
+import weakref
+import numpy as np
+
+
+# ✅ 학습된 sklearn 스케일러를 NumPy 아핀 변환으로 미리 풀어 두기
+# - MinMaxScaler:          X * scale_ + min_           (sklearn transform과 같은 연산 순서)
+# - StandardScaler / RobustScaler / MaxAbsScaler: (X - center) / divisor
+# 지원하지 않는 스케일러는 원래 transform()으로 대체한다.
+class AffineTransform:
+    def __init__(self, scaler):
+        self.mode = None
+        self.clip = None
+        n = getattr(scaler, "n_features_in_", None)
+        kind = type(scaler).__name__
+
+        if kind == "MinMaxScaler":
+            self.mode = "scale"
+            self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+            self.offset = np.asarray(scaler.min_, dtype=np.float64)
+            if getattr(scaler, "clip", False):
+                self.clip = scaler.feature_range
+        elif kind == "StandardScaler":
+            self.mode = "center"
+            self.center = np.asarray(scaler.mean_, dtype=np.float64) if scaler.with_mean else np.zeros(n)
+            self.divisor = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_std else np.ones(n)
+        elif kind == "RobustScaler":
+            self.mode = "center"
+            self.center = np.asarray(scaler.center_, dtype=np.float64) if scaler.with_centering else np.zeros(n)
+            self.divisor = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_scaling else np.ones(n)
+        elif kind == "MaxAbsScaler":
+            self.mode = "center"
+            self.center = np.zeros(n)
+            self.divisor = np.asarray(scaler.scale_, dtype=np.float64)
+        # 풀어 둔 값만 쓰면 스케일러 객체는 붙잡지 않음 (대체 경로에서만 보관)
+        self.scaler = scaler if self.mode is None else None
+
+    @property
+    def compiled(self):
+        return self.mode is not None
+
+    def __call__(self, X):
+        if self.mode is None:
+            X = np.asarray(X)
+            return self.scaler.transform(X.reshape(-1, X.shape[-1])).reshape(X.shape)
+        X = np.asarray(X, dtype=np.float64)
+        if self.mode == "scale":
+            out = X * self.scale + self.offset
+        else:
+            out = (X - self.center) / self.divisor
+        if self.clip is not None:
+            np.clip(out, self.clip[0], self.clip[1], out=out)
+        return out
+
+
+# ✅ 정수 타임스탬프(epoch ns)로 행 간 간격(분) 계산 (마지막 축 기준, 첫 행은 0)
+def delta_minutes(timestamps):
+    ts = np.asarray(timestamps, dtype=np.int64)
+    delta = np.zeros(ts.shape)
+    delta[..., 1:] = np.diff(ts, axis=-1) / 60e9
+    return delta
+
+
+# ✅ 센서값 + delta_minutes 를 한 번에 스케일링한 입력
+# timestamps (n,) / values (n, c) -> (n, c + 1), 여러 머신이면 (k, n) / (k, n, c) -> (k, n, c + 1)
+def window_features(transform, timestamps, values):
+    return transform(np.concatenate([values, delta_minutes(timestamps)[..., None]], axis=-1))
+
+
+# 스케일러 객체 -> 풀어 둔 변환 (공유 엔트리 dict는 건드리지 않고, 스케일러가 내려가면 함께 정리)
+_transforms = weakref.WeakKeyDictionary()
+_transform_lock = threading.Lock()
+
+
+# ✅ 머신별 RUL 엔트리의 스케일러 변환 (스케일러당 한 번만 만듦)
+def rul_transform(entry):
+    scaler = entry.get("scaler")
+    if scaler is None:
+        return None
+    with _transform_lock:
+        transform = _transforms.get(scaler)
+        if transform is None:
+            transform = AffineTransform(scaler)
+            if transform.compiled:
+                # 대체 경로 변환은 스케일러를 붙잡으므로 캐시하지 않음 (만드는 비용도 없음)
+                _transforms[scaler] = transform
+        return transform
@@ -0,0 +1,226 @@
+# modules/fleet_stats.py
+
+import threading
+from collections import Counter, deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# 잔존수명 히스토그램 구간 (시간)
+RUL_BINS = np.arange(0, 201, 20)
+
+
+# ✅ 최근 maxlen 개 항목의 개수 집계 (추가 / 만료 모두 O(1))
+class RollingCounter:
+    def __init__(self, maxlen):
+        self.items = deque(maxlen=maxlen)
+        self.counts = Counter()
+
+    def add(self, item):
+        if len(self.items) == self.items.maxlen:
+            old = self.items[0]
+            self.counts[old] -= 1
+            if not self.counts[old]:
+                del self.counts[old]
+        self.items.append(item)
+        self.counts[item] += 1
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+
+# ✅ 시간 구간 합계 (틱마다 값 벡터를 더하고, 구간을 벗어난 틱은 빼서 합계를 유지)
+class RollingWindow:
+    def __init__(self, seconds, width):
+        self.span = int(seconds * 1e9)
+        self.points = deque()
+        self.total = np.zeros(width)
+
+    def add(self, ts, vector):
+        self.points.append((ts, vector))
+        self.total += vector
+        self.expire(ts)
+
+    def expire(self, now):
+        while self.points and self.points[0][0] <= now - self.span:
+            self.total -= self.points.popleft()[1]
+
+    def reset(self):
+        self.points.clear()
+        self.total[:] = 0
+
+
+# ✅ 틱 기록 (미리 잡아 둔 배열에 이어 쓰고, 구간을 벗어난 틱은 시작 위치만 옮김)
+# 끝까지 차면 앞쪽 빈 칸으로 당기거나, 절반 넘게 차 있으면 두 배로 늘린다.
+class TickHistory:
+    COLUMNS = ["mean_rul", "maintenance", "new_alerts", "machines"]
+
+    def __init__(self, seconds, capacity=1024):
+        self.span = int(seconds * 1e9)
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(self.COLUMNS)))
+        self.start = self.end = 0
+
+    def add(self, ts, values):
+        if self.end == len(self.ts):
+            n = self.end - self.start
+            if n * 2 > len(self.ts):
+                self.ts = np.concatenate([self.ts[self.start:self.end], np.zeros(len(self.ts), dtype=np.int64)])
+                self.values = np.concatenate([self.values[self.start:self.end], np.zeros_like(self.values)])
+            else:
+                self.ts[:n] = self.ts[self.start:self.end]
+                self.values[:n] = self.values[self.start:self.end]
+            self.start, self.end = 0, n
+        self.ts[self.end] = ts
+        self.values[self.end] = values
+        self.end += 1
+        self.start += int(np.searchsorted(self.ts[self.start:self.end], ts - self.span, side="right"))
+
+    # 최근 seconds 초 (None 이면 전체) 를 DataFrame으로 (배열은 복사해서 넘김)
+    def frame(self, seconds=None):
+        start = self.start
+        if seconds is not None and self.end > start:
+            cutoff = self.ts[self.end - 1] - int(seconds * 1e9)
+            start += int(np.searchsorted(self.ts[start:self.end], cutoff, side="left"))
+        df = pd.DataFrame(self.values[start:self.end].copy(), columns=self.COLUMNS)
+        df = df.astype({col: np.int64 for col in self.COLUMNS[1:]})
+        df.insert(0, "timestamp", pd.to_datetime(self.ts[start:self.end].copy()))
+        return df
+
+    def reset(self):
+        self.start = self.end = 0
+
+
+# ✅ 머신 전체 요약 통계를 변경분만 반영해서 유지하는 집계기
+# - 머신별 직전 값을 기억해 두고, 값이 바뀐 머신만 이전 기여분을 빼고 새 값을 더한다.
+# - 틱마다 (평균 RUL, 유지보수 필요 수, 신규 알림 수)를 기록해서 5분 / 1시간 / 교대 구간 추세를 낸다.
+class FleetAggregator:
+    # 틱 벡터 열: 틱 수, 평균 RUL 합, 유지보수 필요 머신 수 합, 신규 알림 수, 평가 머신 수 합,
+    # 평균 RUL이 있는 틱 수 (RUL 모델이 아직 없는 틱은 평균 RUL 합에도 분모에도 넣지 않음)
+    _TICKS, _RUL, _MAINT, _ALERTS, _MACHINES, _RUL_TICKS = range(6)
+
+    def __init__(self, machine_ids, labels, windows):
+        self.machine_ids = list(machine_ids)
+        self.index = {mid: i for i, mid in enumerate(self.machine_ids)}
+        self.labels = list(labels)
+        self.windows = {name: RollingWindow(seconds, 6) for name, seconds in windows.items()}
+        # 추세 그래프용 틱 기록 (작업 스레드가 쓰고 페이지가 그릴 때만 읽음)
+        self._history = TickHistory(max(windows.values()))
+        self._history_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        n = len(self.machine_ids)
+        self._present = np.zeros(n, dtype=bool)
+        self._rul = np.full(n, np.nan)
+        self._risk = np.full(n, -1, dtype=np.int64)
+        self._failure = np.full(n, -1, dtype=np.int64)
+        self._maint = np.zeros(n, dtype=bool)
+        self._bin = np.full(n, -1, dtype=np.int64)
+
+        self.rul_sum = 0.0
+        self.rul_count = 0
+        self.failure_counts = np.zeros(len(self.labels), dtype=np.int64)
+        self.risk_counts = Counter()
+        self.maint_count = 0
+        self.histogram = np.zeros(len(RUL_BINS) + 1, dtype=np.int64)
+        self.last_changed = 0
+        for window in self.windows.values():
+            window.reset()
+        with self._history_lock:
+            self._history.reset()
+
+    def _codes(self, failure_types):
+        codes = []
+        for label in failure_types:
+            if label not in self.labels:
+                self.labels.append(label)
+                self.failure_counts = np.append(self.failure_counts, 0)
+            codes.append(self.labels.index(label))
+        return np.array(codes, dtype=np.int64)
+
+    def _apply(self, idx, sign):
+        rul = self._rul[idx]
+        valid = ~np.isnan(rul)
+        self.rul_sum += sign * rul[valid].sum()
+        self.rul_count += sign * int(valid.sum())
+        np.add.at(self.failure_counts, self._failure[idx], sign)
+        for risk, count in zip(*np.unique(self._risk[idx], return_counts=True)):
+            self.risk_counts[int(risk)] += sign * int(count)
+        self.maint_count += sign * int(self._maint[idx].sum())
+        np.add.at(self.histogram, self._bin[idx], sign)
+
+    # ✅ 한 틱의 평가 결과 반영 (df: machine_id, predicted_rul, downtime_risk, failure_type, maintenance_required)
+    def update(self, df, ts=None):
+        ts = pd.Timestamp(ts if ts is not None else datetime.now()).value
+        idx = np.array([self.index[mid] for mid in df["machine_id"]], dtype=np.int64)
+        rul = df["predicted_rul"].to_numpy(dtype=float)
+        risk = pd.to_numeric(df["downtime_risk"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+        failure = self._codes(df["failure_type"])
+        maint = df["maintenance_required"].to_numpy(dtype=bool)
+
+        old_rul = self._rul[idx]
+        same_rul = (old_rul == rul) | (np.isnan(old_rul) & np.isnan(rul))
+        changed = ~self._present[idx] | ~same_rul | (self._risk[idx] != risk) | (self._failure[idx] != failure) | (self._maint[idx] != maint)
+        sel = np.flatnonzero(changed)
+        rows = idx[sel]
+        new_alerts = int((maint[sel] & ~self._maint[rows]).sum())
+
+        # 바뀐 머신만 이전 값 제거 -> 새 값 추가
+        old = rows[self._present[rows]]
+        if len(old):
+            self._apply(old, -1)
+        self._present[rows] = True
+        self._rul[rows] = rul[sel]
+        self._risk[rows] = risk[sel]
+        self._failure[rows] = failure[sel]
+        self._maint[rows] = maint[sel]
+        # 마지막 구간은 200시간 이상, 그 다음 칸은 RUL 모델이 없는 머신
+        bins = np.clip(np.digitize(rul[sel], RUL_BINS) - 1, 0, len(RUL_BINS) - 1)
+        bins[np.isnan(rul[sel])] = len(RUL_BINS)
+        self._bin[rows] = bins
+        if len(rows):
+            self._apply(rows, +1)
+        self.last_changed = len(rows)
+
+        n = int(self._present.sum())
+        mean_rul = self.rul_sum / self.rul_count if self.rul_count else np.nan
+        has_rul = not np.isnan(mean_rul)
+        vector = np.array([1.0, mean_rul if has_rul else 0.0, self.maint_count, new_alerts, n, float(has_rul)])
+        for window in self.windows.values():
+            window.add(ts, vector)
+        with self._history_lock:
+            self._history.add(ts, (mean_rul, self.maint_count, new_alerts, n))
+
+    # ✅ 현재 시점 요약
+    def summary(self):
+        return {
+            "machines": int(self._present.sum()),
+            "mean_rul": self.rul_sum / self.rul_count if self.rul_count else None,
+            "maintenance": self.maint_count,
+            "failure_counts": {label: int(c) for label, c in zip(self.labels, self.failure_counts) if c},
+            "risk_counts": {risk: count for risk, count in sorted(self.risk_counts.items()) if count and risk >= 0},
+            "rul_histogram": (RUL_BINS.copy(), self.histogram[:len(RUL_BINS)].copy()),
+            "changed": self.last_changed,
+        }
+
+    # ✅ 구간별 요약 (틱 평균 RUL, 평균 유지보수 비율, 구간 내 신규 알림 수)
+    def window_summaries(self):
+        out = {}
+        for name, window in self.windows.items():
+            total = window.total
+            rul_ticks = total[self._RUL_TICKS]
+            out[name] = {
+                "ticks": int(total[self._TICKS]),
+                "mean_rul": float(total[self._RUL] / rul_ticks) if rul_ticks else None,
+                "maintenance_ratio": float(total[self._MAINT] / total[self._MACHINES]) if total[self._MACHINES] else None,
+                "new_alerts": int(total[self._ALERTS]),
+            }
+        return out
+
+    # ✅ 추세 그래프용 틱 기록 (마지막 틱 기준 최근 seconds 초, None 이면 가장 긴 구간까지)
+    # 그래프를 다시 그릴 때만 호출한다 (틱마다 만들지 않음).
+    def trend_frame(self, seconds=None):
+        with self._history_lock:
+            return self._history.frame(seconds)
@@ -0,0 +1,156 @@
+# modules/inference_worker.py
+
+import logging
+import threading
+import time
+from datetime import datetime
+import streamlit as st
+from modules.settings import WORKER_IDLE_TIMEOUT_SEC
+from modules import perf
+from modules.scheduler import AdaptiveScheduler
+
+logger = logging.getLogger(__name__)
+
+
+# ✅ 프로세스 공용 추론 워커
+# - 페이지는 ensure_job()으로 작업(job)을 한 번 등록하고, snapshot()으로 결과만 읽는다.
+# - 작업은 run() / reset() 메서드를 가진 객체이며, run()이 반환한 dict가 스냅샷으로 게시된다.
+# - 브라우저 세션 수와 관계없이 작업은 워커 스레드에서 주기마다 한 번만 실행된다.
+# - 작업마다 AdaptiveScheduler가 처리 시간을 재서, 주기보다 오래 걸리면 실효 주기를 늘리고 밀린 틱은 병합한다.
+class InferenceWorker:
+    def __init__(self, idle_timeout=WORKER_IDLE_TIMEOUT_SEC):
+        self.idle_timeout = idle_timeout
+        self._jobs = {}
+        self._snapshots = {}
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="inference-worker", daemon=True)
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    # ✅ 작업 등록 (이미 있으면 기존 작업 반환)
+    def ensure_job(self, name, factory, interval):
+        with self._cond:
+            slot = self._jobs.get(name)
+            if slot is None:
+                schedule = AdaptiveScheduler(name, interval)
+                schedule.next_due = time.monotonic()
+                slot = {
+                    "job": factory(),
+                    "schedule": schedule,
+                    "last_read": time.monotonic(),
+                    "reset": False,
+                    "tick": 0,
+                }
+                self._jobs[name] = slot
+                perf.register_stats(f"schedule_{name}", schedule.status)
+                self._cond.notify_all()
+            return slot["job"]
+
+    def set_interval(self, name, interval):
+        with self._cond:
+            self._jobs[name]["schedule"].set_interval(interval)
+
+    # ✅ 작업의 현재 스케줄 상태 (실효 주기 / 처리 시간 / 병합된 틱 수)
+    def schedule(self, name):
+        with self._cond:
+            slot = self._jobs.get(name)
+            return slot["schedule"].status() if slot else None
+
+    def reset(self, name):
+        with self._cond:
+            if name in self._jobs:
+                self._jobs[name]["reset"] = True
+                self._jobs[name]["schedule"].next_due = time.monotonic()
+                self._snapshots.pop(name, None)
+                self._cond.notify_all()
+
+    # ✅ 최신 스냅샷 읽기 (읽는 세션이 없으면 작업은 잠시 쉰다)
+    def snapshot(self, name):
+        with self._cond:
+            self._touch(name)
+            return self._snapshots.get(name)
+
+    # ✅ after_tick 이후의 새 스냅샷을 timeout 초까지 기다림
+    def wait_snapshot(self, name, after_tick=None, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._touch(name)
+                snap = self._snapshots.get(name)
+                if snap is not None and (after_tick is None or snap["tick"] != after_tick):
+                    return snap
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return snap
+                self._cond.wait(remaining if remaining is None else min(remaining, 1.0))
+
+    def _touch(self, name):
+        if name in self._jobs:
+            was_idle = self._is_idle(self._jobs[name], time.monotonic())
+            self._jobs[name]["last_read"] = time.monotonic()
+            if was_idle:
+                self._cond.notify_all()
+
+    def _is_idle(self, slot, now):
+        return self.idle_timeout and now - slot["last_read"] > self.idle_timeout
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                now = time.monotonic()
+                due = [
+                    (name, slot) for name, slot in self._jobs.items()
+                    if slot["schedule"].next_due <= now and not self._is_idle(slot, now)
+                ]
+                if not due:
+                    waits = [slot["schedule"].next_due - now for slot in self._jobs.values()
+                             if not self._is_idle(slot, now)]
+                    self._cond.wait(min(waits) if waits else None)
+                    continue
+
+            for name, slot in due:
+                self._run_job(name, slot)
+
+    def _run_job(self, name, slot):
+        job = slot["job"]
+        start = time.monotonic()
+        try:
+            if slot["reset"]:
+                slot["reset"] = False
+                job.reset()
+            data = job.run()
+        except Exception:
+            logger.exception("inference job '%s' failed", name)
+            data = None
+        elapsed = time.monotonic() - start
+        perf.record(f"worker.{name}", elapsed)
+        perf.maybe_export()
+
+        with self._cond:
+            # 틱 초과 / 병합은 스케줄러가 집계하고, 다음 실행 시각도 스케줄러가 정함
+            slot["schedule"].tick(start, elapsed)
+            if data is not None and not slot["reset"]:
+                slot["tick"] += 1
+                self._snapshots[name] = {
+                    "tick": slot["tick"],
+                    "updated_at": datetime.now(),
+                    "elapsed": elapsed,
+                    "schedule": slot["schedule"].status(),
+                    **data,
+                }
+            self._cond.notify_all()
+
+
+# ✅ 프로세스당 워커 1개 (모든 세션이 공유)
+@st.cache_resource
+def get_inference_worker():
+    return InferenceWorker().start()
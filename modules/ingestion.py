@@ -0,0 +1,339 @@
+# modules/ingestion.py
+
+import json
+import logging
+from abc import ABC, abstractmethod
+import queue
+import socketserver
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modules.settings import (
+    FLEET_SIZE, SENSOR_SOURCE, SENSOR_RATE_HZ, REPLAY_SPEED,
+    INGEST_BATCH_ROWS, INGEST_QUEUE_BATCHES, INGEST_MAX_ROWS_PER_SEC
+)
+from modules import perf
+
+logger = logging.getLogger(__name__)
+
+SENSOR_COLUMNS = ["temperature", "vibration", "pressure", "humidity", "energy_consumption"]
+
+
+# ✅ 센서 마이크로 배치 (머신 ID, epoch ns 타임스탬프, 센서값 행렬)
+class SensorBatch:
+    def __init__(self, machine_ids, timestamps, values, columns=SENSOR_COLUMNS):
+        self.machine_ids = np.asarray(machine_ids, dtype=np.int64)
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.machine_ids), len(columns))
+        self.columns = list(columns)
+
+    def __len__(self):
+        return len(self.machine_ids)
+
+    def select(self, columns):
+        return self.values[:, [self.columns.index(c) for c in columns]]
+
+    def filter(self, machine_ids):
+        mask = np.isin(self.machine_ids, list(machine_ids))
+        return SensorBatch(self.machine_ids[mask], self.timestamps[mask], self.values[mask], self.columns)
+
+    def to_frame(self):
+        df = pd.DataFrame(self.values, columns=self.columns)
+        df.insert(0, "timestamp", pd.to_datetime(self.timestamps))
+        df.insert(0, "machine_id", self.machine_ids)
+        return df
+
+    @staticmethod
+    def concat(batches):
+        batches = [b for b in batches if b is not None and len(b)]
+        if not batches:
+            return None
+        if len(batches) == 1:
+            return batches[0]
+        return SensorBatch(
+            np.concatenate([b.machine_ids for b in batches]),
+            np.concatenate([b.timestamps for b in batches]),
+            np.concatenate([b.values for b in batches]),
+            batches[0].columns,
+        )
+
+
+# ✅ 센서 소스 인터페이스: read(max_rows)는 SensorBatch, 읽을 게 없으면 빈 배치, 끝나면 None
+# read를 구현하지 않은 소스는 워커 스레드에서 처음 읽을 때가 아니라 만들 때 TypeError로 실패한다.
+class SensorSource(ABC):
+    @abstractmethod
+    def read(self, max_rows):
+        ...
+
+    def close(self):
+        pass
+
+
+# ✅ 합성 센서 생성기 (기존 랜덤 생성 로직), rate_hz 마다 머신 전체 1행씩
+# realtime=False 이면 타임스탬프를 tick_seconds 간격의 가상 시계로 찍는다.
+class SyntheticSource(SensorSource):
+    def __init__(self, machine_ids, rate_hz=1.0, tick_seconds=60.0, realtime=False, seed=None):
+        self.machine_ids = np.asarray(list(machine_ids), dtype=np.int64)
+        self.interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.tick_seconds = tick_seconds
+        self.realtime = realtime
+        self.rng = np.random.default_rng(seed)
+        self._clock = pd.Timestamp(datetime.now()).value
+        self._next = time.monotonic()
+
+    def read(self, max_rows):
+        wait = self._next - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._next = max(self._next + self.interval, time.monotonic())
+
+        n = len(self.machine_ids)
+        with perf.span("ingest.generate"):
+            values = np.column_stack([
+                self.rng.normal(75.02, 9.88, size=n),
+                self.rng.normal(50.00, 14.77, size=n),
+                self.rng.uniform(1.0, 5.0, size=n),
+                self.rng.uniform(30.0, 80.0, size=n),
+                self.rng.uniform(0.5, 5.0, size=n),
+            ])
+        if self.realtime:
+            ts = pd.Timestamp(datetime.now()).value
+        else:
+            self._clock += int(self.tick_seconds * 1e9)
+            ts = self._clock
+        return SensorBatch(self.machine_ids, np.full(n, ts, dtype=np.int64), values)
+
+
+# ✅ CSV / Parquet 이력 재생 (machine_id, timestamp, 센서 열)
+# speed=1 이면 기록된 시간 간격 그대로, speed=10 이면 10배속, speed=0 이면 최대 속도(백필).
+class ReplaySource(SensorSource):
+    def __init__(self, path, speed=1.0, loop=False):
+        if str(path).endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path)
+        df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+        self.machine_ids = df["machine_id"].to_numpy(dtype=np.int64)
+        self.timestamps = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        self.values = df[SENSOR_COLUMNS].to_numpy(dtype=np.float64)
+        self.speed = speed
+        self.loop = loop
+        self._pos = 0
+        self._offset = 0
+        self._start_wall = None
+
+    def read(self, max_rows):
+        if self._pos >= len(self.timestamps):
+            if not self.loop or not len(self.timestamps):
+                return None
+            # 반복 재생 시 타임스탬프가 계속 증가하도록 전체 구간만큼 밀어준다
+            self._offset += int(self.timestamps[-1] - self.timestamps[0]) + 1
+            self._pos = 0
+            self._start_wall = None
+
+        end = min(self._pos + max_rows, len(self.timestamps))
+        if self.speed > 0:
+            if self._start_wall is None:
+                self._start_wall = time.monotonic()
+            elapsed_ns = (time.monotonic() - self._start_wall) * self.speed * 1e9
+            due = self.timestamps[0] + elapsed_ns
+            ready_end = int(np.searchsorted(self.timestamps, due, side="right"))
+            if ready_end <= self._pos:
+                wait = (self.timestamps[self._pos] - due) / 1e9 / self.speed
+                time.sleep(min(max(wait, 0.0), 0.5))
+                return SensorBatch([], [], np.empty((0, len(SENSOR_COLUMNS))))
+            end = min(end, ready_end)
+
+        sl = slice(self._pos, end)
+        self._pos = end
+        return SensorBatch(self.machine_ids[sl], self.timestamps[sl] + self._offset, self.values[sl])
+
+
+# ✅ 로컬 소켓 수신 (MQTT 대용): 한 줄에 JSON 하나
+# {"machine_id": 3, "timestamp": "2025-04-25T10:00:00", "temperature": 75.1, ...}
+# 내부 큐가 가득 차면 수신 스레드가 멈추므로 TCP 레벨에서 송신 측에 배압이 걸린다.
+class SocketSource(SensorSource):
+    def __init__(self, host="127.0.0.1", port=9009, maxsize=100000):
+        self._queue = queue.Queue(maxsize=maxsize)
+        source = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        msg = json.loads(line)
+                        row = (
+                            int(msg["machine_id"]),
+                            pd.Timestamp(msg.get("timestamp") or datetime.now()).value,
+                            [float(msg[c]) for c in SENSOR_COLUMNS],
+                        )
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning("dropping malformed sensor message: %r", line[:200])
+                        continue
+                    source._queue.put(row)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sensor-socket", daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def read(self, max_rows):
+        rows = []
+        try:
+            rows.append(self._queue.get(timeout=0.5))
+            while len(rows) < max_rows:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not rows:
+            return SensorBatch([], [], np.empty((0, len(SENSOR_COLUMNS))))
+        mids, ts, values = zip(*rows)
+        return SensorBatch(mids, ts, values)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ✅ 구독자 큐 (block=True 면 가득 찼을 때 생산자를 멈춰 배압, False 면 가장 오래된 배치를 버림)
+# 소비자가 stale_after 초 이상 poll 하지 않으면 배압을 풀어서 다른 구독자가 멈추지 않게 한다.
+class Subscription:
+    def __init__(self, machine_ids=None, maxsize=INGEST_QUEUE_BATCHES, block=True, stale_after=30.0):
+        self.machine_ids = None if machine_ids is None else set(machine_ids)
+        self.block = block
+        self.stale_after = stale_after
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped_batches = 0
+        self.last_poll = time.monotonic()
+
+    def _offer(self, batch, stop):
+        if self.machine_ids is not None:
+            batch = batch.filter(self.machine_ids)
+            if not len(batch):
+                return
+        while not stop.is_set():
+            block = self.block and time.monotonic() - self.last_poll < self.stale_after
+            try:
+                self.queue.put(batch, timeout=0.5 if block else 0)
+                return
+            except queue.Full:
+                if not block:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped_batches += 1
+                    except queue.Empty:
+                        pass
+
+    # ✅ 쌓인 배치를 한 번에 꺼내서 합침 (없으면 timeout 까지 대기 후 None)
+    def poll(self, max_batches=None, timeout=0.0):
+        self.last_poll = time.monotonic()
+        batches = []
+        try:
+            batches.append(self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait())
+            while max_batches is None or len(batches) < max_batches:
+                batches.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return SensorBatch.concat(batches)
+
+    def backlog(self):
+        return self.queue.qsize()
+
+
+# ✅ 수집 파이프라인: 소스를 생산자 스레드에서 읽어 구독자들에게 마이크로 배치로 전달
+class IngestionPipeline:
+    def __init__(self, source, batch_rows=INGEST_BATCH_ROWS, max_rows_per_sec=INGEST_MAX_ROWS_PER_SEC):
+        self.source = source
+        self.batch_rows = batch_rows
+        self.max_rows_per_sec = max_rows_per_sec
+        self.rows_in = 0
+        self.batches_in = 0
+        self.finished = False
+        self._subs = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sensor-ingestion", daemon=True)
+
+    def subscribe(self, machine_ids=None, maxsize=INGEST_QUEUE_BATCHES, block=True):
+        sub = Subscription(machine_ids, maxsize, block)
+        with self._lock:
+            self._subs.append(sub)
+        return sub
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.source.close()
+
+    def _run(self):
+        started = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                batch = self.source.read(self.batch_rows)
+            except Exception:
+                logger.exception("sensor source failed")
+                time.sleep(1.0)
+                continue
+            if batch is None:
+                self.finished = True
+                return
+            if not len(batch):
+                continue
+
+            self.rows_in += len(batch)
+            self.batches_in += 1
+            perf.count("ingest_rows", len(batch))
+            with self._lock:
+                subs = list(self._subs)
+            for sub in subs:
+                sub._offer(batch, self._stop)
+
+            # 처리량 상한 (행/초)
+            if self.max_rows_per_sec:
+                ahead = self.rows_in / self.max_rows_per_sec - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    def stats(self):
+        with self._lock:
+            backlog = {i: sub.backlog() for i, sub in enumerate(self._subs)}
+            dropped = sum(sub.dropped_batches for sub in self._subs)
+        return {
+            "rows_in": self.rows_in,
+            "batches_in": self.batches_in,
+            "backlog": backlog,
+            "dropped_batches": dropped,
+            "finished": self.finished,
+        }
+
+
+# ✅ 소스 설정 문자열 해석: "synthetic" | "replay:<경로>" | "socket:<host>:<port>"
+def make_source(spec, machine_ids):
+    kind, _, arg = spec.partition(":")
+    if kind == "synthetic":
+        return SyntheticSource(machine_ids, rate_hz=SENSOR_RATE_HZ)
+    if kind == "replay":
+        return ReplaySource(arg, speed=REPLAY_SPEED, loop=True)
+    if kind == "socket":
+        host, _, port = arg.rpartition(":")
+        return SocketSource(host or "127.0.0.1", int(port))
+    raise ValueError(f"unknown sensor source: {spec}")
+
+
+# ✅ 프로세스 공용 수집 파이프라인 (모든 작업이 같은 센서 흐름을 구독)
+@st.cache_resource
+def get_ingestion_pipeline():
+    pipeline = IngestionPipeline(make_source(SENSOR_SOURCE, range(1, FLEET_SIZE + 1))).start()
+    perf.register_stats("ingest", pipeline.stats)
+    return pipeline
@@ -0,0 +1,234 @@
+# modules/lstm_runtime.py
+
+import json
+import sys
+import numpy as np
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+_ACTIVATIONS["softmax"] = _softmax
+
+# int8 가중치의 열별 배율 이름 접미어 (예: kernel -> kernel_scale)
+SCALE_SUFFIX = "_scale"
+
+
+# ✅ 저장용 축소 가중치 ("float16": 절반 크기, "int8": 출력 열별 대칭 양자화 + float32 배율)
+# 편향(bias) 같은 1차원 가중치는 크기가 작아서 int8 에서도 float32로 둔다.
+def _compact(name, w, precision):
+    w = np.asarray(w, dtype=np.float32)
+    if precision == "float16":
+        return {name: w.astype(np.float16)}
+    if w.ndim < 2:
+        return {name: w}
+    scale = np.abs(w).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    return {name: np.round(w / scale).astype(np.int8), name + SCALE_SUFFIX: scale.astype(np.float32)}
+
+
+# 저장된 가중치 하나를 계산 dtype으로 복원 (int8 이면 배율을 곱함)
+def _restore(weights, name, dtype):
+    w = weights[name].astype(dtype, copy=False)
+    scale = weights.get(name + SCALE_SUFFIX)
+    return w if scale is None else w * scale.astype(dtype, copy=False)
+
+
+# ✅ Keras Sequential(LSTM / Dropout / Dense) 모델의 순수 NumPy 추론 런타임
+# - TensorFlow 없이 가중치만 읽어서 forward pass를 수행한다 (Dropout은 추론 시 항등).
+# - predict(X, verbose=0)는 Keras와 같은 형태로 (N, n_classes) 확률을 돌려준다.
+# - precision("float16" / "int8")이 있으면 디스크에는 축소 가중치로 저장하고, 메모리에는 생성할 때
+#   한 번만 계산 dtype으로 풀어 둔다 (predict 마다 가중치를 변환하지 않음).
+#   따라서 변형본이 줄이는 것은 파일 크기뿐이고, 메모리(nbytes)와 추론 비용은 float32 모델과 같다.
+class NumpyLSTMModel:
+    def __init__(self, layers, dtype=np.float32, precision=None):
+        self.dtype = dtype
+        self.precision = precision
+        self.layers = [
+            {**layer, "weights": {
+                name: _restore(layer["weights"], name, dtype)
+                for name in layer["weights"] if not name.endswith(SCALE_SUFFIX)
+            }}
+            for layer in layers
+        ]
+
+    @property
+    def input_shape(self):
+        return self.layers[0].get("input_shape")
+
+    @property
+    def nbytes(self):
+        return sum(w.nbytes for layer in self.layers for w in layer["weights"].values())
+
+    # 저장 형식(축소 가중치) 기준 크기
+    @property
+    def storage_nbytes(self):
+        return sum(w.nbytes for _, _, w in self._stored_arrays())
+
+    def _stored_arrays(self):
+        for i, layer in enumerate(self.layers):
+            for name, w in layer["weights"].items():
+                arrays = _compact(name, w, self.precision) if self.precision else {name: w}
+                for key, array in arrays.items():
+                    yield i, key, array
+
+    # ✅ .h5 파일에서 구조(model_config)와 가중치 읽기 (h5py만 필요)
+    @classmethod
+    def from_h5(cls, path):
+        import h5py
+        with h5py.File(path, "r") as f:
+            config = f.attrs["model_config"]
+            config = json.loads(config.decode("utf-8") if isinstance(config, bytes) else config)
+            weights_root = f["model_weights"] if "model_weights" in f else f
+            layers = []
+            input_shape = None
+            for layer_cfg in config["config"]["layers"]:
+                kind = layer_cfg["class_name"]
+                cfg = layer_cfg["config"]
+                if kind == "InputLayer":
+                    input_shape = cfg.get("batch_shape") or cfg.get("batch_input_shape")
+                    continue
+                if kind == "Dropout":
+                    continue
+                if kind not in ("LSTM", "Dense"):
+                    raise ValueError(f"unsupported layer type: {kind}")
+
+                found = {}
+                weights_root[cfg["name"]].visititems(
+                    lambda name, obj: found.__setitem__(name.rsplit("/", 1)[-1].split(":")[0], obj[()])
+                    if isinstance(obj, h5py.Dataset) else None
+                )
+                layer = {"kind": kind, "name": cfg["name"], "activation": cfg["activation"]}
+                if kind == "LSTM":
+                    if cfg.get("go_backwards") or cfg.get("stateful"):
+                        raise ValueError("unsupported LSTM options")
+                    layer["units"] = cfg["units"]
+                    layer["recurrent_activation"] = cfg["recurrent_activation"]
+                    layer["return_sequences"] = cfg["return_sequences"]
+                    layer["weights"] = {k: found[k] for k in ("kernel", "recurrent_kernel", "bias")}
+                else:
+                    layer["weights"] = {k: found[k] for k in ("kernel", "bias")}
+                if input_shape is not None and not layers:
+                    layer["input_shape"] = list(input_shape)
+                layers.append(layer)
+        return cls(layers)
+
+    # ✅ 가벼운 .npz 형식으로 내보내기 / 읽기 (서빙 프로세스는 h5py도 필요 없음)
+    def save_npz(self, path):
+        arrays = {}
+        meta = []
+        for i, layer in enumerate(self.layers):
+            meta.append({k: v for k, v in layer.items() if k != "weights"})
+        for i, name, w in self._stored_arrays():
+            arrays[f"{i}/{name}"] = w
+        np.savez(path, __meta__=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def from_npz(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["__meta__"]))
+            layers = []
+            for i, layer in enumerate(meta):
+                prefix = f"{i}/"
+                layer["weights"] = {k[len(prefix):]: data[k] for k in data.files if k.startswith(prefix)}
+                layers.append(layer)
+        # 저장된 dtype으로 정밀도 판별 (배율이 있으면 int8, float16 가중치가 있으면 float16)
+        stored = [w for layer in layers for w in layer["weights"].items()]
+        precision = (
+            "int8" if any(name.endswith(SCALE_SUFFIX) for name, _ in stored)
+            else "float16" if any(w.dtype == np.float16 for _, w in stored)
+            else None
+        )
+        return cls(layers, precision=precision)
+
+    # ✅ 축소 정밀도 변형본 (가중치를 축소했다가 다시 풀어서, 저장했다 읽은 모델과 같은 값으로 계산)
+    def quantized(self, precision):
+        if precision not in ("float16", "int8"):
+            raise ValueError(f"unsupported precision: {precision}")
+        layers = [
+            {**layer, "weights": {
+                key: array
+                for name, w in layer["weights"].items()
+                for key, array in _compact(name, w, precision).items()
+            }}
+            for layer in self.layers
+        ]
+        return type(self)(layers, self.dtype, precision)
+
+    def _lstm(self, layer, x):
+        w = layer["weights"]
+        units = layer["units"]
+        act = _ACTIVATIONS[layer["activation"]]
+        rec_act = _ACTIVATIONS[layer["recurrent_activation"]]
+        kernel, recurrent, bias = w["kernel"], w["recurrent_kernel"], w["bias"]
+
+        n, steps, _ = x.shape
+        # 입력 투영은 모든 시점을 한 번의 행렬곱으로 계산
+        xw = x @ kernel + bias
+        h = np.zeros((n, units), dtype=self.dtype)
+        c = np.zeros((n, units), dtype=self.dtype)
+        outputs = np.empty((n, steps, units), dtype=self.dtype) if layer["return_sequences"] else None
+        for t in range(steps):
+            z = xw[:, t] + h @ recurrent
+            # Keras 게이트 순서: input, forget, cell, output
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = rec_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+    def _dense(self, layer, x):
+        w = layer["weights"]
+        out = x @ w["kernel"] + w["bias"]
+        return _ACTIVATIONS[layer["activation"]](out)
+
+    def predict(self, X, verbose=0, batch_size=None):
+        x = np.asarray(X, dtype=self.dtype)
+        for layer in self.layers:
+            x = self._lstm(layer, x) if layer["kind"] == "LSTM" else self._dense(layer, x)
+        return x
+
+    __call__ = predict
+
+
+# ✅ Keras 모델과 출력 비교 (최대 절대 오차가 atol을 넘으면 예외)
+def verify_against_keras(runtime, keras_model, n_samples=256, atol=1e-5, seed=0):
+    _, steps, n_features = keras_model.input_shape
+    X = np.random.default_rng(seed).random((n_samples, steps, n_features), dtype=np.float32)
+    expected = keras_model.predict(X, verbose=0)
+    actual = runtime.predict(X)
+    max_diff = float(np.abs(expected - actual).max())
+    same_class = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+    if max_diff > atol:
+        raise AssertionError(f"NumPy runtime differs from Keras: max |diff| = {max_diff:.2e} > {atol:.0e}")
+    return {"max_abs_diff": max_diff, "argmax_agreement": same_class, "n_samples": n_samples}
+
+
+# 사용법: python -m modules.lstm_runtime [h5 경로] [npz 경로]
+# h5 가중치를 npz로 내보내고, TensorFlow가 설치되어 있으면 Keras와 결과를 비교한다.
+if __name__ == "__main__":
+    from modules.model_loader import H5_PATH, FAILURE_NPZ_PATH
+    src = sys.argv[1] if len(sys.argv) > 1 else H5_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else FAILURE_NPZ_PATH
+    runtime = NumpyLSTMModel.from_h5(src)
+    try:
+        from tensorflow.keras.models import load_model
+    except ImportError:
+        print("TensorFlow not installed; skipping parity check")
+    else:
+        print(verify_against_keras(runtime, load_model(src)))
+    runtime.save_npz(dst)
+    print(f"exported {runtime.nbytes} bytes of weights -> {dst}")
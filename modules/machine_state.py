@@ -0,0 +1,183 @@
+# modules/machine_state.py
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+from modules.batch_engine import NOT_READY
+from modules.sequence_store import occurrence_rank
+
+
+# ✅ 머신별 실시간 상태 테이블 (머신 ID -> 행 번호, 모든 상태는 머신 수 만큼의 NumPy 배열)
+# - 센서 이력은 머신마다 capacity 행짜리 링 버퍼이고, pos / pos + capacity 두 곳에 같이 기록해서
+#   최근 n행이 항상 연속 슬라이스로 꺼내진다 (SequenceStore와 같은 방식).
+# - 마지막 예측(RUL / 리스크 / 고장 유형 / 유지보수 필요)도 같은 행 번호로 보관하므로
+#   머신을 바꿔 볼 때는 행 하나만 읽으면 되고, 모델을 다시 돌리지 않는다.
+# - 쓰기는 워커 스레드 하나가 하고, 페이지는 lock 안에서 필요한 행만 복사해 간다.
+# - spill_path를 주면 링에서 밀려나는 오래된 행을 (machine_id, timestamp, 센서 열) 레코드로 이어 붙인다.
+class MachineStateTable:
+    def __init__(self, machine_ids, columns, capacity, spill_path=None):
+        self.machine_ids = list(machine_ids)
+        self.index = {mid: i for i, mid in enumerate(self.machine_ids)}
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.record_dtype = spill_dtype(self.columns)
+        self._ids = np.asarray(self.machine_ids, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._spill_file = None
+        self.reset()
+
+    def __len__(self):
+        return len(self.machine_ids)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (
+            self._ts, self._values, self._cursor, self._count,
+            self.rul, self.risk, self.failure, self.maintenance, self.updated_at,
+        ))
+
+    def reset(self):
+        n, cap = len(self.machine_ids), self.capacity
+        with self._lock:
+            self._ts = np.zeros((n, 2 * cap), dtype=np.int64)
+            self._values = np.zeros((n, 2 * cap, len(self.columns)), dtype=np.float64)
+            self._cursor = np.zeros(n, dtype=np.int64)
+            self._count = np.zeros(n, dtype=np.int64)
+            self.rul = np.full(n, np.nan)
+            self.risk = np.full(n, -1, dtype=np.int64)
+            self.failure = np.full(n, NOT_READY, dtype=object)
+            self.maintenance = np.zeros(n, dtype=bool)
+            self.updated_at = np.zeros(n, dtype=np.int64)
+            self.total_rows = 0
+            self.spilled_rows = 0
+
+    def positions(self, machine_ids):
+        return np.array([self.index[mid] for mid in machine_ids], dtype=np.int64)
+
+    # ✅ 수집 배치 반영 (같은 머신이 여러 번 있으면 도착 순서대로), 갱신된 머신 행 번호 반환
+    def append_batch(self, batch):
+        if not np.isin(batch.machine_ids, self._ids).all():
+            batch = batch.filter(self.machine_ids)
+        if not len(batch):
+            return np.empty(0, dtype=np.int64)
+        idx = self.positions(batch.machine_ids.tolist())
+        rank = occurrence_rank(idx)
+        values = batch.select(self.columns)
+        with self._lock:
+            for r in range(int(rank.max()) + 1):
+                sel = np.flatnonzero(rank == r)
+                self._append(idx[sel], batch.timestamps[sel], values[sel])
+        return np.unique(idx)
+
+    def _append(self, idx, timestamps, values):
+        cap = self.capacity
+        pos = self._cursor[idx]
+        if self.spill_path:
+            full = self._count[idx] == cap
+            if full.any():
+                self._spill(idx[full], pos[full])
+        self._ts[idx, pos] = self._ts[idx, pos + cap] = timestamps
+        self._values[idx, pos] = self._values[idx, pos + cap] = values
+        self._cursor[idx] = (pos + 1) % cap
+        self._count[idx] = np.minimum(self._count[idx] + 1, cap)
+        self.total_rows += len(idx)
+
+    def _spill(self, idx, pos):
+        if self._spill_file is None:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            self._spill_file = open(self.spill_path, "ab")
+        records = np.empty(len(idx), dtype=self.record_dtype)
+        records["machine_id"] = self._ids[idx]
+        records["timestamp"] = self._ts[idx, pos]
+        for j, c in enumerate(self.columns):
+            records[c] = self._values[idx, pos, j]
+        self._spill_file.write(records.tobytes())
+        self._spill_file.flush()
+        self.spilled_rows += len(idx)
+
+    def counts(self, idx=None):
+        return self._count if idx is None else self._count[idx]
+
+    # ✅ 여러 머신의 최신 행 (k, n_columns)
+    def latest(self, idx):
+        last = (self._cursor[idx] - 1) % self.capacity
+        return self._values[idx, last]
+
+    # ✅ 여러 머신의 최근 n행 (timestamps (k, n), values (k, n, n_columns)), 오래된 순 -> 최신 순
+    # n행 이상 쌓인 머신만 넘겨야 한다.
+    def windows(self, idx, n):
+        offsets = (self._cursor[idx] + self.capacity - n)[:, None] + np.arange(n)
+        rows = np.asarray(idx)[:, None]
+        return self._ts[rows, offsets], self._values[rows, offsets]
+
+    # ✅ 이번 틱 예측 저장
+    def record(self, idx, rul, risk, failure, maintenance, ts):
+        with self._lock:
+            self.rul[idx] = rul
+            self.risk[idx] = risk
+            self.failure[idx] = failure
+            self.maintenance[idx] = maintenance
+            self.updated_at[idx] = ts
+
+    # ✅ 머신 1대의 현재 상태 (행 번호 조회 1번 + 최근 n행 복사)
+    def machine(self, machine_id, n=20):
+        i = self.index[machine_id]
+        with self._lock:
+            k = min(n, int(self._count[i]))
+            end = self._cursor[i] + self.capacity
+            ts = self._ts[i, end - k:end].copy()
+            values = self._values[i, end - k:end].copy()
+            return {
+                "machine_id": machine_id,
+                "rows": int(self._count[i]),
+                "timestamps": ts,
+                "values": values,
+                "latest": dict(zip(self.columns, values[-1].tolist())) if k else None,
+                "rul": None if np.isnan(self.rul[i]) else float(self.rul[i]),
+                "risk": None if self.risk[i] < 0 else int(self.risk[i]),
+                "failure": self.failure[i],
+                "maintenance": bool(self.maintenance[i]),
+                "updated_at": pd.Timestamp(int(self.updated_at[i])) if self.updated_at[i] else None,
+            }
+
+    # ✅ 위험도 상위 k대 (저장된 예측만 정렬, 모델 재실행 없음)
+    # sort_by="risk": 유지보수 필요 -> 다운타임 리스크 -> 낮은 RUL 순, sort_by="rul": 낮은 RUL 순
+    def top_k(self, k=10, sort_by="risk"):
+        with self._lock:
+            seen = np.flatnonzero(self._count > 0)
+            rul = np.where(np.isnan(self.rul[seen]), np.inf, self.rul[seen])
+            if sort_by == "rul":
+                order = np.argsort(rul, kind="stable")
+            else:
+                order = np.lexsort((rul, -self.risk[seen], ~self.maintenance[seen]))
+            rows = seen[order[:k]]
+            return pd.DataFrame({
+                "machine_id": self._ids[rows],
+                "maintenance_required": self.maintenance[rows],
+                "downtime_risk": np.where(self.risk[rows] < 0, np.nan, self.risk[rows]),
+                "predicted_rul": self.rul[rows],
+                "failure_type": self.failure[rows],
+                **{c: self.latest(rows)[:, j] for j, c in enumerate(self.columns)},
+            })
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+
+# ✅ spill 파일 레코드 형식 (machine_id, timestamp, 센서 열) - 쓰기 / 읽기 공용
+def spill_dtype(columns):
+    return np.dtype([("machine_id", "<i8"), ("timestamp", "<i8")] + [(c, "<f8") for c in columns])
+
+
+# ✅ 디스크 세그먼트 읽기 (링에서 밀려난 과거 행 조회용)
+def read_spill(path, columns, machine_id=None):
+    records = np.fromfile(path, dtype=spill_dtype(columns))
+    if machine_id is not None:
+        records = records[records["machine_id"] == machine_id]
+    df = pd.DataFrame({c: records[c] for c in ["machine_id"] + list(columns)})
+    df.insert(1, "timestamp", pd.to_datetime(records["timestamp"]))
+    return df
@@ -2,72 +2,200 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import time
-from datetime import datetime
 import plotly.express as px
-from modules.model_loader import load_all_models  # ✅ 캐시된 모델 로드
+from modules.model_loader import load_utils, load_models, model_handle  # ✅ 캐시된 모델 로드
+from modules.batch_engine import (
+    NOT_READY, predict_risk_batch, predict_rul_batch, predict_failure_batch, maintenance_required_mask
+)
+from modules.sequence_store import SequenceStore, occurrence_rank
+from modules.feature_pipeline import AffineTransform
+from modules.chart_cache import ChartBoard, data_signature
+from modules.fleet_stats import FleetAggregator
+from modules.shard_pool import ShardedFleetEvaluator
+from modules.deadband import DeadbandScorer
+from modules.inference_worker import get_inference_worker
+from modules.scheduler import AdaptiveScheduler, schedule_caption
+from modules.ingestion import get_ingestion_pipeline
+from modules.event_store import get_event_store
+from modules import perf
+from modules.settings import (
+    FLEET_INTERVAL_SEC, FLEET_SIZE, FLEET_WORKERS, SHIFT_HOURS, SENSOR_DEADBANDS, DEADBAND_MAX_SKIP_TICKS
+)
 
-# ✅ 모델 불러오기
-failure_model, utils, rul_models, risk_model = load_all_models()
+# ✅ 모델 불러오기 (설정값만 바로 읽고, 모델은 처음 평가할 때 로드)
+utils = load_utils()
+failure_model = model_handle("failure")
+rul_models = model_handle("rul")
+risk_model = model_handle("risk")
 sensor_cols = utils["sensor_cols"]
 feature_cols = sensor_cols + ["delta_minutes"]
 seq_length = utils["seq_length"]
 scaler = utils["scaler"]
 label_encoder = utils["label_encoder"]
+# 스케일러 파라미터를 NumPy 배열로 풀어 둔 변환 (틱마다 DataFrame을 만들지 않음)
+feature_transform = AffineTransform(scaler)
+RISK_COLS = [sensor_cols.index("temperature"), sensor_cols.index("vibration")]
 
-# ✅ 랜덤 센서 생성 함수
-def generate_random_sensor():
-    return {
-        'temperature': np.random.normal(75, 10),
-        'vibration': np.random.normal(50, 15),
-        'pressure': np.random.uniform(1, 5),
-        'humidity': np.random.uniform(30, 80),
-        'energy_consumption': np.random.uniform(0.5, 5),
-        'delta_minutes': 1.0
-    }
-
-# ✅ 머신 전체 평가 함수
-def evaluate_all_machines():
-    result = []
-    all_ready = True
-    for mid in range(1, 51):
-        seq = st.session_state.machine_sequences[mid]
-        seq.append(generate_random_sensor())
-        if len(seq) > seq_length:
-            seq.pop(0)
-        row_latest = seq[-1]
-        df_latest = pd.DataFrame([row_latest])
-        rul_model_entry = rul_models[mid]
-        X_rul = df_latest[sensor_cols].values
-        if rul_model_entry.get("scaler"):
-            X_rul = rul_model_entry["scaler"].transform(X_rul)
-        rul_pred = float(rul_model_entry["model"].predict(X_rul)[0])
-        risk_input = df_latest[["temperature", "vibration"]].values
-        risk_pred = int(risk_model.predict(risk_input)[0])
-        if len(seq) == seq_length:
-            df_seq = pd.DataFrame(seq)
-            scaled_seq = scaler.transform(df_seq[feature_cols])
-            X_seq = scaled_seq.reshape(1, seq_length, len(feature_cols))
-            y_pred = failure_model.predict(X_seq)
-            failure_class = label_encoder.inverse_transform([np.argmax(y_pred)])[0]
-        else:
-            failure_class = "예측 불가"
-            all_ready = False
-        maintenance_required = (
-            (len(seq) == seq_length) and (
-                (rul_pred <= 20) or
-                (risk_pred == 1) or
-                (failure_class != "Normal")
-            )
-        )
-        result.append({
-            "machine_id": mid,
+# ✅ 평가 대상 머신 ID
+MACHINE_IDS = list(range(1, FLEET_SIZE + 1))
+
+# ✅ 추세 구간 (이름 -> 초)
+TREND_WINDOWS = {"최근 5분": 300, "최근 1시간": 3600, f"교대 ({SHIFT_HOURS:g}시간)": SHIFT_HOURS * 3600}
+
+# ✅ 화면 상세도별 차트 갱신 간격 (틱 수)
+# 축소: 선 그래프(잔존수명 / 추세)를 덜 자주, 최소: 도넛 / 막대 차트까지 덜 자주 갱신
+# 지표 숫자와 유지보수 대상 표는 상세도와 관계없이 매 틱 갱신
+CHART_EVERY = {
+    "full": {"summary": 1, "line": 1},
+    "reduced": {"summary": 1, "line": 3},
+    "minimal": {"summary": 3, "line": 6},
+}
+
+# ✅ 새 센서 행 스케일링 (틱마다 최신 행만 변환)
+def scale_features(raw):
+    with perf.span("fleet.scale"):
+        return feature_transform(raw)
+
+# ✅ 머신별 시퀀스 저장소 생성
+def new_sequence_store(machine_ids=MACHINE_IDS):
+    return SequenceStore(machine_ids, seq_length, len(feature_cols), transform=scale_features)
+
+# ✅ 수집 배치를 시퀀스 저장소에 반영 (delta_minutes는 머신별 직전 타임스탬프와의 간격)
+# 한 배치에 같은 머신이 여러 번 들어 있으면 도착 순서대로 나눠서 추가한다.
+def append_batch(store, batch):
+    if not np.isin(batch.machine_ids, store.machine_ids).all():
+        batch = batch.filter(store.machine_ids)
+    if not len(batch):
+        return 0
+
+    idx = store.positions(batch.machine_ids.tolist())
+    rank = occurrence_rank(idx)
+
+    values = batch.select(sensor_cols)
+    for r in range(int(rank.max()) + 1):
+        sel = np.flatnonzero(rank == r)
+        ts = batch.timestamps[sel]
+        last = store.last_timestamps(idx[sel])
+        delta = np.where(last > 0, (ts - last) / 60e9, 1.0)
+        store.append(np.column_stack([values[sel], delta]), idx[sel], timestamps=ts)
+    return len(batch)
+
+# ✅ 재평가 선택기 생성 (센서별 데드밴드)
+def new_scorer(machine_ids=MACHINE_IDS):
+    return DeadbandScorer(len(machine_ids), sensor_cols, SENSOR_DEADBANDS, DEADBAND_MAX_SKIP_TICKS)
+
+# ✅ 머신 전체 평가 함수 (각 머신의 최신 센서값으로 모델별 한 번씩 일괄 추론)
+# scorer가 있으면 데드밴드를 넘게 변한 머신만 추론하고 나머지는 직전 예측을 그대로 쓴다.
+def evaluate_all_machines(store, scorer=None):
+    with perf.span("fleet.select"):
+        seen = np.flatnonzero(store.seen_mask())
+        machine_ids = [store.machine_ids[i] for i in seen]
+        n = len(machine_ids)
+        latest = store.latest()[seen]
+        values = latest[:, :len(sensor_cols)].astype(np.float64)
+        ready = store.ready_mask()[seen]
+        dirty = np.ones(n, dtype=bool) if scorer is None else scorer.dirty(seen, values, ready)
+        rows = np.flatnonzero(dirty)
+        dirty_ids = [machine_ids[i] for i in rows]
+
+    rul_pred = np.full(n, np.nan)
+    risk_pred = np.zeros(n, dtype=int)
+    failure_class = np.full(n, NOT_READY, dtype=object)
+    with perf.span("fleet.rul"):
+        rul_pred[rows] = predict_rul_batch(rul_models.get(), dirty_ids, values[rows])
+    with perf.span("fleet.risk"):
+        risk_pred[rows] = predict_risk_batch(risk_model.get(), values[rows][:, RISK_COLS])
+
+    ready_rows = rows[ready[rows]]
+    with perf.span("fleet.failure"):
+        if len(ready_rows) == len(store):
+            failure_class[:] = predict_failure_batch(failure_model.get(), label_encoder, store.windows())
+        elif len(ready_rows):
+            failure_class[ready_rows] = predict_failure_batch(failure_model.get(), label_encoder, store.windows(seen[ready_rows]))
+
+    with perf.span("fleet.assemble"):
+        if scorer is not None:
+            scorer.record(seen, dirty, values, ready, rul_pred[rows], risk_pred[rows], failure_class[rows])
+            rul_pred, risk_pred, failure_class = scorer.rul[seen], scorer.risk[seen], scorer.failure[seen]
+
+        result = pd.DataFrame({
+            "machine_id": machine_ids,
             "predicted_rul": rul_pred,
             "downtime_risk": risk_pred,
             "failure_type": failure_class,
-            "maintenance_required": maintenance_required,
-            **row_latest
+            "maintenance_required": maintenance_required_mask(ready, rul_pred, risk_pred, failure_class),
+            "rescored": dirty,
         })
-    return pd.DataFrame(result), all_ready
+        result = pd.concat([result, pd.DataFrame(latest, columns=feature_cols)], axis=1)
+    return result, bool(n == len(store) and ready.all())
+
+# ✅ 공용 워커에서 주기적으로 실행되는 머신 전체 평가 작업
+# 수집 파이프라인을 배압 모드로 구독해서 밀린 배치를 틱마다 모두 반영하고, 결과는 이벤트 저장소에 남긴다.
+# FLEET_WORKERS > 1 이면 머신을 샤드 프로세스들에 나눠 평가하고 결과만 합친다.
+class FleetJob:
+    def __init__(self):
+        self.shards = ShardedFleetEvaluator(MACHINE_IDS, FLEET_WORKERS) if FLEET_WORKERS > 1 else None
+        self.store = None if self.shards else new_sequence_store()
+        self.scorer = None if self.shards else new_scorer()
+        self.rescored = 0
+        self.skipped = 0
+        self.subscription = get_ingestion_pipeline().subscribe(MACHINE_IDS, block=True)
+        self.events = get_event_store()
+        self.stats = FleetAggregator(MACHINE_IDS, list(label_encoder.classes_) + [NOT_READY], TREND_WINDOWS)
+        self.models_ready = False
+
+    def reset(self):
+        if self.shards:
+            self.shards.reset()
+        else:
+            self.store.reset()
+            self.scorer.reset()
+        self.stats.reset()
+
+    def run(self):
+        batch = self.subscription.poll()
+        if self.shards:
+            if batch is None:
+                return None
+            with perf.span("fleet.shards"):
+                df, all_ready = self.shards.evaluate(batch)
+        else:
+            if not self.models_ready:
+                load_models(["failure", "rul", "risk"])
+                self.models_ready = True
+            if batch is None:
+                return None
+            with perf.span("fleet.append"):
+                appended = append_batch(self.store, batch)
+            if not appended:
+                return None
+            df, all_ready = evaluate_all_machines(self.store, self.scorer)
+        with perf.span("fleet.events"):
+            self.events.append_predictions(df, "fleet")
+        with perf.span("fleet.stats"):
+            self.stats.update(df)
+        rescored = int(df["rescored"].sum())
+        self.rescored += rescored
+        self.skipped += len(df) - rescored
+        return {
+            "df": df,
+            "all_ready": all_ready,
+            "summary": self.stats.summary(),
+            "windows": self.stats.window_summaries(),
+            # 추세 기록은 그래프를 다시 그릴 때만 DataFrame으로 만든다
+            "trend": self.stats.trend_frame,
+            "rescore": {
+                "rescored": rescored,
+                "machines": len(df),
+                "skip_rate": self.skipped / (self.rescored + self.skipped) if self.rescored + self.skipped else 0.0,
+            },
+        }
+
+# ✅ 집계값으로 그리는 도넛 차트
+def _pie(names, values, title):
+    fig = px.pie(names=names, values=values, title=title, hole=0.4)
+    fig.update_traces(textinfo='label+percent')
+    return fig
 
 # ✅ 메인 대시보드 함수
 def maintenance_monitoring():
@@ -101,75 +229,146 @@ def maintenance_monitoring():
     </div>
     """, unsafe_allow_html=True)
 
-    # 초기화 및 설정
+    # 초기화 및 설정 (평가는 공용 워커가 수행하고 페이지는 결과만 읽음)
+    worker = get_inference_worker()
+    worker.ensure_job("fleet", FleetJob, FLEET_INTERVAL_SEC)
     if st.sidebar.button("🔄 시퀀스 초기화"):
-        st.session_state.machine_sequences = {mid: [] for mid in range(1, 51)}
-    if 'machine_sequences' not in st.session_state:
-        st.session_state.machine_sequences = {mid: [] for mid in range(1, 51)}
+        worker.reset("fleet")
 
     refresh_rate = st.sidebar.slider("⏱ 새로고침 주기 (초)", 5, 10, 5)
+    trend_window = st.sidebar.radio("📊 추세 구간", list(TREND_WINDOWS))
     run = st.sidebar.toggle("▶ 실시간 감시 시작")
-    placeholder = st.empty()
+    # 페이지 갱신 스케줄러 (세션별, 다시 실행되어도 측정값 유지)
+    pacer = st.session_state.setdefault("fleet_pacer", AdaptiveScheduler("fleet_page", refresh_rate))
+    pacer.set_interval(refresh_rate)
+    # 화면 자리는 한 번만 만들고, 틱마다 바뀐 부분만 다시 그림
+    time_ph = st.empty()
+    schedule_ph = st.empty()
+    metrics_ph = st.empty()
+    warn_ph = st.empty()
+    board = ChartBoard("fleet")
+    col1, col2, col3, col4 = st.columns(4)
+    board.slot("risk", col1)
+    board.slot("rul", col2)
+    board.slot("failure", col3)
+    board.slot("maint", col4)
+    st.divider()
+    st.markdown(f"### 📊 추세 ({trend_window})")
+    trend_metrics_ph = st.empty()
+    board.slot("trend")
+    st.divider()
+    st.markdown("### 📋 유지보수 대상 머신 목록")
+    board.slot("table")
 
+    last_tick = None
+    frame = 0
+    pacer.next_due = None  # 멈춰 있던 동안은 밀린 틱으로 세지 않음
     while run:
-        start_time = time.time()
-        timestamp_key = datetime.now().strftime("%Y%m%d%H%M%S%f")
-        df, all_ready = evaluate_all_machines()
+        snapshot = worker.wait_snapshot("fleet", after_tick=last_tick, timeout=pacer.effective)
+        if snapshot is None or snapshot["tick"] == last_tick:
+            continue
+        last_tick = snapshot["tick"]
+        start = time.monotonic()
+        render_start = time.perf_counter()
+        # 부하가 높으면 무거운 차트는 몇 틱에 한 번만 갱신 (이전 그림은 그대로 남음)
+        every = CHART_EVERY[pacer.detail]
+        draw_summary = frame % every["summary"] == 0
+        draw_line = frame % every["line"] == 0
+        frame += 1
+        df, all_ready, summary = snapshot["df"], snapshot["all_ready"], snapshot["summary"]
         filtered = df[df["maintenance_required"]].reset_index(drop=True)
 
-        with placeholder.container():
-            now_time = datetime.now().strftime('%H:%M:%S')
-            st.markdown(f"<p class='subtext'>⏰ 예측 시각: {now_time}</p>", unsafe_allow_html=True)
-
+        now_time = snapshot["updated_at"].strftime('%H:%M:%S')
+        time_ph.markdown(f"<p class='subtext'>⏰ 예측 시각: {now_time}</p>", unsafe_allow_html=True)
+        with metrics_ph.container():
             colA, colB, colC = st.columns(3)
-            colA.metric("🧯 유지보수 필요 머신 수", len(filtered))
-            colB.metric("🛠 전체 머신 수", len(df))
-            avg_rul = round(df['predicted_rul'].mean(), 1) if not df.empty else "-"
+            colA.metric("🧯 유지보수 필요 머신 수", summary["maintenance"])
+            colB.metric("🛠 전체 머신 수", summary["machines"])
+            avg_rul = round(summary["mean_rul"], 1) if summary["mean_rul"] is not None else "-"
             colC.metric("⏳ 평균 잔존수명", f"{avg_rul} hr")
+            rescore = snapshot["rescore"]
+            st.caption(
+                f"🔁 이번 틱 재평가 {rescore['rescored']} / {rescore['machines']}대 "
+                f"(누적 스킵률 {rescore['skip_rate']:.0%})"
+            )
+
+        if not all_ready:
+            warn_ph.markdown("""
+            <div class='warn-box'>
+            📍 데이터가 부족합니다. 유지보수 상태를 판단할 수 없습니다.
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            warn_ph.empty()
+
+        # 요약 패널은 워커의 증분 집계값을 그대로 사용
+        if draw_summary:
+            risk_labels, risk_values = list(summary["risk_counts"]), list(summary["risk_counts"].values())
+            board.render(
+                "risk", data_signature(risk_labels, risk_values),
+                lambda: _pie(risk_labels, risk_values, "💥 다운타임 리스크 비율"),
+                lambda fig: fig.update_traces(labels=risk_labels, values=risk_values),
+            )
 
-            if not all_ready:
-                st.markdown("""
-                <div class='warn-box'>
-                📍 데이터가 부족합니다. 유지보수 상태를 판단할 수 없습니다.
-                </div>
-                """, unsafe_allow_html=True)
-
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                fig = px.pie(df, names="downtime_risk", title="💥 다운타임 리스크 비율", hole=0.4)
-                fig.update_traces(textinfo='label+percent')
-                st.plotly_chart(fig, use_container_width=True, key=f"pie_risk_{timestamp_key}")
-            with col2:
-                fig = px.line(df.sort_values("machine_id"), x="machine_id", y="predicted_rul",
-                              title="📉 잔존수명 분포", markers=True)
-                st.plotly_chart(fig, use_container_width=True, key=f"line_rul_{timestamp_key}")
-            with col3:
-                failure_df = df["failure_type"].value_counts().reset_index()
-                failure_df.columns = ["failure_type", "count"]
-                fig = px.bar(
+        if draw_line:
+            rul_df = df.sort_values("machine_id")
+            rul_values = rul_df["predicted_rul"].round(1)
+            board.render(
+                "rul", data_signature(rul_df["machine_id"], rul_values),
+                lambda: px.line(rul_df, x="machine_id", y="predicted_rul", title="📉 잔존수명 분포", markers=True),
+                lambda fig: fig.update_traces(x=rul_df["machine_id"], y=rul_df["predicted_rul"]),
+            )
+
+        if draw_summary:
+            failure_df = pd.DataFrame(list(summary["failure_counts"].items()), columns=["failure_type", "count"])
+            failure_df = failure_df.sort_values("count", ascending=False, kind="stable")
+            board.render(
+                "failure", data_signature(failure_df["failure_type"], failure_df["count"]),
+                lambda: px.bar(
                     failure_df,
                     x="failure_type",
                     y="count",
                     labels={"failure_type": "고장유형", "count": "수량"},
                     title="🔧 고장 유형 분포"
-                )
-                st.plotly_chart(fig, use_container_width=True, key=f"bar_failure_{timestamp_key}")
-            with col4:
-                pie_df = pd.DataFrame({
-                    "status": ["정상", "유지보수 필요"],
-                    "count": [len(df) - len(filtered), len(filtered)]
-                })
-                fig = px.pie(pie_df, names="status", values="count", title="🧭 유지보수 비율", hole=0.4)
-                fig.update_traces(textinfo='label+percent')
-                st.plotly_chart(fig, use_container_width=True, key=f"pie_maint_{timestamp_key}")
-
-            st.divider()
-            st.markdown("### 📋 유지보수 대상 머신 목록")
-            st.dataframe(
-                filtered[["machine_id", "failure_type", "predicted_rul", "downtime_risk"] + sensor_cols]
-                .style.hide(axis='index'),
-                use_container_width=True
+                ),
+                lambda fig: fig.update_traces(x=failure_df["failure_type"], y=failure_df["count"]),
             )
 
-        elapsed = time.time() - start_time
-        time.sleep(max(0, refresh_rate - elapsed))
+            maint_counts = [summary["machines"] - summary["maintenance"], summary["maintenance"]]
+            board.render(
+                "maint", data_signature(maint_counts),
+                lambda: _pie(["정상", "유지보수 필요"], maint_counts, "🧭 유지보수 비율"),
+                lambda fig: fig.update_traces(values=maint_counts),
+            )
+
+        window = snapshot["windows"][trend_window]
+        with trend_metrics_ph.container():
+            colA, colB, colC = st.columns(3)
+            colA.metric("🚨 신규 유지보수 알림", window["new_alerts"])
+            ratio = window["maintenance_ratio"]
+            colB.metric("🧭 평균 유지보수 비율", f"{ratio:.1%}" if ratio is not None else "-")
+            mean_rul = window["mean_rul"]
+            colC.metric("⏳ 구간 평균 잔존수명", f"{mean_rul:.1f} hr" if mean_rul is not None else "-")
+        if draw_line:
+            trend = snapshot["trend"](TREND_WINDOWS[trend_window])
+            board.render(
+                "trend", data_signature(trend["timestamp"], trend["mean_rul"], trend["maintenance"]),
+                lambda: px.line(trend, x="timestamp", y=["mean_rul", "maintenance"], markers=True,
+                                labels={"value": "값", "variable": "지표", "timestamp": "시각"}),
+                lambda fig: [fig.data[i].update(x=trend["timestamp"], y=trend[col]) for i, col in enumerate(["mean_rul", "maintenance"])],
+            )
+
+        table = filtered[["machine_id", "failure_type", "predicted_rul", "downtime_risk"] + sensor_cols]
+        board.write(
+            "table", data_signature(table.to_numpy(dtype=object)),
+            lambda: st.dataframe(table.style.hide(axis='index'), use_container_width=True),
+        )
+
+        perf.record("fleet.render", time.perf_counter() - render_start)
+        # 렌더 시간을 스케줄러에 반영하고 (틱 초과 / 병합 집계, 실효 주기 조정) 실제 갱신 주기를 표시
+        # 워커가 느려져 있으면 그보다 빨리 그릴 필요가 없으므로 페이지 목표 주기도 워커 실효 주기에 맞춤
+        worker_schedule = snapshot.get("schedule")
+        pacer.set_interval(max(refresh_rate, worker_schedule["effective_sec"] if worker_schedule else 0))
+        pacer.tick(start, time.monotonic() - start)
+        schedule_ph.caption(schedule_caption(refresh_rate, worker_schedule, pacer.status()))
+        time.sleep(pacer.wait(time.monotonic()))
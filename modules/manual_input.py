@@ -1,13 +1,116 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from modules.model_loader import load_all_models  # ✅ 캐시된 모델 로드
-from sklearn.preprocessing import MinMaxScaler, LabelEncoder
+import plotly.graph_objects as go
+from modules.model_loader import load_utils, model_handle, model_version  # ✅ 캐시된 모델 로드
+from modules.batch_engine import predict_risk_batch, predict_rul_batch
+from modules.prediction_cache import PredictionCache
+from modules import perf
+from modules.settings import PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_SEC, PREDICTION_CACHE_QUANTUM
 
-# ✅ 모델 로드 (캐시된 버전)
-failure_model, utils, rul_models, risk_model = load_all_models()
+# ✅ 모델 로드 (캐시된 버전, 고장 예측 모델은 이 페이지에서 쓰지 않음)
+utils = load_utils()
+rul_models = model_handle("rul")
+risk_model = model_handle("risk")
 sensor_cols = utils["sensor_cols"]
 
+# ✅ 예측 결과 캐시 (모든 세션 공유)
+@st.cache_resource
+def get_prediction_cache():
+    cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_SEC, PREDICTION_CACHE_QUANTUM)
+    perf.register_stats("prediction_cache", cache.stats)
+    return cache
+
+def predict_manual(machine_id, input_df):
+    risk_input = input_df[["temperature", "vibration"]].values
+    risk_pred = int(predict_risk_batch(risk_model.get(), risk_input)[0])
+
+    X_rul = input_df[sensor_cols].values
+    rul_pred = float(predict_rul_batch(rul_models.get(), [machine_id], X_rul)[0])
+    return risk_pred, rul_pred
+
+# ✅ 슬라이더 설정 (라벨, 최소, 최대, 기본값) - 스윕 범위에도 같이 사용
+SENSOR_INPUTS = {
+    "temperature": ("🌡️ 온도 (°C)", 40.0, 120.0, 75.0),
+    "vibration": ("🎛️ 진동 (Hz)", 0.0, 100.0, 50.0),
+    "pressure": ("💨 압력 (Bar)", 0.5, 10.0, 3.0),
+    "humidity": ("💧 습도 (%)", 10.0, 100.0, 60.0),
+    "energy_consumption": ("⚡ 에너지 (kWh)", 0.0, 10.0, 2.5),
+}
+RUL_ALERT_HOURS = 20
+
+# ✅ 민감도 스윕: 1D/2D 격자 전체를 모델별 predict 한 번으로 평가 (결과는 입력 조합별로 캐시)
+@st.cache_data(max_entries=32, show_spinner=False)
+def sweep_grid(machine_id, base_values, x_col, x_range, nx, y_col, y_range, ny, version):
+    xs = np.linspace(x_range[0], x_range[1], nx)
+    ys = np.linspace(y_range[0], y_range[1], ny) if y_col else np.array([np.nan])
+    grid = np.tile(np.asarray([base_values[c] for c in sensor_cols], dtype=float), (len(xs) * len(ys), 1))
+    xx, yy = np.meshgrid(xs, ys)
+    grid[:, sensor_cols.index(x_col)] = xx.ravel()
+    if y_col:
+        grid[:, sensor_cols.index(y_col)] = yy.ravel()
+
+    risk_cols = [sensor_cols.index("temperature"), sensor_cols.index("vibration")]
+    risk = predict_risk_batch(risk_model.get(), grid[:, risk_cols])
+    rul = predict_rul_batch(rul_models.get(), [machine_id] * len(grid), grid)
+    return xs, ys, rul.reshape(len(ys), len(xs)), risk.reshape(len(ys), len(xs))
+
+def render_sweep(machine_id, base_values):
+    labels = {c: SENSOR_INPUTS[c][0] for c in sensor_cols}
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        x_col = st.selectbox("X축 센서", sensor_cols, format_func=labels.get)
+        _, x_min, x_max, _ = SENSOR_INPUTS[x_col]
+        x_range = st.slider("X축 범위", x_min, x_max, (x_min, x_max))
+    with col2:
+        y_col = st.selectbox("Y축 센서 (선택)", [None] + [c for c in sensor_cols if c != x_col],
+                             format_func=lambda c: "없음 (1D 곡선)" if c is None else labels[c])
+        if y_col:
+            _, y_min, y_max, _ = SENSOR_INPUTS[y_col]
+            y_range = st.slider("Y축 범위", y_min, y_max, (y_min, y_max))
+        else:
+            y_range = (0.0, 0.0)
+    with col3:
+        nx = st.slider("X축 격자 수", 10, 500, 200 if not y_col else 100)
+        ny = st.slider("Y축 격자 수", 10, 200, 100) if y_col else 1
+
+    xs, ys, rul, risk = sweep_grid(
+        machine_id, base_values, x_col, x_range, nx, y_col, y_range, ny, model_version("risk", "rul")
+    )
+    st.caption(f"📐 {rul.size:,}개 지점 평가 (나머지 센서는 위 슬라이더 값으로 고정)")
+
+    if y_col is None:
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=xs, y=rul[0], mode="lines", name="RUL (hr)"))
+        fig.add_trace(go.Scatter(x=xs, y=np.where(risk[0] == 1, rul[0], np.nan), mode="markers",
+                                 name="다운타임 리스크 = 1", marker=dict(color="#d62728", size=6)))
+        fig.add_hline(y=RUL_ALERT_HOURS, line_dash="dash", line_color="gray",
+                      annotation_text=f"{RUL_ALERT_HOURS}h 기준")
+        fig.update_layout(xaxis_title=labels[x_col], yaxis_title="잔존수명 (hr)", height=420)
+        st.plotly_chart(fig, use_container_width=True)
+
+        below = np.flatnonzero(rul[0] <= RUL_ALERT_HOURS)
+        if below.size:
+            st.markdown(f"⚠️ **{labels[x_col]} = {xs[below[0]]:.2f}** 부터 RUL이 {RUL_ALERT_HOURS}h 이하로 떨어집니다.")
+        else:
+            st.markdown(f"✅ 선택한 범위에서는 RUL이 {RUL_ALERT_HOURS}h 이하로 떨어지지 않습니다.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = go.Figure(go.Heatmap(x=xs, y=ys, z=rul, colorscale="RdYlGn", colorbar=dict(title="RUL")))
+            fig.add_trace(go.Contour(x=xs, y=ys, z=rul, showscale=False, contours_coloring="lines",
+                                     contours=dict(start=RUL_ALERT_HOURS, end=RUL_ALERT_HOURS, size=1),
+                                     line=dict(color="black", dash="dash"), hoverinfo="skip"))
+            fig.update_layout(title="🛢️ 잔존수명 (RUL)", xaxis_title=labels[x_col],
+                              yaxis_title=labels[y_col], height=450)
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = go.Figure(go.Heatmap(x=xs, y=ys, z=risk, colorscale=[[0, "#D1E7DD"], [1, "#F8D7DA"]],
+                                       zmin=0, zmax=1, colorbar=dict(title="리스크")))
+            fig.update_layout(title="📉 다운타임 리스크", xaxis_title=labels[x_col],
+                              yaxis_title=labels[y_col], height=450)
+            st.plotly_chart(fig, use_container_width=True)
+
 def main():
     # ✅ 상단 설명 박스
     st.markdown(
@@ -41,20 +144,32 @@ def main():
     with st.container():
         col1, col2 = st.columns([1, 3])
         with col1:
-            machine_id = st.selectbox("🔧 머신 ID", list(rul_models.keys()), index=0)
+            machine_id = st.selectbox("🔧 머신 ID", list(rul_models.get().keys()), index=0)
         with col2:
             col21, col22, col23 = st.columns(3)
             with col21:
-                temperature = st.slider("🌡️ 온도 (°C)", 40.0, 120.0, 75.0)
-                pressure = st.slider("💨 압력 (Bar)", 0.5, 10.0, 3.0)
+                temperature = st.slider(*SENSOR_INPUTS["temperature"])
+                pressure = st.slider(*SENSOR_INPUTS["pressure"])
             with col22:
-                vibration = st.slider("🎛️ 진동 (Hz)", 0.0, 100.0, 50.0)
-                humidity = st.slider("💧 습도 (%)", 10.0, 100.0, 60.0)
+                vibration = st.slider(*SENSOR_INPUTS["vibration"])
+                humidity = st.slider(*SENSOR_INPUTS["humidity"])
             with col23:
-                energy = st.slider("⚡ 에너지 (kWh)", 0.0, 10.0, 2.5)
+                energy = st.slider(*SENSOR_INPUTS["energy_consumption"])
 
     st.markdown("""<br><hr style='margin:20px 0'>""", unsafe_allow_html=True)
 
+    mode = st.radio("🧭 모드", ["단일 예측", "민감도 스윕"], horizontal=True)
+    if mode == "민감도 스윕":
+        base_values = {
+            "temperature": temperature,
+            "vibration": vibration,
+            "pressure": pressure,
+            "humidity": humidity,
+            "energy_consumption": energy
+        }
+        render_sweep(machine_id, base_values)
+        return
+
     # ✅ 예측 실행
     if st.button("🔍 예측 실행"):
         input_df = pd.DataFrame([{
@@ -65,17 +180,10 @@ def main():
             "energy_consumption": energy
         }])
 
-        # 예측
-        risk_input = input_df[["temperature", "vibration"]]
-        risk_pred = int(risk_model.predict(risk_input)[0])
-
-        rul_model_entry = rul_models[machine_id]
-        rul_model = rul_model_entry["model"]
-        rul_scaler = rul_model_entry.get("scaler", None)
-        X_rul = input_df[sensor_cols].values
-        if rul_scaler:
-            X_rul = rul_scaler.transform(X_rul)
-        rul_pred = float(rul_model.predict(X_rul)[0])
+        # 예측 (같거나 가까운 입력은 캐시에서 바로 반환)
+        cache = get_prediction_cache()
+        key = cache.make_key(machine_id, input_df[sensor_cols].values[0], model_version("risk", "rul"))
+        risk_pred, rul_pred = cache.get_or_compute(key, lambda: predict_manual(machine_id, input_df))
 
         # ✅ 예측 결과 텍스트
         st.markdown("""
@@ -116,5 +224,11 @@ def main():
             </div>
             """, unsafe_allow_html=True)
 
+        stats = cache.stats()
+        st.caption(
+            f"🗂️ 예측 캐시: 적중 {stats['hits']} / 미스 {stats['misses']} "
+            f"(적중률 {stats['hit_rate']:.0%}, {stats['size']}/{stats['maxsize']}개 저장)"
+        )
+
 if __name__ == "__main__":
     main()
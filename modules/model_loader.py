@@ -1,40 +1,202 @@
 # modules/model_loader.py
 
+import json
+import logging
 import pickle
 import os
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from tensorflow.keras.models import load_model
+from modules.rul_store import INDEX_FILE, RulModelStore, has_split, split_rul_bundle, source_stamp
+from modules.settings import RUL_CACHE_SIZE, FAILURE_BACKEND, MODEL_VARIANTS, MODEL_VARIANT_DIR
+from modules import perf
+
+logger = logging.getLogger(__name__)
 
 # 모델 파일 경로 정의
 BASE_DIR = os.path.dirname(__file__)
 PKL_PATH = os.path.join(BASE_DIR, "model_utils.pkl")
 H5_PATH = os.path.join(BASE_DIR, "failure_prediction_model.h5")
+FAILURE_NPZ_PATH = os.path.join(BASE_DIR, "failure_prediction_model.npz")
 RUL_PATH = os.path.join(BASE_DIR, "random_forest_regressors_by_machine.pkl")
 RISK_PATH = os.path.join(BASE_DIR, "downtime_risk_model.pkl")
+RUL_SPLIT_DIR = os.path.join(BASE_DIR, "rul_models")
+
+# 축소 정밀도 변형본 파일 (MODEL_VARIANT_DIR 기준)
+VARIANT_FILES = {"failure": "failure.npz", "rul": "rul_models", "risk": "risk.pkl"}
+# quantize 도구의 리포트 (변형본마다 원본 출처 "source"를 기록)
+VARIANT_REPORT = "report.json"
+
+# 아티팩트별 로드 시간 (초)
+_load_timings = {}
 
-@st.cache_resource
+@contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    yield
+    _load_timings[name] = time.perf_counter() - start
+    logger.info("model '%s' loaded in %.3fs", name, _load_timings[name])
+
+@st.cache_resource(show_spinner=False)
 def load_utils():
-    with open(PKL_PATH, "rb") as f:
+    with _timed("utils"), open(PKL_PATH, "rb") as f:
         return pickle.load(f)
 
-@st.cache_resource
+# ✅ 원본 아티팩트 경로 (RUL 원본 번들이 없으면 분할본 index.json)
+def original_path(name):
+    if name == "rul" and not os.path.exists(RUL_PATH):
+        return os.path.join(RUL_SPLIT_DIR, INDEX_FILE)
+    return {"failure": H5_PATH, "utils": PKL_PATH, "rul": RUL_PATH, "risk": RISK_PATH}[name]
+
+# ✅ 변형본이 만들어진 원본의 출처 표시 (quantize 도구가 기록하고 로더가 비교)
+def original_stamp(name):
+    path = original_path(name)
+    return source_stamp(path) if os.path.exists(path) else None
+
+# (기록 파일, 기록 파일 stat, 원본 출처) -> 일치 여부 (재실행마다 json을 다시 읽고 경고하지 않도록)
+_variant_checks = {}
+
+# 변형본에 기록된 원본 출처가 지금 원본과 같은지 (RUL은 index.json, 나머지는 report.json)
+def _variant_is_current(name, path):
+    record = os.path.join(path, INDEX_FILE) if name == "rul" else os.path.join(MODEL_VARIANT_DIR, VARIANT_REPORT)
+    if not os.path.exists(record):
+        return False
+    stat = os.stat(record)
+    current = original_stamp(name)
+    key = (record, stat.st_mtime_ns, stat.st_size, json.dumps(current, sort_keys=True))
+    matches = _variant_checks.get(key)
+    if matches is None:
+        with open(record, encoding="utf-8") as f:
+            data = json.load(f)
+        if name == "rul":
+            recorded = data.get("source", {}).get("original")
+        else:
+            recorded = data.get("models", {}).get(name, {}).get("source")
+        matches = _variant_checks[key] = current is not None and recorded == current
+        if not matches:
+            logger.warning("model variant %s was built from a different %s (recorded %s, current %s); "
+                           "serving the original - rerun modules.quantize", path, name, recorded, current)
+    return matches
+
+# ✅ 서빙할 변형본 경로 (MODEL_VARIANTS=1 이고 quantize 도구가 지금 원본으로 허용한 변형본이 있을 때만, 없으면 None)
+# 재학습 등으로 원본이 바뀌면 기록된 출처가 달라지므로 원본을 서빙한다.
+def variant_path(name):
+    if not MODEL_VARIANTS or name not in VARIANT_FILES:
+        return None
+    path = os.path.join(MODEL_VARIANT_DIR, VARIANT_FILES[name])
+    marker = os.path.join(path, INDEX_FILE) if name == "rul" else path
+    if not os.path.exists(marker) or not _variant_is_current(name, path):
+        return None
+    return path
+
+# ✅ 원본 고장 예측 모델의 NumPy 런타임 (내보낸 npz가 원본 h5보다 새로울 때만 npz 사용)
+def read_failure_runtime():
+    from modules.lstm_runtime import NumpyLSTMModel
+    if os.path.exists(FAILURE_NPZ_PATH) and os.path.getmtime(FAILURE_NPZ_PATH) >= os.path.getmtime(H5_PATH):
+        return NumpyLSTMModel.from_npz(FAILURE_NPZ_PATH)
+    return NumpyLSTMModel.from_h5(H5_PATH)
+
+# ✅ RUL 번들을 머신별 파일로 나눠 두기 (원본 번들이 바뀌었을 때만 다시 분할)
+def ensure_rul_split():
+    if not has_split(RUL_SPLIT_DIR, RUL_PATH):
+        logger.info("splitting %s into %s", RUL_PATH, RUL_SPLIT_DIR)
+        split_rul_bundle(RUL_PATH, RUL_SPLIT_DIR)
+    return RUL_SPLIT_DIR
+
+# ✅ 고장 예측 모델: 기본은 NumPy 런타임 (TensorFlow 없이 추론), 실패하면 Keras로 대체
+@st.cache_resource(show_spinner=False)
 def load_failure_model():
-    return load_model(H5_PATH)
+    with _timed("failure"):
+        if FAILURE_BACKEND == "numpy":
+            from modules.lstm_runtime import NumpyLSTMModel
+            try:
+                variant = variant_path("failure")
+                if variant:
+                    logger.info("serving reduced-precision failure model %s", variant)
+                    return NumpyLSTMModel.from_npz(variant)
+                return read_failure_runtime()
+            except Exception:
+                logger.exception("NumPy failure-model runtime unavailable, falling back to Keras")
+        # TensorFlow는 Keras 백엔드를 쓸 때만 import
+        from tensorflow.keras.models import load_model
+        return load_model(H5_PATH)
 
-@st.cache_resource
+# ✅ RUL 모델은 머신별 파일로 나눠 두고 필요한 머신만 로드 (최초 1회 번들 분할)
+@st.cache_resource(show_spinner=False)
 def load_rul_model():
-    with open(RUL_PATH, "rb") as f:
-        return pickle.load(f)
+    with _timed("rul"):
+        variant = variant_path("rul")
+        if variant:
+            logger.info("serving reduced RUL forests %s", variant)
+        store = RulModelStore(variant or ensure_rul_split(), max_models=RUL_CACHE_SIZE)
+        perf.register_stats("rul_cache", store.stats)
+        return store
 
-@st.cache_resource
+@st.cache_resource(show_spinner=False)
 def load_risk_model():
-    with open(RISK_PATH, "rb") as f:
+    with _timed("risk"), open(variant_path("risk") or RISK_PATH, "rb") as f:
         return pickle.load(f)
 
+# ✅ 모델 레지스트리 (이름 -> 캐시된 로더)
+MODEL_LOADERS = {
+    "failure": load_failure_model,
+    "utils": load_utils,
+    "rul": load_rul_model,
+    "risk": load_risk_model,
+}
+
+# ✅ 지연 로드 핸들 (처음 get() 할 때 로드, 이후는 캐시)
+class ModelHandle:
+    def __init__(self, name):
+        self.name = name
+
+    def get(self):
+        return MODEL_LOADERS[self.name]()
+
+    @property
+    def loaded(self):
+        return self.name in _load_timings
+
+def model_handle(name):
+    return ModelHandle(name)
+
+# ✅ 여러 아티팩트를 스레드 풀에서 동시에 로드
+def load_models(names, max_workers=4):
+    names = list(names)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names)) or 1) as pool:
+        futures = {name: pool.submit(MODEL_LOADERS[name]) for name in names}
+        return {name: future.result() for name, future in futures.items()}
+
 def load_all_models():
+    models = load_models(["failure", "utils", "rul", "risk"])
     return (
-        load_failure_model(),
-        load_utils(),
-        load_rul_model(),
-        load_risk_model()
+        models["failure"],
+        models["utils"],
+        models["rul"],
+        models["risk"]
     )
+
+# ✅ 모델 버전 (아티팩트 파일 크기 + 수정 시각, 캐시 키에 사용, 변형본을 서빙 중이면 변형본 기준)
+def _artifact_path(name):
+    variant = variant_path(name)
+    if variant:
+        return os.path.join(variant, INDEX_FILE) if name == "rul" else variant
+    return original_path(name)
+
+def model_version(*names):
+    stamps = []
+    for name in names:
+        path = _artifact_path(name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            stamps.append(f"{name}:{stat.st_size}:{int(stat.st_mtime)}")
+        else:
+            stamps.append(f"{name}:missing")
+    return "|".join(stamps)
+
+# ✅ 아티팩트별 로드 시간 보고
+def get_load_timings():
+    return dict(_load_timings)
+
+perf.register_stats("model_load_seconds", get_load_timings)
@@ -1,81 +1,204 @@
 import streamlit as st
-from streamlit_option_menu import option_menu
 import pandas as pd
 import numpy as np
-import pickle
-from datetime import datetime, timedelta
-from tensorflow.keras.models import load_model
 import plotly.graph_objects as go
 import os
-from streamlit_autorefresh import st_autorefresh
-from modules.model_loader import load_all_models
+import math
+import threading
+import time
+import uuid
+from modules.model_loader import load_utils, load_models, model_handle
+from modules.batch_engine import (
+    NOT_READY, predict_risk_batch, predict_rul_batch, predict_failure_batch, maintenance_required_mask
+)
+from modules.machine_state import MachineStateTable
+from modules.feature_pipeline import AffineTransform, window_features
+from modules.inference_worker import get_inference_worker
+from modules.scheduler import AdaptiveScheduler, schedule_caption
+from modules.ingestion import get_ingestion_pipeline
+from modules.event_store import get_event_store
+from modules.chart_cache import session_figure
+from modules.fleet_stats import RollingCounter
+from modules import perf
+from modules.settings import (
+    SENSOR_LOG_CAPACITY, SENSOR_LOG_SPILL_DIR, MAINT_LOG_CAPACITY, MONITOR_INTERVAL_SEC, FLEET_SIZE
+)
 
-# 모델 캐싱 로드 (최상단에서 한 번만!)
-failure_model, utils, rul_models, risk_model = load_all_models()
+# 모델 캐싱 로드 (설정값만 바로 읽고, 모델은 처음 예측할 때 로드)
+utils = load_utils()
+failure_model = model_handle("failure")
+rul_models = model_handle("rul")
+risk_model = model_handle("risk")
+scaler = utils['scaler']
+label_encoder = utils['label_encoder']
+sensor_cols = utils['sensor_cols']
+seq_length = utils['seq_length']
+feature_cols = sensor_cols + ['delta_minutes']
+# 스케일러 파라미터를 NumPy 배열로 풀어 둔 변환 (틱마다 DataFrame을 만들지 않음)
+feature_transform = AffineTransform(scaler)
+RISK_COLS = [sensor_cols.index('temperature'), sensor_cols.index('vibration')]
 
-def main():
-    scaler = utils['scaler']
-    label_encoder = utils['label_encoder']
-    sensor_cols = utils['sensor_cols']
-    seq_length = utils['seq_length']
-    feature_cols = sensor_cols + ['delta_minutes']
-
-    def generate_random_sensor_sequence(seq_length=1):
-        now = datetime.now()
-        timestamps = [now + timedelta(seconds=i) for i in range(seq_length)]
-        df = pd.DataFrame({
-            'temperature': np.random.normal(75.02, 9.88, size=seq_length),
-            'vibration': np.random.normal(50.00, 14.77, size=seq_length),
-            'pressure': np.random.uniform(1.0, 5.0, size=seq_length),
-            'humidity': np.random.uniform(30.0, 80.0, size=seq_length),
-            'energy_consumption': np.random.uniform(0.5, 5.0, size=seq_length),
-            'timestamp': timestamps
-        })
-        return df
-
-    if 'sensor_log' not in st.session_state:
-        st.session_state.sensor_log = pd.DataFrame()
-    if 'maint_log' not in st.session_state:
-        st.session_state.maint_log = []
+# ✅ 실시간 예측 대상 머신 ID
+MACHINE_IDS = list(range(1, FLEET_SIZE + 1))
+
+# 선택한 머신 센서 그래프 행 수 / 위험 상위 정렬 기준
+CHART_ROWS = 20
+TOP_K_SORTS = {"유지보수 필요 → 리스크 → RUL": "risk", "잔존수명 낮은 순": "rul"}
+
+# 선택이 끊긴 머신은 이 시간(초)이 지나면 저장소 기록 대상에서 제외
+WATCH_TTL_SEC = 60
+
+# ✅ 공용 워커에서 주기적으로 실행되는 실시간 예측 작업
+# 수집 파이프라인에서 모든 머신을 구독해서 (화면 갱신용이라 밀리면 오래된 배치부터 버림)
+# 새 행이 들어온 머신만 모델별로 한 번씩 일괄 예측하고, 결과는 머신별 상태 테이블에 남긴다.
+# 페이지는 선택한 머신의 행만 읽으므로 머신을 바꿔도 다시 예측하지 않는다.
+# 저장소 기록과 고장 유형 집계는 세션들이 보고 있는 머신만 한다.
+class StreamJob:
+    def __init__(self):
+        self.table = self._new_table()
+        self.subscription = get_ingestion_pipeline().subscribe(MACHINE_IDS, block=False)
+        self.events = get_event_store()
+        self.watched = {}
+        self.failure_counts = {}
+        self._counts_lock = threading.Lock()
+        self.models_ready = False
+
+    # ✅ 고정 용량 상태 테이블 (머신당 SENSOR_LOG_CAPACITY 행, 오래 켜 두어도 메모리 일정)
+    def _new_table(self):
+        spill_path = None
+        if SENSOR_LOG_SPILL_DIR:
+            spill_path = os.path.join(SENSOR_LOG_SPILL_DIR, f"sensor_log_{uuid.uuid4().hex}.bin")
+        return MachineStateTable(MACHINE_IDS, sensor_cols, SENSOR_LOG_CAPACITY, spill_path=spill_path)
+
+    def watch(self, machine_id):
+        if machine_id not in self.failure_counts:
+            # 처음 보는 머신은 저장소의 최근 이벤트로 고장 유형 집계를 채워 두고, 이후에는 새 이벤트만 더한다
+            counter = RollingCounter(MAINT_LOG_CAPACITY)
+            counter.extend(self.events.last_events(MAINT_LOG_CAPACITY, machine_id=machine_id, source="monitor")["failure_type"])
+            with self._counts_lock:
+                self.failure_counts.setdefault(machine_id, counter)
+        self.watched[machine_id] = time.monotonic()
+
+    def failure_summary(self, machine_id):
+        with self._counts_lock:
+            counter = self.failure_counts.get(machine_id)
+            return dict(counter.counts) if counter is not None else {}
+
+    def reset(self):
+        self.table.close()
+        self.table = self._new_table()
+
+    def run(self):
+        if not self.models_ready:
+            load_models(["failure", "rul", "risk"])
+            self.models_ready = True
+        batch = self.subscription.poll()
+        if batch is None:
+            return None
+        with perf.span("monitor.append"):
+            idx = self.table.append_batch(batch)
+        if not len(idx):
+            return None
+        machine_ids = [MACHINE_IDS[i] for i in idx]
+        latest = self.table.latest(idx)
+
+        try:
+            with perf.span("monitor.risk"):
+                risk = predict_risk_batch(risk_model.get(), latest[:, RISK_COLS])
+        except:
+            risk = np.full(len(idx), -1)
+
+        try:
+            with perf.span("monitor.rul"):
+                rul = predict_rul_batch(rul_models.get(), machine_ids, latest)
+        except:
+            rul = np.full(len(idx), np.nan)
+
+        failure = np.full(len(idx), NOT_READY, dtype=object)
+        ready_rows = np.flatnonzero(self.table.counts(idx) >= seq_length)
+        try:
+            if len(ready_rows):
+                with perf.span("monitor.scale"):
+                    # delta_minutes는 정수 타임스탬프 차이로 계산 (윈도우 첫 행은 0)
+                    seq_ts, seq_values = self.table.windows(idx[ready_rows], seq_length)
+                    X_input = window_features(feature_transform, seq_ts, seq_values)
+                with perf.span("monitor.failure"):
+                    failure[ready_rows] = predict_failure_batch(failure_model.get(), label_encoder, X_input)
+        except:
+            pass
+
+        ready = ~np.isnan(rul) & (failure != NOT_READY)
+        required = maintenance_required_mask(ready, rul, np.where(risk < 0, np.nan, risk), failure)
+        self.table.record(idx, rul, risk, failure, required, int(batch.timestamps.max()))
+
+        # 세션들이 보고 있는 머신의 판정만 저장소에 기록 (유지보수 필요면 이벤트로도 남음)
+        now = time.monotonic()
+        for mid, seen in list(self.watched.items()):
+            if now - seen > WATCH_TTL_SEC:
+                del self.watched[mid]
+        watched = np.isin(machine_ids, list(self.watched))
+        if watched.any():
+            with perf.span("monitor.events"):
+                self.events.append_predictions(pd.DataFrame({
+                    "machine_id": np.asarray(machine_ids)[watched],
+                    "predicted_rul": rul[watched],
+                    "downtime_risk": np.where(risk[watched] < 0, np.nan, risk[watched]),
+                    "failure_type": failure[watched],
+                    "maintenance_required": required[watched],
+                }), "monitor")
+            with self._counts_lock:
+                for mid, label in zip(np.asarray(machine_ids)[watched & required].tolist(), failure[watched & required]):
+                    self.failure_counts[mid].add(label)
+
+        return {
+            "updated": len(idx),
+            "ready": int(ready.sum()),
+        }
+
+# ✅ 센서 게이지 5개를 한 Figure로 (세션마다 한 번 만들고 이후에는 값만 바꿈)
+GAUGES = list(zip(
+    ["temperature", "vibration", "pressure", "humidity", "energy_consumption"],
+    ["🌡️ 온도 (°C)", "🎷 진동 (Hz)", "💨 압력 (Bar)", "💧 습도 (%)", "⚡ 에너지 (kWh)"],
+    [50, 0, 1, 30, 0.5],
+    [100, 100, 5, 90, 5]
+))
+
+def build_gauges():
+    fig = go.Figure()
+    for i, (metric, title, minv, maxv) in enumerate(GAUGES):
+        fig.add_trace(go.Indicator(
+            mode="gauge+number",
+            value=minv,
+            domain={'x': [i / len(GAUGES) + 0.01, (i + 1) / len(GAUGES) - 0.01], 'y': [0, 1]},
+            gauge={
+                'axis': {'range': [minv, maxv]},
+                'bar': {'color': "royalblue"},
+                'bgcolor': "white",
+                'steps': [
+                    {'range': [minv, (minv+maxv)/2], 'color': '#cce5ff'},
+                    {'range': [(minv+maxv)/2, maxv], 'color': '#99ccff'}
+                ]
+            },
+            title={'text': title, 'font': {'size': 16}}
+        ))
+    fig.update_layout(paper_bgcolor="#E6F0FA", height=250, margin=dict(t=40, b=10, l=30, r=30))
+    return fig
+
+def build_failure_pie():
+    fig = go.Figure(data=[go.Pie(
+        hole=0.5,
+        textinfo='label+percent',
+        textposition='inside',
+        insidetextorientation='horizontal',
+        marker=dict(colors=['#cce5ff','#d4edda','#f8d7da','#ffeeba'])
+    )])
+    fig.update_layout(showlegend=False, margin=dict(t=0, b=0, l=0, r=0), height=300)
+    return fig
 
+def main():
     refresh_rate = st.sidebar.slider("⏱️ 새로고침 주기 (초)", 1, 10, 1)
     run = st.sidebar.toggle("▶️ 실시간 예측 시작")
-    selected_machine_id = st.sidebar.selectbox("💡 머신 ID 선택", list(range(1, 51)))
-
-    if run:
-        st_autorefresh(interval=refresh_rate * 1000, key="refresh")
-
-    new_data = generate_random_sensor_sequence(1)
-    st.session_state.sensor_log = pd.concat([st.session_state.sensor_log, new_data], ignore_index=True)
-
-    seq_df = st.session_state.sensor_log.tail(seq_length).copy()
-    seq_df['timestamp'] = pd.to_datetime(seq_df['timestamp'])
-    seq_df['delta_minutes'] = seq_df['timestamp'].diff().dt.total_seconds().div(60).fillna(0)
-    latest = seq_df.iloc[-1][sensor_cols]
-    latest_array = latest.values.reshape(1, -1)
-
-    try:
-        risk_input = latest[['temperature', 'vibration']].values.reshape(1, -1)
-        downtime_risk_pred = int(risk_model.predict(risk_input)[0])
-    except:
-        downtime_risk_pred = None
-
-    try:
-        model_entry = rul_models[selected_machine_id]
-        rul_model = model_entry['model']
-        rul_scaler = model_entry.get('scaler', None)
-        latest_scaled = rul_scaler.transform(latest_array) if rul_scaler else latest_array
-        predicted_rul = float(rul_model.predict(latest_scaled)[0])
-    except:
-        predicted_rul = None
-
-    try:
-        scaled = scaler.transform(seq_df[feature_cols])
-        X_input = scaled.reshape(1, seq_length, len(feature_cols))
-        y_pred = failure_model.predict(X_input)
-        failure_class = label_encoder.inverse_transform([np.argmax(y_pred)])[0]
-    except:
-        failure_class = "예측 불가"
+    selected_machine_id = st.sidebar.selectbox("💡 머신 ID 선택", list(range(1, FLEET_SIZE + 1)))
 
     st.markdown(
     """
@@ -96,7 +219,56 @@ def main():
         </p>
     </div>
     """, unsafe_allow_html=True
-    )   
+    )
+
+    # ✅ 실시간 영역만 주기적으로 다시 실행 (제목 / 사이드바는 다시 보내지 않음)
+    # 갱신 주기는 스케줄러의 실효 주기 (렌더가 느려지면 늘어나고, 회복되면 설정값으로 돌아옴)
+    pacer = st.session_state.setdefault("monitor_pacer", AdaptiveScheduler("monitor_page", refresh_rate))
+    pacer.set_interval(refresh_rate)
+    if not run:
+        pacer.next_due = None  # 멈춘 동안은 밀린 틱으로 세지 않음
+    run_every = fragment_interval(pacer) if run else None
+    st.session_state["monitor_run_every"] = run_every
+    st.fragment(run_every=run_every)(timed_live_panel)(selected_machine_id, pacer if run else None)
+
+# ✅ fragment 갱신 주기 (목표 주기의 1/4 단위로 올림, 작은 흔들림마다 앱 전체를 다시 실행하지 않도록)
+def fragment_interval(pacer):
+    step = pacer.interval / 4
+    return math.ceil(pacer.effective / step - 1e-9) * step
+
+# ✅ 실시간 영역 렌더 시간을 스케줄러에 반영 (틱 초과 / 병합 집계, 실효 주기 / 상세도 조정)
+def timed_live_panel(selected_machine_id, pacer=None):
+    start = time.monotonic()
+    live_panel(selected_machine_id, pacer)
+    elapsed = time.monotonic() - start
+    perf.record("monitor.render", elapsed)
+    if pacer is not None:
+        pacer.tick(start, elapsed)
+        # 실효 주기가 바뀌었으면 앱 전체를 다시 실행해서 run_every 를 새 값으로 맞춤
+        if fragment_interval(pacer) != st.session_state.get("monitor_run_every"):
+            st.rerun()
+
+def live_panel(selected_machine_id, pacer=None):
+    # ✅ 예측은 공용 워커가 수행하고 페이지는 최신 스냅샷만 읽음
+    worker = get_inference_worker()
+    events = get_event_store()
+    job = worker.ensure_job("monitor", StreamJob, MONITOR_INTERVAL_SEC)
+    job.watch(selected_machine_id)
+    snapshot = worker.wait_snapshot("monitor", timeout=MONITOR_INTERVAL_SEC * 5)
+    if snapshot is None:
+        st.info("⏳ 첫 예측 결과를 기다리는 중입니다.")
+        return
+    detail = pacer.detail if pacer is not None else "full"
+    if pacer is not None:
+        st.caption(schedule_caption(pacer.interval, snapshot.get("schedule"), pacer.status()))
+    # 모든 머신은 워커가 이미 예측해 두었으므로 선택한 머신의 행만 읽는다
+    state = job.table.machine(selected_machine_id, CHART_ROWS)
+    if state["latest"] is None:
+        st.info("⏳ 이 머신의 센서 데이터를 기다리는 중입니다.")
+        return
+    downtime_risk_pred = state["risk"]
+    predicted_rul = state["rul"]
+    failure_class = state["failure"]
 
     col1, col2, col3 = st.columns(3)
     col1.metric("🔧 고장 유형", failure_class)
@@ -116,12 +288,6 @@ def main():
             ⚠️ 유지보수가 필요합니다!
             </div>
             """, unsafe_allow_html=True)
-            st.session_state.maint_log.append({
-                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "failure_class": failure_class,
-                "risk": downtime_risk_pred,
-                "rul": predicted_rul
-            })
         else:
             st.markdown("""
             <div style="display:flex;justify-content:center;align-items:center;background-color:#D1E7DD;padding:15px;border-radius:10px;font-size:18px;font-weight:500;color:#0f5132;width:100%;">
@@ -129,65 +295,71 @@ def main():
             </div>
             """, unsafe_allow_html=True)
 
-    sensor_latest = seq_df.iloc[-1]
+    sensor_latest = state["latest"]
     st.subheader("📟 센서 상태")
-    gauge_cols = st.columns(5)
-    for col, metric, title, minv, maxv in zip(
-        gauge_cols,
-        ["temperature", "vibration", "pressure", "humidity", "energy_consumption"],
-        ["🌡️ 온도 (°C)", "🎷 진동 (Hz)", "💨 압력 (Bar)", "💧 습도 (%)", "⚡ 에너지 (kWh)"],
-        [50, 0, 1, 30, 0.5],
-        [100, 100, 5, 90, 5]
-    ):
-        val = float(sensor_latest[metric])
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=val,
-            gauge={
-                'axis': {'range': [minv, maxv]},
-                'bar': {'color': "royalblue"},
-                'bgcolor': "white",
-                'steps': [
-                    {'range': [minv, (minv+maxv)/2], 'color': '#cce5ff'},
-                    {'range': [(minv+maxv)/2, maxv], 'color': '#99ccff'}
-                ]
-            },
-            title={'text': title, 'font': {'size': 16}}
-        ))
-        fig.update_layout(paper_bgcolor="#E6F0FA", height=250, margin=dict(t=10, b=10, l=10, r=10))
-        col.plotly_chart(fig, use_container_width=True)
+    values = [float(sensor_latest[metric]) for metric, *_ in GAUGES]
+    if detail == "minimal":
+        # 최소 상세도: 게이지 차트 대신 숫자만
+        for col, (_, label, *_), value in zip(st.columns(len(GAUGES)), GAUGES, values):
+            col.metric(label, f"{value:.2f}")
+    else:
+        with perf.span("monitor.gauges"):
+            gauges = session_figure(
+                "monitor_gauges", build_gauges, signature=tuple(values),
+                update=lambda fig: [trace.update(value=v) for trace, v in zip(fig.data, values)],
+            )
+            st.plotly_chart(gauges, use_container_width=True, key="monitor_gauges")
 
     st.divider()
     col1, col2 = st.columns([2, 1])
     with col1:
         st.subheader("🔐 최근 유지보수 필요 기록 (최근 5개)")
-        maint_df = pd.DataFrame(st.session_state.maint_log[-5:])
+        # 유지보수 기록은 저장소에서 조회 (새로고침 / 세션과 무관하게 유지)
+        maint_df = events.last_events(5, machine_id=selected_machine_id, source="monitor")
         if not maint_df.empty:
+            maint_df = pd.DataFrame({
+                "timestamp": maint_df["ts"].dt.strftime('%Y-%m-%d %H:%M:%S'),
+                "failure_class": maint_df["failure_type"],
+                "risk": maint_df["downtime_risk"],
+                "rul": maint_df["predicted_rul"],
+            })
             st.dataframe(maint_df, use_container_width=True)
     with col2:
         st.subheader("📊 최근 고장 유형 비율")
-        try:
-            pie_df = pd.DataFrame(st.session_state.maint_log)["failure_class"].value_counts().reset_index()
-            pie_df.columns = ["Failure Type", "Count"]
-            fig = go.Figure(data=[go.Pie(
-                labels=pie_df["Failure Type"],
-                values=pie_df["Count"],
-                hole=0.5,
-                textinfo='label+percent',
-                textposition='inside',
-                insidetextorientation='horizontal',
-                marker=dict(colors=['#cce5ff','#d4edda','#f8d7da','#ffeeba'])
-            )])
-            fig.update_layout(showlegend=False, margin=dict(t=0, b=0, l=0, r=0), height=300)
-            st.plotly_chart(fig, use_container_width=True)
-        except:
-            st.markdown("""
-            <div style="display:flex;justify-content:center;align-items:center;background-color:#FFFBEA;padding:20px;border-radius:10px;font-size:18px;font-weight:500;color:#665c00;width:100%;">
-            아직 고장 데이터가 부족합니다.
-            </div>
-            """, unsafe_allow_html=True)
+        if detail != "full":
+            st.caption("부하가 높아 갱신 주기가 회복될 때까지 생략합니다.")
+        else:
+            try:
+                counts = job.failure_summary(selected_machine_id)
+                pie_df = pd.DataFrame(sorted(counts.items(), key=lambda kv: -kv[1]), columns=["Failure Type", "Count"])
+                if pie_df.empty:
+                    raise ValueError("no maintenance events")
+                fig = session_figure(
+                    "monitor_failure_pie", build_failure_pie,
+                    signature=(selected_machine_id, tuple(pie_df["Failure Type"]), tuple(pie_df["Count"])),
+                    update=lambda fig: fig.update_traces(labels=pie_df["Failure Type"], values=pie_df["Count"]),
+                )
+                st.plotly_chart(fig, use_container_width=True, key="monitor_failure_pie")
+            except:
+                st.markdown("""
+                <div style="display:flex;justify-content:center;align-items:center;background-color:#FFFBEA;padding:20px;border-radius:10px;font-size:18px;font-weight:500;color:#665c00;width:100%;">
+                아직 고장 데이터가 부족합니다.
+                </div>
+                """, unsafe_allow_html=True)
 
     st.divider()
     st.subheader("📈 실시간 센서 시계열 그래프")
-    st.line_chart(seq_df.set_index('timestamp')[sensor_cols].tail(20))
+    st.line_chart(pd.DataFrame(state["values"], columns=sensor_cols, index=pd.to_datetime(state["timestamps"])))
+
+    # ✅ 위험 상위 머신 (저장된 예측만 정렬, 표 머리글을 눌러 다른 열로도 정렬 가능)
+    st.divider()
+    st.subheader("🚨 위험 상위 머신")
+    col1, col2 = st.columns([2, 1])
+    sort_label = col1.radio("정렬 기준", list(TOP_K_SORTS), horizontal=True, key="monitor_top_k_sort")
+    k = col2.number_input("표시 개수", 1, FLEET_SIZE, min(10, FLEET_SIZE), key="monitor_top_k")
+    if detail == "minimal":
+        st.caption("부하가 높아 갱신 주기가 회복될 때까지 생략합니다.")
+    else:
+        top = job.table.top_k(int(k), sort_by=TOP_K_SORTS[sort_label])
+        st.dataframe(top, use_container_width=True, hide_index=True)
 
@@ -0,0 +1,35 @@
+# modules/page_loader.py
+# 페이지 모듈 지연 import (표지만 열 때는 pandas / plotly / sklearn / 모델을 불러오지 않음)
+# 이 모듈은 표지 경로에서 import 되므로 표준 라이브러리만 쓴다.
+
+import importlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 모듈 이름 -> 첫 import 소요 시간 (초)
+_import_timings = {}
+_lock = threading.Lock()
+
+
+# ✅ 페이지 모듈을 처음 라우팅될 때만 import 하고, 걸린 시간을 기록
+# (다른 세션이 import 하는 중이면 끝날 때까지 기다림)
+def load_page(module_name):
+    if module_name in _import_timings:
+        return sys.modules[module_name]
+    with _lock:
+        if module_name in _import_timings:
+            return sys.modules[module_name]
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        _import_timings[module_name] = time.perf_counter() - start
+    logger.info("page module '%s' imported in %.3fs", module_name, _import_timings[module_name])
+    return module
+
+
+# ✅ 페이지별 첫 import 시간 보고
+def get_import_timings():
+    return dict(_import_timings)
@@ -0,0 +1,172 @@
+# modules/perf.py
+
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+import numpy as np
+from modules.page_loader import get_import_timings
+from modules.settings import PERF_ENABLED, PERF_SAMPLES, PERF_EXPORT_PATH, PERF_EXPORT_SEC
+
+
+# ✅ 프로세스 공용 성능 기록기 (구간별 최근 소요 시간 + 카운터)
+# - 구간(span)은 이름별로 최근 PERF_SAMPLES 개 소요 시간만 고정 크기 deque에 남긴다 (기록 1회 수 µs).
+# - 카운터는 (이름, 라벨) 별 누적 합계이고, 다른 모듈의 stats()는 register_stats()로 연결한다.
+class PerfRecorder:
+    def __init__(self, samples=PERF_SAMPLES):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._spans = defaultdict(lambda: deque(maxlen=self.samples))
+        self._span_totals = defaultdict(lambda: [0, 0.0])
+        self._counters = defaultdict(float)
+        self._stats = {}
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._spans[name].append(seconds)
+            total = self._span_totals[name]
+            total[0] += 1
+            total[1] += seconds
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, name, n=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += n
+
+    def register_stats(self, name, fn):
+        self._stats[name] = fn
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._span_totals.clear()
+            self._counters.clear()
+
+    # ✅ 구간별 p50 / p95 / 최대 (최근 표본 기준) + 누적 횟수 / 합계
+    def span_summary(self):
+        with self._lock:
+            items = [(name, np.array(values), *self._span_totals[name]) for name, values in self._spans.items()]
+        rows = []
+        for name, values, count, total in sorted(items, key=lambda item: item[0]):
+            if not len(values):
+                continue
+            p50, p95 = np.percentile(values, [50, 95])
+            rows.append({
+                "stage": name,
+                "count": count,
+                "p50_ms": p50 * 1000,
+                "p95_ms": p95 * 1000,
+                "max_ms": values.max() * 1000,
+                "total_sec": total,
+            })
+        return rows
+
+    def counters(self):
+        with self._lock:
+            return {key: value for key, value in self._counters.items()}
+
+    def stats(self):
+        out = {}
+        for name, fn in list(self._stats.items()):
+            try:
+                out[name] = fn()
+            except Exception:
+                continue
+        return out
+
+    # ✅ Prometheus 텍스트 형식 (summary / counter / gauge)
+    def prometheus_text(self):
+        lines = [
+            "# HELP dash_stage_seconds Stage duration over the most recent samples.",
+            "# TYPE dash_stage_seconds summary",
+        ]
+        for row in self.span_summary():
+            stage = _label_value(row["stage"])
+            lines.append(f'dash_stage_seconds{{stage="{stage}",quantile="0.5"}} {row["p50_ms"] / 1000:.6g}')
+            lines.append(f'dash_stage_seconds{{stage="{stage}",quantile="0.95"}} {row["p95_ms"] / 1000:.6g}')
+            lines.append(f'dash_stage_seconds_sum{{stage="{stage}"}} {row["total_sec"]:.6g}')
+            lines.append(f'dash_stage_seconds_count{{stage="{stage}"}} {row["count"]}')
+
+        by_name = defaultdict(list)
+        for (name, labels), value in sorted(self.counters().items()):
+            by_name[name].append((labels, value))
+        for name, items in by_name.items():
+            metric = f"dash_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in items:
+                lines.append(f"{metric}{_labels(labels)} {value:g}")
+
+        for source, values in self.stats().items():
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"dash_{_metric_name(source)}_{_metric_name(key)}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    # ✅ 텍스트 파일로 내보내기 (node_exporter textfile collector 등에서 읽도록 임시 파일 -> 교체)
+    def export(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in str(name)).lower()
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels) + "}"
+
+
+# ✅ 모듈 전역 기록기 (PERF_ENABLED=0 이면 span / count는 아무것도 하지 않음)
+recorder = PerfRecorder()
+recorder.register_stats("page_import_seconds", get_import_timings)
+_last_export = 0.0
+
+
+def span(name):
+    return recorder.span(name) if PERF_ENABLED else nullcontext()
+
+
+def record(name, seconds):
+    if PERF_ENABLED:
+        recorder.record(name, seconds)
+
+
+def count(name, n=1, **labels):
+    if PERF_ENABLED:
+        recorder.count(name, n, **labels)
+
+
+def register_stats(name, fn):
+    recorder.register_stats(name, fn)
+
+
+# ✅ 주기적으로 파일 내보내기 (PERF_EXPORT_PATH 가 설정된 경우, 최소 PERF_EXPORT_SEC 간격)
+def maybe_export():
+    global _last_export
+    if not (PERF_ENABLED and PERF_EXPORT_PATH):
+        return
+    now = time.monotonic()
+    if now - _last_export < PERF_EXPORT_SEC:
+        return
+    _last_export = now
+    recorder.export(PERF_EXPORT_PATH)
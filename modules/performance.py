@@ -0,0 +1,141 @@
+import streamlit as st
+import pandas as pd
+from modules import perf
+from modules.page_loader import get_import_timings
+from modules.settings import PERF_ENABLED, PERF_EXPORT_PATH, PERF_EXPORT_SEC
+
+# 구간 이름 접두어 -> 화면 표시 이름
+STAGE_GROUPS = {
+    "ingest": "📡 센서 수집",
+    "fleet": "🏭 머신 전체 평가",
+    "monitor": "🎛️ 실시간 모니터링",
+    "worker": "⚙️ 공용 워커 작업",
+}
+
+# ✅ 카운터를 (이름 -> 라벨별 표) 로 정리
+def counter_frame(counters, name):
+    rows = [
+        {**dict(labels), "count": int(value)}
+        for (counter, labels), value in counters.items() if counter == name
+    ]
+    return pd.DataFrame(rows)
+
+def main():
+    st.markdown(
+    """
+    <div style="
+        background-color: #ffffff;
+        border: 1px solid #ddd;
+        padding: 20px;
+        border-radius: 10px;
+        box-shadow: 0px 4px 12px rgba(0,0,0,0.06);
+        text-align: center;
+        margin-bottom: 10px;
+    ">
+        <h1 style="font-size: 35px; font-weight: 500; margin: 0;">
+            ⏱️ 성능 모니터링
+        </h1>
+        <p style="font-size: 17px; color: #666666; margin-top: 10px;">
+            단계별 처리 시간(p50 / p95)과 모델 호출, 캐시 적중, 틱 초과 횟수를 보여줍니다.
+        </p>
+    </div>
+    """, unsafe_allow_html=True
+    )
+
+    if not PERF_ENABLED:
+        st.info("성능 계측이 꺼져 있습니다. (DASH_PERF_ENABLED=1 로 켜기)")
+        return
+
+    col1, col2 = st.sidebar.columns(2)
+    col1.button("🔄 새로고침")
+    if col2.button("🧹 초기화"):
+        perf.recorder.reset()
+
+    recorder = perf.recorder
+    counters = recorder.counters()
+
+    # ✅ 틱 초과 (작업 / 페이지 갱신이 주기보다 오래 걸린 횟수)
+    overruns = counter_frame(counters, "tick_overruns")
+    st.subheader("🚨 틱 초과")
+    if overruns.empty:
+        st.caption("아직 주기를 넘긴 틱이 없습니다.")
+    else:
+        cols = st.columns(len(overruns))
+        for col, row in zip(cols, overruns.itertuples()):
+            col.metric(row.loop, row.count)
+
+    # ✅ 워커 작업별 적응형 스케줄 (실효 주기 / 평균 처리 시간 / 병합된 틱)
+    stats = recorder.stats()
+    schedules = [
+        {"job": name[len("schedule_"):], **values}
+        for name, values in stats.items() if name.startswith("schedule_")
+    ]
+    if schedules:
+        st.subheader("⏱ 작업 갱신 주기")
+        st.dataframe(
+            pd.DataFrame(schedules).drop(columns="detail_level").style.format({
+                "interval_sec": "{:g}", "effective_sec": "{:.2f}", "cost_ms": "{:.1f}", "load": "{:.2f}",
+            }).hide(axis="index"),
+            use_container_width=True,
+        )
+        coalesced = counter_frame(counters, "tick_coalesced")
+        if not coalesced.empty:
+            st.caption("병합된 틱: " + ", ".join(f"{row.loop} {row.count}" for row in coalesced.itertuples()))
+
+    # ✅ 단계별 처리 시간
+    st.subheader("📊 단계별 처리 시간 (최근 표본 기준)")
+    stages = pd.DataFrame(recorder.span_summary())
+    if stages.empty:
+        st.caption("기록된 구간이 없습니다. 모니터링 페이지를 실행하면 채워집니다.")
+    else:
+        stages.insert(0, "group", stages["stage"].str.split(".").str[0].map(STAGE_GROUPS).fillna("기타"))
+        for group, frame in stages.groupby("group", sort=False):
+            st.markdown(f"**{group}**")
+            st.dataframe(
+                frame.drop(columns="group").style.format({
+                    "p50_ms": "{:.2f}", "p95_ms": "{:.2f}", "max_ms": "{:.2f}", "total_sec": "{:.2f}",
+                }).hide(axis="index"),
+                use_container_width=True,
+            )
+
+    # ✅ 모델 호출 / 차트 갱신 / 캐시
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🧠 모델 호출")
+        calls = counter_frame(counters, "model_calls")
+        if not calls.empty:
+            rows = counter_frame(counters, "model_rows").rename(columns={"count": "rows"})
+            st.dataframe(calls.rename(columns={"count": "calls"}).merge(rows, on="model", how="left"),
+                         use_container_width=True, hide_index=True)
+        st.subheader("🖼️ 차트 갱신")
+        charts = counter_frame(counters, "chart_updates")
+        if not charts.empty:
+            st.dataframe(charts.pivot_table(index="board", columns="result", values="count", fill_value=0),
+                         use_container_width=True)
+    with col2:
+        st.subheader("🗂️ 캐시 / 수집 상태")
+        for name, values in stats.items():
+            if name == "page_import_seconds" or name.startswith("schedule_"):
+                continue  # import 시간 / 갱신 주기 표에서 따로 보여줌
+            numbers = {k: v for k, v in values.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+            if numbers:
+                st.markdown(f"**{name}**")
+                st.dataframe(pd.DataFrame([numbers]), use_container_width=True, hide_index=True)
+
+    # ✅ 페이지 모듈 첫 import 시간 (표지는 페이지 모듈을 불러오지 않음)
+    st.subheader("📦 페이지 모듈 import 시간")
+    timings = get_import_timings()
+    if timings:
+        st.dataframe(
+            pd.DataFrame({"module": list(timings), "import_ms": [v * 1000 for v in timings.values()]}),
+            use_container_width=True, hide_index=True,
+        )
+
+    # ✅ Prometheus 텍스트 내보내기
+    st.divider()
+    text = recorder.prometheus_text()
+    if PERF_EXPORT_PATH:
+        st.caption(f"📤 {PERF_EXPORT_SEC:g}초마다 `{PERF_EXPORT_PATH}` 에 기록 중")
+    st.download_button("📥 Prometheus 텍스트 다운로드", text, file_name="dash_metrics.prom", mime="text/plain")
+    with st.expander("Prometheus 텍스트 보기"):
+        st.code(text, language="text")
@@ -0,0 +1,70 @@
+# modules/prediction_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+# ✅ 예측 결과 메모이제이션 캐시 (크기 제한 LRU + TTL 만료)
+# 키는 (머신 ID, 양자화된 센서 벡터, 모델 버전)이라 슬라이더를 근처 값으로 되돌리면 바로 적중한다.
+class PredictionCache:
+    def __init__(self, maxsize=1024, ttl=600.0, quantum=0.1):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.quantum = quantum
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, machine_id, values, model_version):
+        quantized = np.round(np.asarray(values, dtype=float) / self.quantum).astype(np.int64)
+        return (machine_id, tuple(quantized.tolist()), model_version)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at >= time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,296 @@
+# modules/quantize.py
+# 축소 정밀도 모델 변형본 생성 + 원본 대비 정확도 점검
+# - 고장 예측 LSTM: float16 / int8 가중치 (NumPy 런타임). 줄어드는 것은 파일 크기뿐이다 -
+#   로드할 때 float32로 풀어 두므로 메모리 사용량과 추론 비용은 원본과 같다.
+# - RUL / 리스크 랜덤 포레스트: 깊이 제한 + 트리 수 축소 (메모리와 추론 비용도 함께 줄어듦)
+# 원본과 같은 입력(실제 이력 또는 합성 이력)으로 비교해서 허용 오차를 넘는 변형본은 쓰지 않고,
+# 남은 변형본은 DASH_MODEL_VARIANTS=1 일 때 model_loader가 원본 대신 서빙한다 (만든 원본이 그대로일 때만).
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+from modules.model_loader import (
+    load_utils, read_failure_runtime, ensure_rul_split, original_stamp, RISK_PATH, VARIANT_FILES, VARIANT_REPORT
+)
+from modules.rul_store import RulModelStore, write_rul_split
+from modules.backtest import load_history, synthetic_history, history_inputs, failure_windows
+from modules.tree_engine import CompiledForest, forest_predict
+from modules.feature_pipeline import rul_transform
+from modules.settings import MODEL_VARIANT_DIR, QUANT_MAX_FLIP_RATE, QUANT_MAX_RUL_MAE
+
+# 평가에 쓰는 최대 행 수 (이력에서 무작위 표본)
+EVAL_ROWS = 5000
+# 유지보수 판정의 RUL 기준 (batch_engine.maintenance_required_mask 와 같은 값)
+RUL_THRESHOLD = 20
+
+
+# ✅ 트리 하나를 max_depth 깊이에서 자르기 (잘린 자리의 노드는 학습 때 저장된 노드 평균값을 내는 잎이 됨)
+# sklearn Tree의 pickle 상태(nodes / values)를 너비 우선으로 다시 만들어서 새 Tree로 복원한다.
+def limit_tree(tree, max_depth):
+    state = tree.__getstate__()
+    if state["max_depth"] <= max_depth:
+        return tree
+    nodes, values = state["nodes"], state["values"]
+    left, right = nodes["left_child"], nodes["right_child"]
+
+    levels = [np.array([0])]
+    for _ in range(max_depth):
+        level = levels[-1]
+        level = level[left[level] != -1]
+        if not len(level):
+            break
+        levels.append(np.column_stack([left[level], right[level]]).ravel())
+    order = np.concatenate(levels)
+    new_id = np.full(len(nodes), -1, dtype=np.int64)
+    new_id[order] = np.arange(len(order))
+
+    new_nodes = nodes[order].copy()
+    internal = new_nodes["left_child"] != -1
+    kept = internal & (new_id[np.where(internal, new_nodes["left_child"], 0)] >= 0)
+    new_nodes["left_child"] = np.where(kept, new_id[new_nodes["left_child"]], -1)
+    new_nodes["right_child"] = np.where(kept, new_id[new_nodes["right_child"]], -1)
+    new_nodes["feature"][~kept] = -2
+    new_nodes["threshold"][~kept] = -2.0
+    new_nodes["missing_go_to_left"][~kept] = 0
+
+    cls, args = tree.__reduce__()[:2]
+    limited = cls(*args)
+    limited.__setstate__({
+        "max_depth": len(levels) - 1,
+        "node_count": len(order),
+        "nodes": new_nodes,
+        "values": values[order].copy(),
+    })
+    return limited
+
+
+# ✅ 포레스트 축소본 (앞쪽 n_trees 개 트리만, 각 트리는 max_depth 에서 자름, 원본은 그대로 둠)
+def limit_forest(forest, max_depth=None, n_trees=None):
+    reduced = copy.copy(forest)
+    estimators = []
+    for est in forest.estimators_[:n_trees]:
+        est = copy.copy(est)
+        if max_depth is not None:
+            est.tree_ = limit_tree(est.tree_, max_depth)
+        estimators.append(est)
+    reduced.estimators_ = estimators
+    reduced.n_estimators = len(estimators)
+    return reduced
+
+
+def forest_bytes(forest):
+    return {"compiled": CompiledForest(forest).nbytes, "pickle": len(pickle.dumps(forest))}
+
+
+def _best_time(fn, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def _result(variant, rows, delta, tolerance, original_bytes, variant_bytes, original_sec, variant_sec):
+    return {
+        "variant": variant,
+        "rows": rows,
+        "accepted": all(delta[key] <= limit for key, limit in tolerance.items()),
+        "delta": delta,
+        "tolerance": tolerance,
+        "bytes": {"original": original_bytes, "variant": variant_bytes},
+        "ms": {"original": original_sec * 1000, "variant": variant_sec * 1000},
+    }
+
+
+# ✅ 고장 예측 모델: 예측 고장 유형이 바뀐 비율 + 최대 확률 차이
+# bytes는 저장 크기, memory_bytes는 로드된 가중치 크기 (변형본도 float32로 풀어 두므로 원본과 같음)
+def check_failure(original, variant, X_seq, max_flip_rate, label):
+    ref, original_sec = _best_time(lambda: original.predict(X_seq))
+    out, variant_sec = _best_time(lambda: variant.predict(X_seq))
+    delta = {
+        "flip_rate": float((ref.argmax(axis=1) != out.argmax(axis=1)).mean()),
+        "max_prob_diff": float(np.abs(ref - out).max()),
+    }
+    result = _result(label, len(X_seq), delta, {"flip_rate": max_flip_rate},
+                     original.storage_nbytes, variant.storage_nbytes, original_sec, variant_sec)
+    result["memory_bytes"] = {"original": original.nbytes, "variant": variant.nbytes}
+    result["note"] = "저장 크기만 줄어듦 (로드 시 float32로 풀어서 메모리 / 추론 비용은 원본과 같음)"
+    return result
+
+
+# ✅ 리스크 모델: 판정(0 / 1)이 바뀐 비율
+def check_risk(original, variant, X, max_flip_rate, label):
+    ref, original_sec = _best_time(lambda: forest_predict(original, X))
+    out, variant_sec = _best_time(lambda: forest_predict(variant, X))
+    delta = {"flip_rate": float((np.asarray(ref) != np.asarray(out)).mean())}
+    return _result(label, len(X), delta, {"flip_rate": max_flip_rate},
+                   forest_bytes(original), forest_bytes(variant), original_sec, variant_sec)
+
+
+# ✅ 머신별 RUL 모델: 평균 절대 오차(시간), 최악 머신의 오차, RUL<=20 판정이 바뀐 비율
+# 각 머신 모델을 같은 센서 표본 전체로 비교한다 (머신별 행이 적어도 모델 자체의 차이를 볼 수 있도록).
+def check_rul(store, sensors, max_depth, n_trees, max_flip_rate, max_mae, label):
+    entries = []
+    errors, flips = [], []
+    original_bytes = {"compiled": 0, "pickle": 0}
+    variant_bytes = {"compiled": 0, "pickle": 0}
+    original_sec = variant_sec = 0.0
+    for mid in store:
+        entry = store[mid]
+        transform = rul_transform(entry)
+        X = transform(sensors) if transform is not None else sensors
+        reduced = limit_forest(entry["model"], max_depth, n_trees)
+        ref, sec = _best_time(lambda: forest_predict(entry["model"], X))
+        original_sec += sec
+        out, sec = _best_time(lambda: forest_predict(reduced, X))
+        variant_sec += sec
+        errors.append(float(np.abs(ref - out).mean()))
+        flips.append(float(((ref <= RUL_THRESHOLD) != (out <= RUL_THRESHOLD)).mean()))
+        for total, forest in ((original_bytes, entry["model"]), (variant_bytes, reduced)):
+            for key, value in forest_bytes(forest).items():
+                total[key] += value
+        entries.append((mid, {**entry, "model": reduced}))
+
+    delta = {
+        "mae_hours": float(np.mean(errors)) if errors else 0.0,
+        "worst_machine_mae_hours": float(np.max(errors)) if errors else 0.0,
+        "threshold_flip_rate": float(np.mean(flips)) if flips else 0.0,
+    }
+    tolerance = {"mae_hours": max_mae, "threshold_flip_rate": max_flip_rate}
+    result = _result(label, len(sensors), delta, tolerance,
+                     original_bytes, variant_bytes, original_sec, variant_sec)
+    result["machines"] = len(entries)
+    return result, entries
+
+
+# 허용된 변형본만 임시 경로에 쓰고 교체, 거부된 변형본은 예전 것도 지움 (서빙되지 않도록)
+def _publish(out_dir, name, accepted, write):
+    path = os.path.join(out_dir, VARIANT_FILES[name])
+    if not accepted:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        return
+    if name == "rul":
+        write(path)
+        return
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.{os.getpid()}.tmp{ext}"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _dump_pickle(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# ✅ 변형본 생성 -> 원본 대비 비교 -> 허용 오차 안의 것만 out_dir 에 저장, 리포트 반환
+# failure_precision: "float16" | "int8" | None, max_depth / n_trees: 포레스트 축소 (둘 다 None 이면 포레스트는 건너뜀)
+def build_variants(history, out_dir=MODEL_VARIANT_DIR, failure_precision="float16", max_depth=12, n_trees=None,
+                   max_flip_rate=QUANT_MAX_FLIP_RATE, max_rul_mae=QUANT_MAX_RUL_MAE, rows=EVAL_ROWS, seed=0):
+    utils = load_utils()
+    sensor_cols = utils["sensor_cols"]
+    history, inputs = history_inputs(history, utils)
+    rng = np.random.default_rng(seed)
+
+    def sample(candidates):
+        if len(candidates) <= rows:
+            return candidates
+        return np.sort(rng.choice(candidates, rows, replace=False))
+
+    sensors = inputs["raw"][sample(np.arange(len(history))), :len(sensor_cols)]
+    report = {"history_rows": len(history), "out_dir": out_dir, "models": {}}
+    os.makedirs(out_dir, exist_ok=True)
+
+    if failure_precision:
+        windows = failure_windows(inputs["scaled"], sample(np.flatnonzero(inputs["ready"])), utils["seq_length"])
+        original = read_failure_runtime()
+        variant = original.quantized(failure_precision)
+        result = check_failure(original, variant, windows, max_flip_rate, f"{failure_precision} weights")
+        result["source"] = original_stamp("failure")
+        _publish(out_dir, "failure", result["accepted"], variant.save_npz)
+        report["models"]["failure"] = result
+
+    if max_depth is not None or n_trees is not None:
+        label = f"max_depth={max_depth}, trees={n_trees or 'all'}"
+        with open(RISK_PATH, "rb") as f:
+            original = pickle.load(f)
+        risk_cols = [sensor_cols.index("temperature"), sensor_cols.index("vibration")]
+        variant = limit_forest(original, max_depth, n_trees)
+        result = check_risk(original, variant, sensors[:, risk_cols], max_flip_rate, label)
+        result["source"] = original_stamp("risk")
+        _publish(out_dir, "risk", result["accepted"], lambda path: _dump_pickle(variant, path))
+        report["models"]["risk"] = result
+
+        store = RulModelStore(ensure_rul_split(), max_models=1)
+        result, entries = check_rul(store, sensors, max_depth, n_trees, max_flip_rate, max_rul_mae, label)
+        result["source"] = original_stamp("rul")
+        _publish(out_dir, "rul", result["accepted"],
+                 lambda path: write_rul_split(entries, path, {"variant": label, "original": result["source"]}))
+        report["models"]["rul"] = result
+
+    # 각 변형본의 원본 출처(source)도 함께 기록 -> 원본이 바뀌면 로더가 변형본을 쓰지 않음
+    with open(os.path.join(out_dir, VARIANT_REPORT), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    return report
+
+
+def _print_summary(report):
+    for name, result in report["models"].items():
+        status = "허용" if result["accepted"] else "거부"
+        sizes = result["bytes"]
+        if isinstance(sizes["original"], dict):
+            sizes = {k: v["compiled"] for k, v in sizes.items()}
+        delta = ", ".join(f"{k}={v:.4g}" for k, v in result["delta"].items())
+        print(
+            f"[{status}] {name:<8} {result['variant']:<28} "
+            f"bytes {sizes['original']:>10,} -> {sizes['variant']:>10,}  "
+            f"ms {result['ms']['original']:8.1f} -> {result['ms']['variant']:8.1f}  {delta}"
+        )
+        if "memory_bytes" in result:
+            memory = result["memory_bytes"]
+            print(f"         memory {memory['original']:,} -> {memory['variant']:,}  {result['note']}")
+
+
+# 사용법:
+#   python -m modules.quantize --synthetic-hours 4 --failure-precision float16 --max-depth 12
+#   python -m modules.quantize history.parquet --failure-precision int8 --trees 50 --max-rul-mae 0.5
+# 만든 변형본은 DASH_MODEL_VARIANTS=1 로 서빙
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="축소 정밀도 모델 변형본 생성 / 정확도 점검")
+    parser.add_argument("history", nargs="?", help="평가용 CSV / Parquet 센서 이력 (없으면 합성 이력)")
+    parser.add_argument("--synthetic-hours", type=float, default=4, help="합성 이력 길이 (1분 간격)")
+    parser.add_argument("--machines", type=int, default=50)
+    parser.add_argument("--failure-precision", choices=["float16", "int8", "none"], default="float16")
+    parser.add_argument("--max-depth", type=int, default=12, help="포레스트 트리 최대 깊이 (0 이면 제한 없음)")
+    parser.add_argument("--trees", type=int, default=None, help="포레스트에 남길 트리 수 (기본: 전부)")
+    parser.add_argument("--max-flip-rate", type=float, default=QUANT_MAX_FLIP_RATE)
+    parser.add_argument("--max-rul-mae", type=float, default=QUANT_MAX_RUL_MAE)
+    parser.add_argument("--rows", type=int, default=EVAL_ROWS, help="평가 표본 행 수")
+    parser.add_argument("--out", default=MODEL_VARIANT_DIR)
+    args = parser.parse_args()
+
+    if args.history:
+        history = load_history(args.history)
+    else:
+        history = synthetic_history(range(1, args.machines + 1), int(args.synthetic_hours * 60))
+    report = build_variants(
+        history,
+        out_dir=args.out,
+        failure_precision=None if args.failure_precision == "none" else args.failure_precision,
+        max_depth=args.max_depth or None,
+        n_trees=args.trees,
+        max_flip_rate=args.max_flip_rate,
+        max_rul_mae=args.max_rul_mae,
+        rows=args.rows,
+    )
+    _print_summary(report)
+    print(f"report -> {os.path.join(args.out, VARIANT_REPORT)}")
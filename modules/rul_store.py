@@ -0,0 +1,136 @@
+# modules/rul_store.py
+
+import json
+import numbers
+import os
+import pickle
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+INDEX_FILE = "index.json"
+
+
+# ✅ 머신별 RUL 모델 번들 분할 (머신 1대 = 파일 1개 + index.json)
+def split_rul_bundle(bundle_path, out_dir):
+    with open(bundle_path, "rb") as f:
+        bundle = pickle.load(f)
+    return write_rul_split(bundle.items(), out_dir, source_stamp(bundle_path))
+
+
+# ✅ (머신 ID, 엔트리) 목록을 분할 디렉터리 형식으로 쓰기 (source는 index.json에 출처로 남김)
+def write_rul_split(entries, out_dir, source):
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    index = []
+    for mid, entry in entries:
+        key = int(mid) if isinstance(mid, numbers.Integral) else mid
+        file_name = f"machine_{key}.pkl"
+        path = os.path.join(tmp_dir, file_name)
+        with open(path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        index.append({"machine_id": key, "file": file_name, "bytes": os.path.getsize(path)})
+
+    # index.json을 마지막에 쓰고 디렉터리를 통째로 교체 (중간에 실패해도 반쪽 결과가 남지 않음)
+    with open(os.path.join(tmp_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump({"source": source, "machines": index}, f, ensure_ascii=False, indent=1)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return index
+
+
+# ✅ 원본 파일 출처 표시 (크기 + 수정 시각, 파생 파일이 원본과 맞는지 비교할 때 사용)
+def source_stamp(path):
+    stat = os.stat(path)
+    return {"bytes": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+# ✅ 분할본이 있고 원본 번들과 일치하는지 (원본이 없으면 분할본만으로 사용)
+def has_split(split_dir, bundle_path=None):
+    index_path = os.path.join(split_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return False
+    if bundle_path is None or not os.path.exists(bundle_path):
+        return True
+    with open(index_path, encoding="utf-8") as f:
+        return json.load(f).get("source") == source_stamp(bundle_path)
+
+
+# ✅ 머신별 RUL 모델 저장소 (필요할 때 로드 + 크기 제한 LRU 캐시)
+# dict와 같은 방식(rul_models[mid], .get(mid), .keys())으로 쓸 수 있다.
+class RulModelStore(Mapping):
+    def __init__(self, split_dir, max_models=64):
+        self.split_dir = split_dir
+        self.max_models = max_models
+        with open(os.path.join(split_dir, INDEX_FILE), encoding="utf-8") as f:
+            self.index = {item["machine_id"]: item for item in json.load(f)["machines"]}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # 디스크 로드는 머신별 잠금으로만 막음 (한 머신의 로드가 다른 머신의 조회 / 캐시 적중을 막지 않도록)
+        self._load_locks = {mid: threading.Lock() for mid in self.index}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, machine_id):
+        item = self.index[machine_id]
+        entry = self._cached(machine_id)
+        if entry is not None:
+            return entry
+
+        with self._load_locks[machine_id]:
+            # 같은 머신을 기다리는 동안 다른 스레드가 이미 읽었으면 그것을 씀
+            entry = self._cached(machine_id)
+            if entry is not None:
+                return entry
+            with open(os.path.join(self.split_dir, item["file"]), "rb") as f:
+                entry = pickle.load(f)
+            with self._lock:
+                self.misses += 1
+                self._cache[machine_id] = entry
+                while len(self._cache) > self.max_models:
+                    self._cache.popitem(last=False)
+                    self.evictions += 1
+            return entry
+
+    def _cached(self, machine_id):
+        with self._lock:
+            entry = self._cache.get(machine_id)
+            if entry is not None:
+                self._cache.move_to_end(machine_id)
+                self.hits += 1
+            return entry
+
+    def __contains__(self, machine_id):
+        return machine_id in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def resident(self):
+        with self._lock:
+            return list(self._cache)
+
+    def stats(self):
+        return {
+            "resident": len(self._cache),
+            "max_models": self.max_models,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# 사용법: python -m modules.rul_store [번들 경로] [출력 디렉터리]
+if __name__ == "__main__":
+    from modules.model_loader import RUL_PATH, RUL_SPLIT_DIR
+    src = sys.argv[1] if len(sys.argv) > 1 else RUL_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else RUL_SPLIT_DIR
+    written = split_rul_bundle(src, dst)
+    print(f"{len(written)} machines -> {dst}")
@@ -0,0 +1,127 @@
+# modules/scheduler.py
+
+from modules import perf
+from modules.settings import SCHED_BUDGET, SCHED_MAX_FACTOR, SCHED_EWMA_ALPHA
+
+# 화면 상세도 단계 (0: 전체, 1: 축소, 2: 최소)
+DETAIL_LEVELS = ("full", "reduced", "minimal")
+DETAIL_LABELS = {"full": "전체", "reduced": "축소", "minimal": "최소"}
+
+
+# ✅ 적응형 갱신 스케줄러 (작업 루프 / 페이지 루프 공용)
+# - 틱마다 처리 시간을 지수평활(cost)로 재고, 부하 = cost / (목표 주기 × budget) 로 본다.
+# - 부하가 1을 넘으면 실효 주기를 목표 주기 × 부하 로 늘린다 (최대 max_factor 배).
+# - 실효 주기를 최대로 늘려도 모자라면 상세도를 한 단계 더 낮춘다. 단계는 바로 올라가고,
+#   부하가 경계의 70% 밑으로 내려와야 한 단계씩 돌아온다 (경계에서 왔다 갔다 하지 않도록).
+# - 틱 시각은 due, due + 실효 주기, ... 격자로 잡고, 처리 중 / 시작 전에 지나간 틱은
+#   쌓아 두지 않고 다음 격자 하나로 병합(coalesce)해서 개수만 센다.
+class AdaptiveScheduler:
+    RECOVER = 0.7
+
+    def __init__(self, name, interval, budget=SCHED_BUDGET, max_factor=SCHED_MAX_FACTOR, alpha=SCHED_EWMA_ALPHA):
+        self.name = name
+        self.interval = interval
+        self.budget = budget
+        self.max_factor = max_factor
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.cost = None
+        self.effective = self.interval
+        self.level = 0
+        self.next_due = None
+        self.ticks = 0
+        self.overruns = 0
+        self.coalesced = 0
+
+    @property
+    def detail(self):
+        return DETAIL_LEVELS[self.level]
+
+    @property
+    def load(self):
+        return 0.0 if self.cost is None else self.cost / (self.interval * self.budget)
+
+    def set_interval(self, interval):
+        if interval != self.interval:
+            self.interval = interval
+            self._adapt()
+
+    # ✅ 다음 틱까지 남은 시간 (초, 0 이면 바로 실행)
+    def wait(self, now):
+        return 0.0 if self.next_due is None else max(0.0, self.next_due - now)
+
+    # ✅ 틱 1회 반영 (start: 시작 시각(monotonic), elapsed: 처리 시간) -> 다음 틱 시각
+    def tick(self, start, elapsed):
+        end = start + elapsed
+        due = start if self.next_due is None else self.next_due
+        if start > due + self.effective:
+            # 늦게 시작: 그 사이 지나간 틱은 이번 틱으로 병합
+            missed = int((start - due) // self.effective)
+            due += missed * self.effective
+            self._coalesce(missed)
+
+        self.ticks += 1
+        self.cost = elapsed if self.cost is None else self.alpha * elapsed + (1 - self.alpha) * self.cost
+        if elapsed > self.effective:
+            self.overruns += 1
+            perf.count("tick_overruns", loop=self.name)
+        self._adapt()
+
+        next_due = due + self.effective
+        if next_due <= end:
+            # 처리 중에 지나간 틱은 다음 격자 하나로 병합
+            missed = int((end - next_due) // self.effective) + 1
+            next_due += missed * self.effective
+            self._coalesce(missed)
+        self.next_due = next_due
+        return next_due
+
+    def _coalesce(self, missed):
+        if missed > 0:
+            self.coalesced += missed
+            perf.count("tick_coalesced", missed, loop=self.name)
+
+    def _adapt(self):
+        load = self.load
+        self.effective = self.interval * min(max(load, 1.0), self.max_factor)
+        target = 0 if load <= 1.0 else 1 if load <= self.max_factor else 2
+        if target > self.level:
+            self.level = target
+        elif target < self.level:
+            bound = 1.0 if self.level == 1 else self.max_factor
+            if load < bound * self.RECOVER:
+                self.level -= 1
+
+    # ✅ 화면 / Prometheus 용 현재 상태
+    def status(self):
+        return {
+            "interval_sec": self.interval,
+            "effective_sec": self.effective,
+            "cost_ms": (self.cost or 0.0) * 1000,
+            "load": self.load,
+            "detail": self.detail,
+            "detail_level": self.level,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "coalesced": self.coalesced,
+        }
+
+
+# ✅ 실효 갱신 주기 안내 문구 (여러 스케줄러 중 가장 느린 쪽이 실제 갱신 주기)
+def schedule_caption(target, *statuses):
+    statuses = [s for s in statuses if s]
+    if not statuses:
+        return f"⏱ 갱신 주기 {target:g}초"
+    effective = max([target] + [s["effective_sec"] for s in statuses])
+    level = max(s["detail_level"] for s in statuses)
+    coalesced = sum(s["coalesced"] for s in statuses)
+    text = f"⏱ 실효 갱신 주기 {effective:.1f}초 (설정 {target:g}초)"
+    text += " · 처리 " + " / ".join(f"{s['cost_ms']:.0f}ms" for s in statuses)
+    text += f" · 상세도 {DETAIL_LABELS[DETAIL_LEVELS[level]]}"
+    if coalesced:
+        text += f" · 병합된 틱 {coalesced}"
+    if effective > target * 1.05 or level:
+        text += " ⚠️ 부하로 갱신을 늦추는 중"
+    return text
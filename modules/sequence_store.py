@@ -0,0 +1,100 @@
+# modules/sequence_store.py
+
+import numpy as np
+
+
+# ✅ 머신별 시퀀스 저장소 (미리 할당된 float32 링 버퍼)
+# - 각 행을 pos, pos + seq_length 두 위치에 함께 기록해서
+#   최근 seq_length 개 구간이 항상 연속 메모리(슬라이스 뷰)로 꺼내지도록 한다.
+# - 새 행만 스케일링해서 저장하므로 틱마다 전체 윈도우를 다시 변환하지 않는다.
+class SequenceStore:
+    def __init__(self, machine_ids, seq_length, n_features, transform=None):
+        self.machine_ids = list(machine_ids)
+        self.index = {mid: i for i, mid in enumerate(self.machine_ids)}
+        self.seq_length = seq_length
+        self.n_features = n_features
+        self.transform = transform
+
+        n = len(self.machine_ids)
+        self._buf = np.zeros((n, 2 * seq_length, n_features), dtype=np.float32)
+        self._latest = np.zeros((n, n_features), dtype=np.float32)
+        self._cursor = np.zeros(n, dtype=np.int64)
+        self._count = np.zeros(n, dtype=np.int64)
+        self._last_ts = np.zeros(n, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.machine_ids)
+
+    @property
+    def nbytes(self):
+        return self._buf.nbytes + self._latest.nbytes + self._cursor.nbytes + self._count.nbytes + self._last_ts.nbytes
+
+    def reset(self):
+        self._cursor[:] = 0
+        self._count[:] = 0
+        self._last_ts[:] = 0
+
+    # ✅ 새 센서 행 추가 (rows: (k, n_features) 원본값, idx: 대상 머신 행 번호, None이면 전체)
+    # idx 안에 같은 머신이 두 번 나오면 안 된다 (한 번에 머신당 1행).
+    def append(self, rows, idx=None, timestamps=None):
+        rows = np.asarray(rows, dtype=np.float32)
+        if idx is None:
+            idx = np.arange(len(self.machine_ids))
+        else:
+            idx = np.asarray(idx, dtype=np.int64)
+        scaled = self.transform(rows) if self.transform is not None else rows
+
+        pos = self._cursor[idx]
+        self._buf[idx, pos] = scaled
+        self._buf[idx, pos + self.seq_length] = scaled
+        self._latest[idx] = rows
+        self._cursor[idx] = (pos + 1) % self.seq_length
+        self._count[idx] = np.minimum(self._count[idx] + 1, self.seq_length)
+        if timestamps is not None:
+            self._last_ts[idx] = timestamps
+
+    # ✅ 머신별 마지막 센서 타임스탬프 (epoch ns, 아직 없으면 0)
+    def last_timestamps(self, idx=None):
+        return self._last_ts if idx is None else self._last_ts[idx]
+
+    def positions(self, machine_ids):
+        return np.array([self.index[mid] for mid in machine_ids], dtype=np.int64)
+
+    def ready_mask(self):
+        return self._count == self.seq_length
+
+    def seen_mask(self):
+        return self._count > 0
+
+    def latest(self):
+        return self._latest
+
+    # ✅ 머신 1대의 최근 윈도우 (복사 없는 뷰, 오래된 순 -> 최신 순)
+    def window(self, machine_id):
+        i = self.index[machine_id]
+        start = self._cursor[i]
+        return self._buf[i, start:start + self.seq_length]
+
+    # ✅ 여러 머신의 윈도우 (N, seq_length, n_features)
+    # 커서가 모두 같으면(같은 틱에 함께 추가된 경우) 슬라이스 뷰를 그대로 반환한다.
+    def windows(self, idx=None):
+        if idx is None:
+            cursors = self._cursor
+            if len(cursors) and (cursors == cursors[0]).all():
+                start = cursors[0]
+                return self._buf[:, start:start + self.seq_length]
+            idx = np.arange(len(self.machine_ids))
+        idx = np.asarray(idx, dtype=np.int64)
+        offsets = self._cursor[idx][:, None] + np.arange(self.seq_length)
+        return self._buf[idx[:, None], offsets]
+
+
+# ✅ 같은 머신 행 번호가 몇 번째로 나왔는지 (0, 1, 2 ...) - 한 배치를 머신당 1행씩 나눠 추가할 때 사용
+def occurrence_rank(idx):
+    idx = np.asarray(idx, dtype=np.int64)
+    order = np.argsort(idx, kind="stable")
+    sorted_idx = idx[order]
+    starts = np.flatnonzero(np.r_[True, sorted_idx[1:] != sorted_idx[:-1]])
+    rank = np.empty(len(idx), dtype=np.int64)
+    rank[order] = np.arange(len(idx)) - np.repeat(starts, np.diff(np.r_[starts, len(idx)]))
+    return rank
@@ -0,0 +1,97 @@
+# modules/settings.py
+# 대시보드 실행 설정 (환경변수로 덮어쓰기 가능)
+
+import os
+
+# ✅ 실시간 모니터링 센서 로그 (머신당 보관 행 수)
+SENSOR_LOG_CAPACITY = int(os.environ.get("DASH_SENSOR_LOG_CAPACITY", "600"))
+SENSOR_LOG_SPILL_DIR = os.environ.get("DASH_SENSOR_LOG_SPILL_DIR") or None
+MAINT_LOG_CAPACITY = int(os.environ.get("DASH_MAINT_LOG_CAPACITY", "500"))
+
+# ✅ 공용 추론 워커 주기 (초)
+FLEET_INTERVAL_SEC = float(os.environ.get("DASH_FLEET_INTERVAL_SEC", "5"))
+MONITOR_INTERVAL_SEC = float(os.environ.get("DASH_MONITOR_INTERVAL_SEC", "1"))
+WORKER_IDLE_TIMEOUT_SEC = float(os.environ.get("DASH_WORKER_IDLE_TIMEOUT_SEC", "60"))
+
+# ✅ 적응형 갱신 스케줄러 (틱 처리 시간이 주기의 SCHED_BUDGET 비율을 넘으면 주기를 늘리고,
+#    SCHED_MAX_FACTOR 배까지 늘려도 모자라면 화면 상세도를 낮춤, 처리 시간 지수평활 계수)
+SCHED_BUDGET = float(os.environ.get("DASH_SCHED_BUDGET", "0.8"))
+SCHED_MAX_FACTOR = float(os.environ.get("DASH_SCHED_MAX_FACTOR", "4"))
+SCHED_EWMA_ALPHA = float(os.environ.get("DASH_SCHED_EWMA_ALPHA", "0.3"))
+
+# ✅ 메모리에 동시에 올려둘 머신별 RUL 모델 수 (LRU)
+RUL_CACHE_SIZE = int(os.environ.get("DASH_RUL_CACHE_SIZE", "64"))
+
+# ✅ 랜덤 포레스트 추론 백엔드 ("compiled": NumPy 트리 엔진, "sklearn": 기본 predict)
+TREE_BACKEND = os.environ.get("DASH_TREE_BACKEND", "compiled")
+
+# ✅ 고장 예측 모델 추론 백엔드 ("numpy": TensorFlow 없는 NumPy 런타임, "keras": 원본 Keras 모델)
+FAILURE_BACKEND = os.environ.get("DASH_FAILURE_BACKEND", "numpy")
+
+# ✅ 축소 정밀도 모델 변형본 (python -m modules.quantize 로 생성)
+# MODEL_VARIANTS=1 이면 허용 오차를 통과해 MODEL_VARIANT_DIR 에 남은 변형본을 원본 대신 서빙한다.
+MODEL_VARIANTS = os.environ.get("DASH_MODEL_VARIANTS", "0") == "1"
+MODEL_VARIANT_DIR = os.environ.get(
+    "DASH_MODEL_VARIANT_DIR", os.path.join(os.path.dirname(__file__), "model_variants")
+)
+# 변형본 허용 오차 (원본 대비 고장 유형 / 리스크 / RUL<=20 판정이 바뀐 행 비율, RUL 평균 절대 오차(시간))
+QUANT_MAX_FLIP_RATE = float(os.environ.get("DASH_QUANT_MAX_FLIP_RATE", "0.01"))
+QUANT_MAX_RUL_MAE = float(os.environ.get("DASH_QUANT_MAX_RUL_MAE", "1.0"))
+
+# ✅ 수동 입력 예측 캐시 (항목 수, 유지 시간(초), 센서값 양자화 단위)
+PREDICTION_CACHE_SIZE = int(os.environ.get("DASH_PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL_SEC = float(os.environ.get("DASH_PREDICTION_CACHE_TTL_SEC", "1800"))
+PREDICTION_CACHE_QUANTUM = float(os.environ.get("DASH_PREDICTION_CACHE_QUANTUM", "0.1"))
+
+# ✅ 센서 수집 파이프라인
+# 소스: "synthetic" | "replay:<csv/parquet 경로>" | "socket:<host>:<port>"
+FLEET_SIZE = int(os.environ.get("DASH_FLEET_SIZE", "50"))
+SENSOR_SOURCE = os.environ.get("DASH_SENSOR_SOURCE", "synthetic")
+SENSOR_RATE_HZ = float(os.environ.get("DASH_SENSOR_RATE_HZ", "1"))
+REPLAY_SPEED = float(os.environ.get("DASH_REPLAY_SPEED", "1"))
+INGEST_BATCH_ROWS = int(os.environ.get("DASH_INGEST_BATCH_ROWS", "1000"))
+INGEST_QUEUE_BATCHES = int(os.environ.get("DASH_INGEST_QUEUE_BATCHES", "256"))
+INGEST_MAX_ROWS_PER_SEC = float(os.environ.get("DASH_INGEST_MAX_ROWS_PER_SEC", "0"))
+
+# ✅ 예측 / 유지보수 이벤트 저장소 (SQLite, 묶음 기록 행 수, 기록 주기(초))
+EVENT_DB_PATH = os.environ.get(
+    "DASH_EVENT_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "events.db")
+)
+EVENT_FLUSH_ROWS = int(os.environ.get("DASH_EVENT_FLUSH_ROWS", "1000"))
+EVENT_FLUSH_SEC = float(os.environ.get("DASH_EVENT_FLUSH_SEC", "1"))
+
+# ✅ 머신 전체 추세 구간 (교대 근무 시간)
+SHIFT_HOURS = float(os.environ.get("DASH_SHIFT_HOURS", "8"))
+
+# ✅ 머신 전체 평가 샤드 프로세스 수 (1이면 Streamlit 프로세스 안에서 평가)
+FLEET_WORKERS = int(os.environ.get("DASH_FLEET_WORKERS", "1"))
+# 샤드 응답 대기 한도 (초, 기본: 평가 주기의 4배). 넘기면 멈춘 샤드로 보고 이 프로세스에서 대신 평가한다.
+# 첫 응답은 샤드가 모델을 읽는 시간까지 포함하므로 SHARD_STARTUP_TIMEOUT_SEC 까지 기다린다.
+SHARD_TIMEOUT_SEC = float(os.environ.get("DASH_SHARD_TIMEOUT_SEC", str(FLEET_INTERVAL_SEC * 4)))
+SHARD_STARTUP_TIMEOUT_SEC = float(os.environ.get("DASH_SHARD_STARTUP_TIMEOUT_SEC", "120"))
+
+# ✅ 머신 전체 평가 데드밴드 ("열=폭" 목록, 빈 값이면 값이 조금이라도 바뀐 머신은 모두 재평가)
+# 데드밴드 안에서만 움직인 머신도 DEADBAND_MAX_SKIP_TICKS 틱마다 한 번은 다시 평가한다.
+SENSOR_DEADBANDS = {
+    name: float(width)
+    for name, width in (
+        item.split("=") for item in os.environ.get(
+            "DASH_SENSOR_DEADBANDS",
+            "temperature=0.5,vibration=1.0,humidity=1.0,pressure=0.05,energy_consumption=0.05",
+        ).split(",") if item
+    )
+}
+DEADBAND_MAX_SKIP_TICKS = int(os.environ.get("DASH_DEADBAND_MAX_SKIP_TICKS", "12"))
+
+# ✅ 성능 계측 (구간별 보관 표본 수, Prometheus 텍스트 내보내기 경로 / 간격(초))
+# 사이드바 성능 페이지는 선택 사항이라 기본으로 숨기고, DASH_PERF_PAGE=1 일 때만 메뉴에 표시한다.
+PERF_ENABLED = os.environ.get("DASH_PERF_ENABLED", "1") == "1"
+PERF_SAMPLES = int(os.environ.get("DASH_PERF_SAMPLES", "1024"))
+PERF_EXPORT_PATH = os.environ.get("DASH_PERF_EXPORT_PATH") or None
+PERF_EXPORT_SEC = float(os.environ.get("DASH_PERF_EXPORT_SEC", "15"))
+PERF_PAGE = os.environ.get("DASH_PERF_PAGE", "0") == "1"
+
+# ✅ 정적 이미지 변형본 (가로 폭 목록(px), WebP / JPEG 품질)
+ASSET_WIDTHS = tuple(int(w) for w in os.environ.get("DASH_ASSET_WIDTHS", "480,768,1024").split(",") if w)
+ASSET_WEBP_QUALITY = int(os.environ.get("DASH_ASSET_WEBP_QUALITY", "80"))
+ASSET_JPEG_QUALITY = int(os.environ.get("DASH_ASSET_JPEG_QUALITY", "82"))
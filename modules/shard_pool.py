@@ -0,0 +1,187 @@
+# modules/shard_pool.py
+
+import logging
+import multiprocessing
+import os
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from modules import perf
+from modules.ingestion import SensorBatch
+from modules.settings import SHARD_TIMEOUT_SEC, SHARD_STARTUP_TIMEOUT_SEC
+
+logger = logging.getLogger(__name__)
+
+_BLAS_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+# 샤드 프로세스마다 BLAS 스레드를 1개로 (코어 수보다 많은 스레드가 서로 경쟁하지 않도록)
+@contextmanager
+def _single_thread_blas():
+    saved = {name: os.environ.get(name) for name in _BLAS_THREAD_VARS}
+    for name in _BLAS_THREAD_VARS:
+        os.environ.setdefault(name, "1")
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+# 맡은 머신의 시퀀스 상태 / 점수기 (샤드 프로세스, 또는 죽은 샤드를 대신하는 이 프로세스)
+def _shard_state(machine_ids):
+    from modules import mainten
+    from modules.model_loader import load_models
+    load_models(["failure", "rul", "risk"])
+    return mainten.new_sequence_store(machine_ids), mainten.new_scorer(machine_ids)
+
+
+# 틱 1회: 샤드 몫의 배치를 반영하고 맡은 머신 전체를 평가
+def _shard_tick(store, scorer, mids, timestamps, values, columns):
+    from modules import mainten
+    if len(mids):
+        mainten.append_batch(store, SensorBatch(mids, timestamps, values, columns))
+    return mainten.evaluate_all_machines(store, scorer)
+
+
+# ✅ 샤드 프로세스 본체: 맡은 머신의 시퀀스 상태와 모델을 한 번만 만들고 틱 요청을 처리
+# initializer는 모델을 읽기 전에 샤드 프로세스에서 한 번 호출된다 (예: 벤치마크의 아티팩트 경로 교체).
+def _shard_main(conn, machine_ids, initializer=None, initargs=()):
+    if initializer is not None:
+        initializer(*initargs)
+    store, scorer = _shard_state(machine_ids)
+
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        op = msg[0]
+        if op == "tick":
+            conn.send(_shard_tick(store, scorer, *msg[1:]))
+        elif op == "reset":
+            store.reset()
+            scorer.reset()
+            conn.send(None)
+        elif op == "stop":
+            return
+
+
+# ✅ 머신 ID를 연속 구간으로 나눠 프로세스마다 한 구간씩 평가하는 샤딩 평가기
+# 틱마다 배치를 샤드별로 나눠 모든 샤드에 먼저 보낸 뒤 결과를 모아 머신 순서로 합친다.
+# 샤드 프로세스가 죽거나 (파이프 EOF / 끊김) timeout 초 안에 답하지 않으면 (멈춤)
+# 그 샤드의 머신은 이후 이 프로세스에서 대신 평가한다 (첫 응답은 모델 로드 때문에 startup_timeout 까지 기다림).
+# 죽은 샤드의 시퀀스 상태는 잃으므로, 그 머신들은 윈도우가 다시 찰 때까지 준비 전으로 보인다.
+class ShardedFleetEvaluator:
+    def __init__(self, machine_ids, n_workers, initializer=None, initargs=(),
+                 timeout=SHARD_TIMEOUT_SEC, startup_timeout=SHARD_STARTUP_TIMEOUT_SEC):
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        machine_ids = np.sort(np.asarray(list(machine_ids), dtype=np.int64))
+        self.machine_ids = machine_ids.tolist()
+        self.shards = [part.tolist() for part in np.array_split(machine_ids, n_workers) if len(part)]
+        self._bounds = np.array([shard[0] for shard in self.shards], dtype=np.int64)
+
+        ctx = multiprocessing.get_context("spawn")
+        self._conns = []
+        self._procs = []
+        with _single_thread_blas():
+            for k, shard in enumerate(self.shards):
+                parent_conn, child_conn = ctx.Pipe()
+                proc = ctx.Process(target=_shard_main, args=(child_conn, shard, initializer, initargs), name=f"fleet-shard-{k}", daemon=True)
+                proc.start()
+                child_conn.close()
+                self._conns.append(parent_conn)
+                self._procs.append(proc)
+        # 샤드 번호 -> (store, scorer): 죽은 샤드를 대신 평가하는 상태
+        self._local = {}
+        self._answered = [False] * len(self.shards)
+
+    def __len__(self):
+        return len(self.shards)
+
+    def evaluate(self, batch):
+        keys = np.searchsorted(self._bounds, batch.machine_ids, side="right") - 1
+        parts = []
+        for k in range(len(self.shards)):
+            sel = keys == k
+            parts.append((batch.machine_ids[sel], batch.timestamps[sel], batch.values[sel], batch.columns))
+            self._send(k, ("tick",) + parts[k])
+
+        results = []
+        for k, part in enumerate(parts):
+            ok, result = self._recv(k)
+            results.append(result if ok else _shard_tick(*self._local[k], *part))
+        frames = [df for df, _ in results if len(df)]
+        if not frames:
+            return results[0][0], False
+        df = pd.concat(frames, ignore_index=True)
+        return df, all(ready for _, ready in results)
+
+    def reset(self):
+        for k in range(len(self.shards)):
+            self._send(k, ("reset",))
+        for k in range(len(self.shards)):
+            ok, _ = self._recv(k)
+            if ok:
+                continue
+            store, scorer = self._local[k]
+            store.reset()
+            scorer.reset()
+
+    # 살아 있는 샤드에만 보냄 (보내다 끊기면 대체 평가로 전환)
+    def _send(self, k, msg):
+        if k in self._local:
+            return
+        try:
+            self._conns[k].send(msg)
+        except OSError as e:
+            self._fail(k, e)
+
+    # -> (True, 응답) 또는 죽은 샤드면 (False, None)
+    def _recv(self, k):
+        if k in self._local:
+            return False, None
+        conn = self._conns[k]
+        timeout = self.timeout if self._answered[k] else self.startup_timeout
+        try:
+            if not conn.poll(timeout):
+                self._fail(k, TimeoutError(f"no reply in {timeout:g}s"))
+                return False, None
+            result = conn.recv()
+        except (EOFError, OSError) as e:
+            self._fail(k, e)
+            return False, None
+        self._answered[k] = True
+        return True, result
+
+    # 죽었거나 멈춘 샤드 정리 (멈춘 프로세스는 종료) -> 이후 이 프로세스에서 대신 평가
+    def _fail(self, k, error):
+        proc = self._procs[k]
+        proc.join(timeout=1)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+        reason = "timeout" if isinstance(error, TimeoutError) else "dead"
+        logger.warning("fleet shard %d failed (%s, exitcode=%s, %r); evaluating its %d machines in-process",
+                       k, reason, proc.exitcode, error, len(self.shards[k]))
+        perf.count("shard_failures", shard=k, reason=reason)
+        self._conns[k].close()
+        self._local[k] = _shard_state(self.shards[k])
+
+    def close(self):
+        for k, (conn, proc) in enumerate(zip(self._conns, self._procs)):
+            if k in self._local:
+                continue
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+            proc.join(timeout=5)
+            conn.close()
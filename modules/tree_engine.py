@@ -0,0 +1,126 @@
+# modules/tree_engine.py
+
+import threading
+import weakref
+import numpy as np
+from sklearn.ensemble._forest import BaseForest
+from modules.settings import TREE_BACKEND
+
+_TREE_LEAF = -1
+
+
+# ✅ 학습된 랜덤 포레스트를 평면 NumPy 노드 배열로 변환한 추론 엔진
+# - 모든 트리의 노드를 하나의 배열로 이어 붙이고, (행 x 트리) 전체를 깊이 단위로 한 번에 내려간다.
+# - sklearn과 같은 순서로 계산해서 (float32 입력 비교, 트리 순서대로 누적 후 평균) 결과가 일치한다.
+class CompiledForest:
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        self.n_trees = len(trees)
+        self.n_features = forest.n_features_in_
+        self.is_classifier = hasattr(forest, "classes_")
+        self.classes_ = getattr(forest, "classes_", None)
+
+        offsets = np.cumsum([0] + [t.node_count for t in trees])
+        self.roots = offsets[:-1].astype(np.int64)
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, offset in zip(trees, self.roots):
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == _TREE_LEAF
+            # 잎 노드는 자기 자신을 가리키게 해서 깊이가 다른 트리도 같은 횟수만큼 반복할 수 있게 한다
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            if self.is_classifier:
+                proba = tree.value[:, 0, :]
+                normalizer = proba.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                value.append(proba / normalizer)
+            else:
+                value.append(tree.value[:, 0, 0])
+
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.value = np.concatenate(value)
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.max_depth = max(t.max_depth for t in trees)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value, self.is_leaf))
+
+    # ✅ 각 행이 도달하는 잎 노드 번호 (n_rows, n_trees)
+    def apply(self, X):
+        # sklearn 트리는 입력을 float32로 바꾼 뒤 float64 임계값과 비교한다
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for depth in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            if depth % 8 == 7 and self.is_leaf[node].all():
+                break
+        return node
+
+    def _accumulate(self, leaves):
+        leaf_values = self.value[leaves]
+        out = np.zeros(leaf_values.shape[:1] + leaf_values.shape[2:])
+        for t in range(self.n_trees):
+            out += leaf_values[:, t]
+        out /= self.n_trees
+        return out
+
+    # 큰 격자는 (행 x 트리) 배열이 너무 커지지 않도록 나눠서 계산
+    def _evaluate(self, X, max_pairs=1 << 20):
+        X = np.asarray(X)
+        chunk = max(1, max_pairs // self.n_trees)
+        if len(X) <= chunk:
+            return self._accumulate(self.apply(X))
+        return np.concatenate([self._accumulate(self.apply(X[i:i + chunk])) for i in range(0, len(X), chunk)])
+
+    def predict_proba(self, X):
+        return self._evaluate(X)
+
+    def predict(self, X):
+        if len(X) == 0:
+            return np.empty(0, dtype=self.classes_.dtype if self.is_classifier else float)
+        out = self._evaluate(X)
+        if self.is_classifier:
+            return self.classes_.take(np.argmax(out, axis=1), axis=0)
+        return out
+
+
+# 모델 객체가 메모리에서 내려가면(LRU 제거 등) 컴파일 결과도 함께 정리된다
+_compiled = weakref.WeakKeyDictionary()
+_compile_lock = threading.Lock()
+
+
+# 랜덤 포레스트 / ExtraTrees 계열만 (트리 평균). AdaBoost, GradientBoosting, Bagging 등
+# 트리를 가중합하거나 다른 방식으로 합치는 모델은 sklearn predict 로 처리한다.
+def _is_supported(model):
+    return isinstance(model, BaseForest) and getattr(model, "n_outputs_", 1) == 1
+
+
+# ✅ 포레스트 컴파일 (모델당 한 번, 지원하지 않는 모델은 None)
+def compile_forest(model):
+    if not _is_supported(model):
+        return None
+    with _compile_lock:
+        compiled = _compiled.get(model)
+        if compiled is None:
+            compiled = CompiledForest(model)
+            _compiled[model] = compiled
+        return compiled
+
+
+# ✅ 설정된 백엔드로 포레스트 예측 ("compiled" 이면 NumPy 엔진, 아니면 sklearn)
+def forest_predict(model, X, backend=None):
+    backend = backend or TREE_BACKEND
+    if backend == "compiled":
+        compiled = compile_forest(model)
+        if compiled is not None:
+            return compiled.predict(X)
+    return model.predict(X)